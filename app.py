@@ -1,8 +1,15 @@
 # Initialize 
 import streamlit as st
+import os
+import pandas as pd
 from py.InventoryTracker import InventoryTracker
+from py.PerfRecorder import PerfRecorder, perf_recorder
+from py.handlers.cached_handler import encode_preview, handle_cached_result, handle_last_run, pack_last_run
 from py.handlers.image_handler import handle_image
+from py.handlers.video_export import EXPORT_RESOLUTIONS
 from py.handlers.video_handler import handle_video
+from py.ResultCache import result_cache
+from py.roi import roi_for_source
 
 # -------------------------------
 # App configuration
@@ -41,6 +48,8 @@ st.markdown(hide_sidebar, unsafe_allow_html=True)
 # -------------------------------
 # Initialize tracker in session
 # -------------------------------
+# Each session owns its ByteTrack state and statistics only;
+# the YOLO weights are shared by all sessions through the model registry
 if 'tracker' not in st.session_state:
     st.session_state.tracker = InventoryTracker()
 
@@ -73,10 +82,11 @@ with col_center:
 with col_center:
     # Hard-coded model
     model_selected = "models/model-segment_25-10-10.pt"
-    if model_selected != getattr(tracker, "model_path", None):
-        tracker.model = tracker.model.__class__(model_selected)
-        tracker.model_path = model_selected
-        tracker.reset_output_stats()
+    # Inference backend: "pytorch", or "onnx"/"openvino" for CPU-only hosts
+    # (exported next to the weights on first use)
+    backend_selected = "pytorch"
+    # set_model() is a no-op when the model is already attached
+    tracker.set_model(model_selected, backend=backend_selected)
     
     st.write("⚙️ Inventory detection level (use `sku_code` for developer test):")
     tracker.label_mode = st.selectbox(
@@ -84,6 +94,66 @@ with col_center:
         options=["item_name", "category", "sub_category", "brand", "sku_code"],
         index=0)
 
+    # Lower inference resolution is faster but may miss small items
+    st.write("⚡ Inference resolution (lower = faster, less small-item recall):")
+    imgsz_selected = st.selectbox(
+        "",
+        options=["Model default", 1280, 960, 640, 480, 320],
+        index=0,
+        key="imgsz")
+    tracker.imgsz = None if imgsz_selected == "Model default" else imgsz_selected
+
+    # Videos: analyze fewer frames per second (skipped frames are never retrieved)
+    st.write("🎚️ Video analysis rate (lower = faster on long, slow walkthroughs):")
+    analysis_fps_selected = st.selectbox(
+        "",
+        options=["All frames", 10, 5, 2, 1],
+        index=0,
+        key="analysis_fps")
+    tracker.analysis_fps = None if analysis_fps_selected == "All frames" else analysis_fps_selected
+
+    # Fixed cameras: reuse the last detections while the scene does not change
+    skip_static = st.checkbox("⏸️ Skip unchanged frames (fixed shelf cameras)", value=False)
+    tracker.motion_threshold = None
+    if skip_static:
+        tracker.motion_threshold = st.slider(
+            "Change threshold (mean pixel change that triggers detection)",
+            min_value=0.005, max_value=0.1, value=0.02, step=0.005)
+
+    # Videos: counts per time window (e.g. per minute of a shift recording)
+    st.write("📈 Time series window (counts per window of video):")
+    window_selected = st.selectbox(
+        "",
+        options=["Off", "30 s", "1 min", "5 min", "15 min"],
+        index=0,
+        key="window_s")
+    tracker.window_s = {"Off": None, "30 s": 30, "1 min": 60, "5 min": 300, "15 min": 900}[window_selected]
+
+    # Large shelf photos: infer overlapping 640px tiles instead of one downsampled pass
+    use_tiles = st.checkbox("🧩 Tiled detection for high-resolution photos (slower, finds small items)", value=False)
+    tracker.tile_size = 640 if use_tiles else None
+
+    # Annotated video export (encoded in the background while the video is processed)
+    export_video = st.checkbox("🎞️ Export annotated video for download", value=False)
+    export_settings = None
+    if export_video:
+        col_res, col_fps = st.columns(2)
+        export_resolution = col_res.selectbox("Export resolution", options=list(EXPORT_RESOLUTIONS), index=2)
+        export_fps = col_fps.selectbox("Export frame rate", options=["Source", 15, 10, 5], index=0)
+        export_settings = {
+            "height": EXPORT_RESOLUTIONS[export_resolution],
+            "fps": None if export_fps == "Source" else export_fps,
+        }
+
+    # Per-stage timings: with PERF_METRICS=1 the process-wide recorder times all
+    # sessions; otherwise the panel gives this session its own recorder, so the
+    # other sessions stay uninstrumented
+    show_perf = st.checkbox("⏱️ Show performance panel", value=perf_recorder.enabled)
+    if perf_recorder.enabled or not show_perf:
+        tracker.perf = perf_recorder
+    elif tracker.perf is perf_recorder:
+        tracker.perf = PerfRecorder(enabled=True)
+
 # -------------------------------
 # Helper functions
 # -------------------------------
@@ -101,13 +171,92 @@ st.markdown(
     unsafe_allow_html=True)
 
 if uploaded_file:
-    tracker = st.session_state.tracker
-    tracker.reset_output_stats()
-    if is_image(uploaded_file):
-        handle_image(uploaded_file, tracker)
-    elif is_video(uploaded_file):
-        handle_video(uploaded_file, tracker)
-    else:
+    if not (is_image(uploaded_file) or is_video(uploaded_file)):
         st.warning("Unsupported file type.")
         st.stop()
-        
\ No newline at end of file
+
+    tracker = st.session_state.tracker
+    # Crop to the shelf region configured for this source (data/roi-presets.json), if any
+    tracker.roi = roi_for_source(uploaded_file.name)
+
+    # Same bytes + same model/catalog/settings as an earlier run: reuse its results
+    # (previews are per label mode; an image is redrawn for a mode without one)
+    cache_key = result_cache.key_for(uploaded_file, tracker)
+    last_run = st.session_state.get("last_run")
+    wants_export = export_settings is not None and is_video(uploaded_file)
+    if (last_run is not None and last_run["key"] == cache_key
+            and (not wants_export or last_run.get("export") == export_settings)):
+        # Only the label mode changed (or nothing): the tracker still holds the
+        # per-SKU results of the last run, which are regrouped in milliseconds
+        handle_last_run(last_run, tracker)
+    else:
+        # Drop the previous run (and its exported video file)
+        if last_run is not None and last_run.get("export_path") and os.path.exists(last_run["export_path"]):
+            os.remove(last_run["export_path"])
+        st.session_state.last_run = None
+        tracker.reset_output_stats()
+        cached = result_cache.get(cache_key)
+        # (exports are not cached: a video to export is always processed)
+        # (an image drawn in another mode is redrawn from the detections stored with it)
+        if cached is not None and not wants_export and (is_video(uploaded_file) or tracker.label_mode in cached["previews"]
+                                                         or cached.get("last_run") is not None):
+            handle_cached_result(cached, tracker)
+            st.session_state.last_run = cached.get("last_run") or {"key": cache_key}
+        elif is_image(uploaded_file):
+            frame, annotated_frame = handle_image(uploaded_file, tracker)
+            # Compact copy for redraws; the full-resolution detections are not kept in the session
+            last_run = pack_last_run(cache_key, frame, tracker.last_detections)
+            tracker.last_detections = None
+            result_cache.put(cache_key, tracker.stats.state_dict(), encode_preview(annotated_frame), tracker.label_mode,
+                             last_run=last_run)
+            st.session_state.last_run = last_run
+        elif is_video(uploaded_file):
+            # Only complete runs are cached
+            # An interrupted run of the same video and settings resumes from its checkpoint
+            result = handle_video(uploaded_file, tracker, export=export_settings, checkpoint_key=cache_key)
+            tracker.last_detections = None  # Detections (and masks) of the last frame are not redrawn
+            if result is not None:
+                result_cache.put(cache_key, tracker.stats.state_dict(),
+                                 time_series=tracker.time_series.state_dict() if tracker.time_series is not None else None)
+                st.session_state.last_run = {"key": cache_key, "export": export_settings,
+                                             "export_path": result["export_path"]}
+
+    # Items per time window of the video (restocking / depletion over a shift)
+    if is_video(uploaded_file) and tracker.time_series is not None:
+        time_series = tracker.get_time_series()
+        if not time_series.empty:
+            with st.expander("📈 Items per time window", expanded=False):
+                st.dataframe(time_series, use_container_width=True)
+                st.download_button(
+                    "⬇️ Download time series (CSV)",
+                    data=time_series.to_csv(index=False),
+                    file_name=f"{os.path.splitext(uploaded_file.name)[0]}_timeseries_{tracker.label_mode}.csv",
+                    mime="text/csv")
+
+    # Offer the exported video (the file on disk; frames were never held in memory)
+    last_run = st.session_state.last_run
+    if last_run is not None and last_run.get("export_path") and os.path.exists(last_run["export_path"]):
+        with open(last_run["export_path"], "rb") as export_file:
+            st.download_button(
+                "⬇️ Download annotated video",
+                data=export_file,
+                file_name=f"{os.path.splitext(uploaded_file.name)[0]}_annotated.mp4",
+                mime="video/mp4")
+
+    # Write the stage timings for Prometheus (if PERF_METRICS_FILE is set)
+    tracker.perf.flush()
+
+# -------------------------------
+# Performance panel
+# -------------------------------
+if show_perf:
+    perf_stats = tracker.get_perf_stats()
+    scope = "all sessions" if tracker.perf is perf_recorder else "this session"
+    with st.expander(f"⏱️ Performance (per-stage timings, {scope})", expanded=True):
+        if perf_stats:
+            st.dataframe(pd.DataFrame.from_dict(perf_stats, orient="index"), use_container_width=True)
+        else:
+            st.info("No timings recorded yet: upload a file to process.")
+        load = tracker.governor.stats()
+        st.caption(f"CPU budget: {load['cpus']} CPUs, {load['max_jobs']} concurrent jobs, "
+                   f"{load['torch_threads']} torch threads; {load['running']} running, {load['waiting']} waiting")
@@ -0,0 +1,316 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse         # Command-line arguments
+import json             # Per-file and combined JSON summaries
+import multiprocessing  # Process pool start method
+import os               # File system walking and environment
+import time             # Throughput measurement
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from py.ResourceGovernor import available_cpus  # cgroup-aware CPU count (does not import torch)
+
+# =============================================================================
+# HEADLESS BATCH RUNNER
+# =============================================================================
+# Runs the same InventoryTracker logic as the Streamlit app over directories
+# of shelf photos and store videos, without a browser.
+#
+# Each worker process loads one model and processes whole files; results are
+# written per file (JSON + CSV with the get_output_stats columns) and combined
+# at the end. Files that already have a result are skipped, so an interrupted
+# run can simply be started again.
+#
+# Usage:
+#   python batch.py /data/audits --output-dir results --workers 4 --torch-threads 2
+# =============================================================================
+
+# Same file types as the app's uploader
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv"}
+
+# One tracker per worker process (set by init_worker)
+_tracker = None
+
+
+def collect_files(inputs):
+    """
+    Expands files and directories (recursively) into a sorted list of supported files.
+
+    Args:
+        inputs (list[str]): File or directory paths.
+
+    Returns:
+        list[str]: Absolute paths of images and videos.
+    """
+    supported = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+    files = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in names:
+                    if os.path.splitext(name)[1].lower() in supported:
+                        files.add(os.path.abspath(os.path.join(root, name)))
+        elif os.path.splitext(path)[1].lower() in supported:
+            files.add(os.path.abspath(path))
+        else:
+            print(f"[WARN] Skipping unsupported input: {path}")
+    return sorted(files)
+
+
+def result_name(path):
+    """Flattens an absolute file path into a unique result file name."""
+    return os.path.splitdrive(path)[1].strip(os.sep).replace(os.sep, "__")
+
+
+# =============================================================================
+# WORKER PROCESS
+# =============================================================================
+def init_worker(model_path, label_mode, confidence_threshold, batch_size, torch_threads, backend="pytorch", int8=False,
+                analysis_fps=None, frame_stride=1, motion_threshold=None, window_s=None):
+    """
+    Initializes a worker process: thread budget first, then one model.
+
+    Args:
+        model_path (str): Path to YOLO model weights.
+        label_mode (str): Label used to aggregate stats.
+        confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+        batch_size (int): Frames per inference call for videos.
+        torch_threads (int): Intra-op threads for torch (and OpenMP) in this worker.
+        backend (str): "pytorch", "onnx" or "openvino".
+        int8 (bool): Use the INT8-quantized onnx/openvino artifact.
+        analysis_fps (float, optional): Analyze at most this many video frames per second.
+        frame_stride (int): Analyze every n-th video frame (overrides analysis_fps).
+        motion_threshold (float, optional): Reuse the last detections for video frames
+                                            that changed less than this (0.0-1.0).
+        window_s (float, optional): Also write video counts per window of this many seconds.
+    """
+    global _tracker
+
+    # Step 1: Limit threads before torch is imported, so workers don't oversubscribe the CPU
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+    from py.ResourceGovernor import resource_governor
+    resource_governor.apply_thread_budget(torch_threads)
+
+    # Step 2: Load the model once for all files handled by this worker
+    from py.InventoryTracker import InventoryTracker
+    _tracker = InventoryTracker(model_path=model_path, label_mode=label_mode, backend=backend, int8=int8)
+    _tracker.confidence_threshold = confidence_threshold
+    _tracker.batch_size = batch_size
+    _tracker.analysis_fps = analysis_fps
+    _tracker.frame_stride = frame_stride
+    _tracker.motion_threshold = motion_threshold
+    _tracker.window_s = window_s
+
+    # Only the summaries are written, so never annotate frames
+    _tracker.stats_only = True
+
+
+def process_file(path):
+    """
+    Runs detection and tracking on one image or video.
+
+    Args:
+        path (str): Absolute path of the file.
+
+    Returns:
+        dict: File info, frame count, processing time and summary rows.
+    """
+    import cv2
+
+    start = time.perf_counter()
+    extension = os.path.splitext(path)[1].lower()
+
+    # The worker's tracker is reused across files: restart ByteTrack so that no
+    # tracks or frame counter carry over (new tracks are only output at once on its frame 1)
+    _tracker.tracker.reset()
+
+    # Step 1: Images are a single frame; videos are streamed frame by frame
+    if extension in IMAGE_EXTENSIONS:
+        kind = "image"
+        frame = cv2.imread(path)
+        if frame is None:
+            raise ValueError(f"Could not read image: {path}")
+        _tracker.reset_output_stats()
+        _tracker.track_picture_stream(frame, _tracker.confidence_threshold)
+    else:
+        kind = "video"
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {path}")
+
+        # Temporal sampling: frames in between are skipped with grab() (no pixel retrieval)
+        stride = _tracker.configure_sampling(cap.get(cv2.CAP_PROP_FPS) or 24)
+
+        # Long videos are checkpointed; an interrupted run continues where it stopped
+        from py.ResultCache import result_cache
+        from py.VideoCheckpoint import VideoCheckpointer
+        checkpointer = VideoCheckpointer(result_cache.key_for_file(path, _tracker))
+        resume = checkpointer.load()
+        if resume is not None:
+            print(f"[INFO] {path}: resuming after {resume['frames']} frames")
+
+        def frame_generator():
+            for _ in range(resume["frames"] * stride if resume is not None else 0):
+                if not cap.grab():
+                    return
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+                for _ in range(stride - 1):
+                    if not cap.grab():
+                        return
+
+        try:
+            for _ in _tracker.track_video_stream(frame_generator(), _tracker.confidence_threshold,
+                                                 resume=resume, checkpointer=checkpointer):
+                pass
+        finally:
+            cap.release()
+        checkpointer.discard()
+
+    # Step 2: Same summary as the app's table
+    output_stats = _tracker.get_output_stats()
+    return {
+        "file": path,
+        "type": kind,
+        "label_mode": _tracker.label_mode,
+        "frames": _tracker.frame_count,
+        "seconds": round(time.perf_counter() - start, 3),
+        "motion_gate": _tracker.get_gate_stats() if _tracker.motion_threshold is not None else None,
+        "time_series": _tracker.get_time_series().to_dict(orient="records") if kind == "video" and _tracker.window_s else None,
+        "rows": output_stats.to_dict(orient="records"),
+    }
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+def write_file_result(output_dir, result):
+    """Writes one file's summary as JSON (the resume marker) and CSV."""
+    import pandas as pd
+
+    files_dir = os.path.join(output_dir, "files")
+    os.makedirs(files_dir, exist_ok=True)
+    base = os.path.join(files_dir, result_name(result["file"]))
+
+    pd.DataFrame(result["rows"]).to_csv(base + ".csv", index=False)
+    if result.get("time_series"):
+        pd.DataFrame(result["time_series"]).to_csv(base + ".timeseries.csv", index=False)
+
+    # JSON last and atomically: its presence means the file is done
+    with open(base + ".json.tmp", "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(base + ".json.tmp", base + ".json")
+
+
+def write_combined(output_dir, files):
+    """Writes combined.json and combined.csv from the per-file results of all given files."""
+    import pandas as pd
+
+    results, rows = [], []
+    for path in files:
+        result_path = os.path.join(output_dir, "files", result_name(path) + ".json")
+        if not os.path.exists(result_path):
+            continue
+        with open(result_path) as f:
+            result = json.load(f)
+        results.append(result)
+        rows.extend({"file": result["file"], "type": result["type"], **row} for row in result["rows"])
+
+    with open(os.path.join(output_dir, "combined.json"), "w") as f:
+        json.dump(results, f, indent=2)
+    pd.DataFrame(rows).to_csv(os.path.join(output_dir, "combined.csv"), index=False)
+    return len(results)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Run inventory detection over image and video files.")
+    parser.add_argument("inputs", nargs="+", help="Files or directories (searched recursively).")
+    parser.add_argument("--output-dir", default="batch-results", help="Where summaries are written.")
+    parser.add_argument("--model", default="models/model-segment_25-10-10.pt", help="YOLO weights.")
+    parser.add_argument("--label-mode", default="item_name",
+                        choices=["sku_code", "item_name", "brand", "sub_category", "category"])
+    parser.add_argument("--conf", type=float, default=0.0, help="Confidence threshold.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count / torch threads).")
+    parser.add_argument("--torch-threads", type=int, default=1, help="Torch threads per worker.")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per inference call for videos.")
+    parser.add_argument("--backend", default="pytorch", choices=["pytorch", "onnx", "openvino"],
+                        help="Inference backend (onnx/openvino artifacts are cached next to the weights).")
+    parser.add_argument("--int8", action="store_true", help="Use the INT8-quantized onnx/openvino artifact.")
+    parser.add_argument("--analysis-fps", type=float, default=None,
+                        help="Analyze at most this many video frames per second (default: every frame).")
+    parser.add_argument("--frame-stride", type=int, default=1,
+                        help="Analyze every n-th video frame (overrides --analysis-fps).")
+    parser.add_argument("--motion-threshold", type=float, default=None,
+                        help="Reuse the last detections for video frames that changed less than this "
+                             "(mean pixel change, 0.0-1.0; e.g. 0.02 for fixed cameras).")
+    parser.add_argument("--window-s", type=float, default=None,
+                        help="Also write video counts per time window of this many seconds (<file>.timeseries.csv).")
+    parser.add_argument("--force", action="store_true", help="Reprocess files that already have results.")
+    args = parser.parse_args()
+
+    # Step 1: Find the files and skip those already processed (resume)
+    files = collect_files(args.inputs)
+    os.makedirs(args.output_dir, exist_ok=True)
+    done = {
+        path for path in files
+        if os.path.exists(os.path.join(args.output_dir, "files", result_name(path) + ".json"))
+    }
+    pending = files if args.force else [path for path in files if path not in done]
+    # Default: as many workers as the container's CPU quota allows (cgroup-aware)
+    workers = args.workers or max(1, available_cpus() // args.torch_threads)
+    print(f"[INFO] {len(files)} files found, {len(files) - len(pending)} already done, "
+          f"{len(pending)} to process on {workers} workers x {args.torch_threads} torch threads")
+
+    # Step 2: Process pending files in parallel (spawn: fresh interpreter, no forked torch state)
+    start = time.perf_counter()
+    total_frames, failed = 0, 0
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(args.model, args.label_mode, args.conf, args.batch_size, args.torch_threads,
+                      args.backend, args.int8, args.analysis_fps, args.frame_stride, args.motion_threshold,
+                      args.window_s),
+        ) as pool:
+            futures = {pool.submit(process_file, path): path for path in pending}
+            for index, future in enumerate(as_completed(futures), start=1):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[ERROR] {path}: {e}")
+                    continue
+                write_file_result(args.output_dir, result)
+                total_frames += result["frames"]
+                fps = result["frames"] / result["seconds"] if result["seconds"] else 0.0
+                gate = result.get("motion_gate")
+                skipped = f", {gate['skipped_fraction']:.0%} unchanged frames skipped" if gate else ""
+                print(f"[{index}/{len(pending)}] {path}: {result['frames']} frames in {result['seconds']:.1f}s ({fps:.1f} fps{skipped})")
+
+    # Step 3: Combined summaries over every processed file (including earlier runs)
+    combined = write_combined(args.output_dir, files)
+    elapsed = time.perf_counter() - start
+
+    # Step 4: Throughput report
+    processed = len(pending) - failed
+    print("\n========== Throughput report ==========")
+    print(f"Files processed : {processed} ({failed} failed, {len(files) - len(pending)} skipped)")
+    print(f"Frames          : {total_frames}")
+    print(f"Wall time       : {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput      : {total_frames / elapsed:.1f} frames/s, {processed / elapsed:.2f} files/s")
+    print(f"Results         : {combined} files in {os.path.abspath(args.output_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse     # Command-line arguments
+import time         # Wall-clock timing
+import numpy as np  # Agreement metrics
+from benchmarks.batch_inference import read_frames
+from py.InferenceBackend import resolve_model_artifact, sample_video_frames
+from py.InventoryTracker import InventoryTracker
+
+# =============================================================================
+# INFERENCE BACKEND BENCHMARK
+# =============================================================================
+# Compares ONNX Runtime / OpenVINO (FP32 and INT8) against PyTorch on real
+# videos:
+#   - frames/sec of the inference call (stats-only tracking, so drawing is excluded)
+#   - count agreement: share of frames with the same number of detections,
+#     and agreement of the final unique-item counts per SKU
+#
+# Usage (from the repository root):
+#   python -m benchmarks.backends store.mp4 --backends pytorch onnx openvino onnx-int8 openvino-int8
+# =============================================================================
+
+def parse_backend(name):
+    """'openvino-int8' -> ('openvino', True)"""
+    backend, _, variant = name.partition("-")
+    return backend, variant == "int8"
+
+
+def run_backend(tracker, frames, confidence_threshold, batch_size):
+    """
+    Runs all frames through the tracker in stats-only mode.
+
+    Returns:
+        tuple: (frames/sec, detections per frame, final live_summary)
+    """
+    tracker.reset_output_stats()
+    tracker.tracker.reset()
+    detections_per_frame = []
+    start = time.perf_counter()
+    for index in range(0, len(frames), batch_size):
+        batch = frames[index:index + batch_size]
+        for frame, results in zip(batch, tracker.infer_frames(batch, confidence_threshold)):
+            detections_per_frame.append(len(results.boxes) if results.boxes is not None else 0)
+            tracker.process_result(frame, results, annotate=False)
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, np.array(detections_per_frame), tracker.stats.live_summary()
+
+
+def count_agreement(reference, summary):
+    """Share of the reference's unique items matched per SKU (1.0 = identical counts)."""
+    skus = set(reference) | set(summary)
+    total = sum(max(reference.get(sku, 0), summary.get(sku, 0)) for sku in skus)
+    matched = sum(min(reference.get(sku, 0), summary.get(sku, 0)) for sku in skus)
+    return matched / total if total else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends against PyTorch.")
+    parser.add_argument("video", help="Video file to benchmark on.")
+    parser.add_argument("--model", default="models/model-segment_25-10-10.pt", help="YOLO weights (.pt).")
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "openvino"],
+                        help="pytorch, onnx, openvino, onnx-int8, openvino-int8")
+    parser.add_argument("--calibration", nargs="*", default=[],
+                        help="Videos for INT8 calibration (default: the benchmark video).")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold.")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per inference call.")
+    parser.add_argument("--max-frames", type=int, default=300, help="Frames to process (0 = all).")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.max_frames or None)
+    if not frames:
+        raise SystemExit(f"No frames decoded from {args.video}")
+
+    # PyTorch is always the reference
+    names = ["pytorch"] + [name for name in args.backends if name != "pytorch"]
+    calibration_frames = None
+
+    print(f"{args.video}: {len(frames)} frames, batch size {args.batch_size}")
+    print(f"{'backend':<15} {'fps':>8} {'speedup':>8} {'frame count agree':>18} {'mean |diff|':>12} {'item count agree':>17}")
+    reference = None
+    for name in names:
+        backend, int8 = parse_backend(name)
+
+        # Build INT8 artifacts on demand, calibrated on sample frames
+        if int8:
+            if calibration_frames is None:
+                calibration_frames = sample_video_frames(args.calibration or [args.video])
+            resolve_model_artifact(args.model, backend, int8, calibration_frames)
+
+        tracker = InventoryTracker(model_path=args.model, backend=backend, int8=int8)
+        run_backend(tracker, frames[:5], args.conf, args.batch_size)  # Warm-up
+        fps, per_frame, summary = run_backend(tracker, frames, args.conf, args.batch_size)
+
+        if reference is None:
+            reference = (fps, per_frame, summary)
+        ref_fps, ref_per_frame, ref_summary = reference
+        frame_agree = np.mean(per_frame == ref_per_frame) * 100
+        mean_diff = np.mean(np.abs(per_frame - ref_per_frame))
+        item_agree = count_agreement(ref_summary, summary) * 100
+        print(f"{name:<15} {fps:>8.2f} {fps / ref_fps:>7.2f}x {frame_agree:>17.1f}% {mean_diff:>12.2f} {item_agree:>16.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse     # Command-line arguments
+import time         # Wall-clock timing
+import cv2          # OpenCV for video decoding
+from py.InventoryTracker import InventoryTracker
+
+# =============================================================================
+# BATCHED INFERENCE BENCHMARK
+# =============================================================================
+# Measures the throughput of InventoryTracker.track_video_stream for several
+# batch sizes on real videos, and checks that every batch size produces the
+# same final counts as the per-frame path (batch_size=1).
+#
+# Usage (from the repository root):
+#   python -m benchmarks.batch_inference store.mp4 --batch-sizes 1 4 8 16
+# =============================================================================
+
+def read_frames(video_path, max_frames=None):
+    """
+    Decodes a video into memory so that decoding time is excluded from the timings.
+
+    Args:
+        video_path (str): Path to the video file.
+        max_frames (int, optional): Stop after this many frames.
+
+    Returns:
+        list[np.ndarray]: Decoded frames in BGR format.
+    """
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret or (max_frames and len(frames) >= max_frames):
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_once(tracker, frames, confidence_threshold, batch_size):
+    """
+    Runs one full pass over the frames with the given batch size.
+
+    Returns:
+        tuple: (elapsed_seconds, final live_summary)
+    """
+    # Every pass starts from a fresh ByteTrack, so that the counts are comparable
+    tracker.tracker.reset()
+    live_summary = {}
+    start = time.perf_counter()
+    for _, live_summary in tracker.track_video_stream(frames, confidence_threshold, batch_size=batch_size):
+        pass
+    return time.perf_counter() - start, live_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched inference in track_video_stream.")
+    parser.add_argument("videos", nargs="+", help="Video files to process.")
+    parser.add_argument("--model", default="models/model-segment_25-10-10.pt", help="YOLO weights.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8], help="Batch sizes to compare.")
+    parser.add_argument("--conf", type=float, default=0.0, help="Confidence threshold.")
+    parser.add_argument("--max-frames", type=int, default=300, help="Frames per video (0 = all).")
+    args = parser.parse_args()
+
+    tracker = InventoryTracker(model_path=args.model)
+    batch_sizes = sorted(set(args.batch_sizes) | {1})
+
+    for video_path in args.videos:
+        frames = read_frames(video_path, args.max_frames or None)
+        if not frames:
+            print(f"[WARN] No frames decoded from {video_path}, skipping")
+            continue
+
+        # Warm-up pass so that model initialization is not counted
+        run_once(tracker, frames[:min(len(frames), max(batch_sizes))], args.conf, 1)
+
+        print(f"\n{video_path} ({len(frames)} frames)")
+        print(f"{'batch':>6} {'fps':>8} {'speedup':>8} {'same counts':>12}")
+        baseline_fps, baseline_summary = None, None
+        for batch_size in batch_sizes:
+            elapsed, summary = run_once(tracker, frames, args.conf, batch_size)
+            fps = len(frames) / elapsed
+            if batch_size == 1:
+                baseline_fps, baseline_summary = fps, summary
+            print(f"{batch_size:>6} {fps:>8.2f} {fps / baseline_fps:>7.2f}x {str(summary == baseline_summary):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse     # Command-line arguments
+import threading    # One thread per simulated session
+import time         # Wall-clock timing
+import numpy as np  # Percentiles
+from benchmarks.synthetic import StubModel, synthetic_frames
+from py.InventoryTracker import InventoryTracker
+from py.ModelRegistry import model_registry
+
+# =============================================================================
+# CROSS-CLIENT MICRO-BATCHING BENCHMARK
+# =============================================================================
+# Simulates N concurrent sessions, each with its own InventoryTracker
+# (ByteTrack + statistics), sending one frame at a time to the same model.
+# Compares direct calls (sessions take turns on the model lock) with the
+# inference service for several batch sizes, reporting total frames/sec and
+# per-frame latency percentiles.
+#
+# The model is the StubModel with a simulated cost per call and per frame
+# (defaults roughly match a CPU where batching amortizes half the cost);
+# pass --model to measure real weights instead.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.inference_service --clients 8 --max-batch 1 4 8 --max-wait-ms 10
+# =============================================================================
+
+def run_clients(model_path, num_clients, frames, confidence_threshold):
+    """
+    Runs every client's frames through track_picture_stream concurrently.
+
+    Returns:
+        tuple: (total frames/sec, per-frame latencies in seconds)
+    """
+    trackers = [InventoryTracker(model_path=model_path) for _ in range(num_clients)]
+    latencies = [[] for _ in range(num_clients)]
+
+    def client(index):
+        tracker = trackers[index]
+        for frame in frames:
+            start = time.perf_counter()
+            tracker.track_picture_stream(frame, confidence_threshold, stats_only=True)
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(num_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_clients * len(frames) / elapsed, np.concatenate([np.array(values) for values in latencies])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-client micro-batching.")
+    parser.add_argument("--model", help="YOLO weights (default: stub model).")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent sessions.")
+    parser.add_argument("--frames", type=int, default=50, help="Frames per session.")
+    parser.add_argument("--resolution", default="1280x720", help="Synthetic frame size.")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[1, 4, 8], help="Batch sizes (1 = direct calls).")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="Batching latency budget.")
+    parser.add_argument("--call-ms", type=float, default=20.0, help="Stub: fixed cost per model call.")
+    parser.add_argument("--frame-ms", type=float, default=20.0, help="Stub: extra cost per frame.")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold.")
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.resolution.lower().split("x"))
+    frames = list(synthetic_frames(args.frames, width, height))
+
+    if args.model:
+        model_path = args.model
+        shared_model = model_registry.acquire(model_path)
+    else:
+        shared_model = StubModel(latency_ms=args.call_ms, frame_latency_ms=args.frame_ms)
+        model_registry.register(shared_model)
+        model_path = shared_model.model_path
+
+    print(f"{args.clients} clients x {len(frames)} frames ({args.resolution}), wait budget {args.max_wait_ms:.0f} ms")
+    print(f"{'max batch':>10} {'fps':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    baseline_fps = None
+    for max_batch in args.max_batch:
+        shared_model.stop_service()
+        if max_batch > 1:
+            shared_model.start_service(max_batch, args.max_wait_ms)
+        fps, latencies = run_clients(model_path, args.clients, frames, args.conf)
+        mean_batch = shared_model.service.stats()["mean_batch"] if shared_model.service else 1.0
+        baseline_fps = baseline_fps or fps
+        p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+        print(f"{max_batch:>10} {fps:>8.1f} {fps / baseline_fps:>7.2f}x {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {mean_batch:>11.2f}")
+    shared_model.stop_service()
+
+
+if __name__ == "__main__":
+    main()
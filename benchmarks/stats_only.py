@@ -0,0 +1,70 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse     # Command-line arguments
+import time         # Wall-clock timing
+import numpy as np  # Percentiles
+from benchmarks.batch_inference import read_frames
+from py.InventoryTracker import InventoryTracker
+
+# =============================================================================
+# STATS-ONLY BENCHMARK
+# =============================================================================
+# Compares the per-frame cost of the full path (frame copy + masks + all four
+# annotators) with the counting-only path (stats_only=True) for detection and
+# segmentation models, and checks that both produce the same counts.
+#
+# Usage (from the repository root):
+#   python -m benchmarks.stats_only store.mp4 \
+#       --models models/model-detect.pt models/model-segment_25-10-10.pt
+# =============================================================================
+
+def time_frames(tracker, frames, confidence_threshold, stats_only):
+    """
+    Tracks all frames once and times each track_picture_stream call.
+
+    Returns:
+        tuple: (per-frame seconds as np.ndarray, final live_summary)
+    """
+    tracker.reset_output_stats()
+    tracker.tracker.reset()
+    timings, live_summary = [], {}
+    for frame in frames:
+        start = time.perf_counter()
+        _, live_summary = tracker.track_picture_stream(frame, confidence_threshold, stats_only=stats_only)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings), live_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stats-only fast path.")
+    parser.add_argument("video", help="Video file to process.")
+    parser.add_argument("--models", nargs="+", default=["models/model-segment_25-10-10.pt"],
+                        help="Detection and/or segmentation weights to compare.")
+    parser.add_argument("--conf", type=float, default=0.0, help="Confidence threshold.")
+    parser.add_argument("--max-frames", type=int, default=200, help="Frames to process (0 = all).")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.max_frames or None)
+    if not frames:
+        raise SystemExit(f"No frames decoded from {args.video}")
+
+    print(f"{args.video}: {len(frames)} frames, {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"{'model':<40} {'type':<6} {'full ms':>8} {'stats ms':>9} {'saved ms':>9} {'saved %':>8} {'p95 full':>9} {'p95 stats':>10} {'same':>5}")
+    for model_path in args.models:
+        tracker = InventoryTracker(model_path=model_path)
+        kind = "seg" if tracker.is_segmentation else "det"
+
+        # Warm-up so that model initialization is not counted
+        time_frames(tracker, frames[:5], args.conf, stats_only=False)
+
+        full, full_summary = time_frames(tracker, frames, args.conf, stats_only=False)
+        fast, fast_summary = time_frames(tracker, frames, args.conf, stats_only=True)
+        full_ms, fast_ms = full.mean() * 1000, fast.mean() * 1000
+        print(f"{model_path[-40:]:<40} {kind:<6} {full_ms:>8.1f} {fast_ms:>9.1f} {full_ms - fast_ms:>9.1f} "
+              f"{(1 - fast_ms / full_ms) * 100:>7.1f}% {np.percentile(full, 95) * 1000:>9.1f} "
+              f"{np.percentile(fast, 95) * 1000:>10.1f} {str(full_summary == fast_summary):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import threading                        # Same lock attribute as SharedModel
+import time                             # Optional simulated inference latency
+from types import SimpleNamespace       # Minimal stand-in for the YOLO object
+import cv2                              # Synthetic video files
+import numpy as np                      # Frames, boxes and masks
+import torch                            # Ultralytics Results hold torch tensors
+from ultralytics.engine.results import Results
+from py.ModelRegistry import SharedModel
+
+# =============================================================================
+# SYNTHETIC INPUTS FOR OFFLINE BENCHMARKS
+# =============================================================================
+# StubModel replaces the YOLO weights with a deterministic detector, so the
+# cost of everything around the model (conversion, ByteTrack, statistics,
+# annotation) can be measured without model files or model compute:
+#
+#   - it emits exactly `num_detections` boxes per frame, laid out on a grid
+#     that drifts slowly from call to call, so ByteTrack keeps stable tracks
+#   - segmentation stubs also emit masks at the letterboxed input resolution,
+#     like Ultralytics does, so mask rescaling is measured realistically
+#   - it returns real Ultralytics Results, so sv.Detections.from_ultralytics
+#     runs exactly as it does in production
+#
+# Register a stub with model_registry.register() and create the tracker with
+# the stub's model_path.
+# =============================================================================
+
+class StubModel(SharedModel):
+    def __init__(self, num_detections=20, segmentation=False, num_classes=25, imgsz=640, latency_ms=0.0,
+                 frame_latency_ms=0.0):
+        """
+        Creates a deterministic stand-in for a loaded YOLO model.
+
+        Args:
+            num_detections (int): Boxes emitted per frame.
+            segmentation (bool): Also emit masks (like a -seg model).
+            num_classes (int): Number of classes (SKUs) of the fake model.
+            imgsz (int): Simulated model input size (sets the mask resolution).
+            latency_ms (float): Simulated fixed cost of every model call.
+            frame_latency_ms (float): Simulated extra cost per frame of a call.
+        """
+        # No super().__init__(): there are no weights to load
+        task = "segment" if segmentation else "detect"
+        self.model_path = f"stub://{task}/{num_detections}"
+        self.backend = "pytorch"
+        self.int8 = False
+        self.artifact_path = self.model_path
+        self.names = {i: f"SKU{i:04d}" for i in range(num_classes)}
+        self.model = SimpleNamespace(names=self.names, task=task)
+        self.is_segmentation = segmentation
+        self.class_skus = np.array([self.names[i] for i in range(num_classes)], dtype=object)
+        self._label_tables = (None, None)
+        self.lock = threading.Lock()
+        self.ref_count = 0
+        self.service = None
+
+        self.num_detections = num_detections
+        self.imgsz = imgsz
+        self.latency_ms = latency_ms
+        self.frame_latency_ms = frame_latency_ms
+        self.calls = 0
+
+    def run_batch(self, frames, **kwargs):
+        """
+        Returns one Ultralytics Results per frame (conf filters like YOLO; other arguments are ignored).
+        """
+        with self.lock:
+            if self.latency_ms or self.frame_latency_ms:
+                time.sleep((self.latency_ms + self.frame_latency_ms * len(frames)) / 1000)
+            results = []
+            for frame in frames:
+                results.append(self._fake_result(frame, self.calls, kwargs.get("conf", 0.0)))
+                self.calls += 1
+            return results
+
+    def _fake_result(self, frame, call_index, confidence_threshold):
+        """Builds the Results of one frame: grid boxes that drift by one pixel per call."""
+        height, width = frame.shape[:2]
+        n = self.num_detections
+
+        # Step 1: Boxes on a grid covering the frame, shifted a little every call
+        columns = max(1, int(np.ceil(np.sqrt(n * width / height))))
+        rows = max(1, int(np.ceil(n / columns)))
+        cell_w, cell_h = width / columns, height / rows
+        index = np.arange(n)
+        drift = call_index % max(1, int(cell_w * 0.1))
+        x1 = (index % columns) * cell_w + cell_w * 0.1 + drift
+        y1 = (index // columns) * cell_h + cell_h * 0.1
+        x2 = np.minimum(x1 + cell_w * 0.8, width - 1)
+        y2 = y1 + cell_h * 0.8
+        confidence = 0.3 + 0.7 * ((index * 37) % 100) / 100
+        class_id = index % len(self.names)
+        boxes = np.stack([x1, y1, x2, y2, confidence, class_id], axis=1).astype(np.float32)
+        boxes = boxes[boxes[:, 4] >= confidence_threshold]
+
+        # Step 2: Masks at the letterboxed input size (rectangle inside each box)
+        masks = None
+        if self.is_segmentation and len(boxes):
+            scale = self.imgsz / max(height, width)
+            input_h = int(np.ceil(height * scale / 32) * 32)
+            input_w = int(np.ceil(width * scale / 32) * 32)
+            pad_x, pad_y = (input_w - width * scale) / 2, (input_h - height * scale) / 2
+            masks = np.zeros((len(boxes), input_h, input_w), dtype=np.float32)
+            for row, (bx1, by1, bx2, by2) in enumerate(boxes[:, :4]):
+                mx1, my1 = int(bx1 * scale + pad_x), int(by1 * scale + pad_y)
+                mx2, my2 = int(bx2 * scale + pad_x), int(by2 * scale + pad_y)
+                masks[row, my1:my2, mx1:mx2] = 1.0
+            masks = torch.from_numpy(masks)
+
+        return Results(frame, path="", names=self.names, boxes=torch.from_numpy(boxes), masks=masks)
+
+
+def synthetic_frames(num_frames, width=1280, height=720, seed=0):
+    """
+    Yields deterministic BGR frames resembling a slowly panning camera.
+
+    A random texture is generated once and rolled by a few pixels per frame,
+    so generating frames costs almost nothing next to the pipeline itself.
+
+    Args:
+        num_frames (int): Number of frames to yield.
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+        seed (int): Random seed of the texture.
+
+    Yields:
+        np.ndarray: Frames of shape (height, width, 3), dtype uint8.
+    """
+    rng = np.random.default_rng(seed)
+    texture = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    for index in range(num_frames):
+        yield np.roll(texture, shift=index * 2, axis=1)
+
+
+def synthetic_video(path, num_frames, width=1280, height=720, fps=25.0, seed=0):
+    """
+    Writes synthetic_frames() to a video file (e.g. to benchmark decoding).
+
+    Args:
+        path (str): Output .mp4 path.
+        num_frames (int): Number of frames.
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+        fps (float): Frame rate stored in the file.
+        seed (int): Random seed of the texture.
+
+    Returns:
+        str: The path written.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for frame in synthetic_frames(num_frames, width, height, seed):
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
@@ -0,0 +1,268 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import argparse     # Command-line arguments
+import datetime     # Result timestamps
+import json         # Machine-readable results and baseline
+import os           # Output paths
+import platform     # Host description in the results
+import sys          # Exit code on regressions
+import time         # Wall-clock timing
+import tracemalloc  # Peak memory of NumPy/Python allocations
+import numpy as np  # Percentiles
+import supervision as sv
+from benchmarks.synthetic import StubModel, synthetic_frames
+from py.InventoryTracker import InventoryTracker
+from py.LabelCatalog import LABEL_MODES
+from py.ModelRegistry import model_registry
+
+# =============================================================================
+# OFFLINE TRACKER BENCHMARK SUITE
+# =============================================================================
+# Measures InventoryTracker without model files: a deterministic StubModel
+# emits a fixed number of boxes (and masks) per frame, on synthetic frames,
+# for every combination of model type x resolution x detections per frame.
+#
+# Per case:
+#   picture_*   track_picture_stream, per-frame latency p50/p95/p99 and fps
+#   stage_*     the same frames split into its stages:
+#               infer (stub model) / convert (from_ultralytics + ROI mapping) /
+#               track_stats (ByteTrack + statistics) / annotate (drawing)
+#   video_*     track_video_stream fps, annotated and stats-only
+#   stats_*     get_output_stats latency over all label modes
+#   peak_mb     peak traced memory of one annotated track_video_stream pass
+#
+# Results are written as JSON. With --baseline, every metric is compared
+# against a stored run and the exit code is 1 if any metric regressed by more
+# than --tolerance (fps lower, latency/memory higher).
+#
+# Usage (from the repository root):
+#   python -m benchmarks.tracker_suite --save-baseline            # record benchmarks/baseline.json
+#   python -m benchmarks.tracker_suite --baseline benchmarks/baseline.json
+# =============================================================================
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentiles(seconds, prefix):
+    """Returns {prefix_p50_ms, prefix_p95_ms, prefix_p99_ms} for a list of durations."""
+    milliseconds = np.asarray(seconds) * 1000
+    return {f"{prefix}_p{q}_ms": round(float(np.percentile(milliseconds, q)), 4) for q in (50, 95, 99)}
+
+
+def fresh_state(tracker):
+    """Resets statistics and tracks so every measurement starts from the same state."""
+    tracker.reset_output_stats()
+    tracker.tracker = sv.ByteTrack()
+
+
+def measure_picture(tracker, frames, confidence_threshold):
+    """Times track_picture_stream per frame."""
+    fresh_state(tracker)
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        tracker.track_picture_stream(frame, confidence_threshold, stats_only=False)
+        timings.append(time.perf_counter() - start)
+    metrics = percentiles(timings, "picture")
+    metrics["picture_fps"] = round(len(frames) / sum(timings), 2)
+    return metrics
+
+
+def measure_stages(tracker, frames, confidence_threshold):
+    """Times the stages of track_picture_stream separately (same calls, same order)."""
+    fresh_state(tracker)
+    stages = {"infer": [], "convert": [], "track_stats": [], "annotate": []}
+    process = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        results = tracker.infer_frames([frame], confidence_threshold)[0]
+        t1 = time.perf_counter()
+        detections = tracker.to_detections(frame, results, with_masks=True)
+        t2 = time.perf_counter()
+        tracker.process_detections(frame, detections, annotate=True)
+        t3 = time.perf_counter()
+        stages["infer"].append(t1 - t0)
+        stages["convert"].append(t2 - t1)
+        process.append(t3 - t2)
+
+    # Tracking + statistics cannot be timed apart from drawing inside one call,
+    # so the same frames are replayed from a fresh state without annotation
+    fresh_state(tracker)
+    for frame in frames:
+        results = tracker.infer_frames([frame], confidence_threshold)[0]
+        detections = tracker.to_detections(frame, results, with_masks=False)
+        start = time.perf_counter()
+        tracker.process_detections(frame, detections, annotate=False)
+        stages["track_stats"].append(time.perf_counter() - start)
+
+    # Drawing = (tracking + statistics + drawing) - (tracking + statistics), per frame
+    stages["annotate"] = np.maximum(np.array(process) - np.array(stages["track_stats"]), 0)
+
+    metrics = {}
+    for stage, timings in stages.items():
+        metrics.update(percentiles(timings, f"stage_{stage}"))
+    return metrics
+
+
+def measure_video(tracker, frames, confidence_threshold, batch_size):
+    """Measures track_video_stream throughput, annotated and stats-only."""
+    metrics = {}
+    for name, stats_only in (("video", False), ("video_stats_only", True)):
+        fresh_state(tracker)
+        start = time.perf_counter()
+        for _ in tracker.track_video_stream(frames, confidence_threshold, batch_size=batch_size, stats_only=stats_only):
+            pass
+        metrics[f"{name}_fps"] = round(len(frames) / (time.perf_counter() - start), 2)
+    return metrics
+
+
+def measure_output_stats(tracker, repeats=20):
+    """Times get_output_stats for every label mode (statistics of the last video pass)."""
+    label_mode = tracker.label_mode
+    timings = []
+    for _ in range(repeats):
+        for mode in LABEL_MODES:
+            tracker.label_mode = mode
+            start = time.perf_counter()
+            tracker.get_output_stats()
+            timings.append(time.perf_counter() - start)
+    tracker.label_mode = label_mode
+    return percentiles(timings, "stats")
+
+
+def measure_peak_memory(tracker, frames, confidence_threshold, batch_size):
+    """Peak traced memory (MB) of one annotated track_video_stream pass."""
+    fresh_state(tracker)
+    tracemalloc.start()
+    try:
+        for _ in tracker.track_video_stream(frames, confidence_threshold, batch_size=batch_size, stats_only=False):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_mb": round(peak / 2**20, 2)}
+
+
+def run_case(task, width, height, num_detections, args):
+    """Runs every measurement for one model type / resolution / detection count."""
+    stub = StubModel(num_detections=num_detections, segmentation=(task == "segment"), latency_ms=args.latency_ms)
+    model_registry.register(stub)
+    tracker = InventoryTracker(model_path=stub.model_path)
+    frames = list(synthetic_frames(args.frames, width, height))
+
+    # Warm-up (annotator fonts, first-call allocations)
+    measure_picture(tracker, frames[:3], args.conf)
+
+    metrics = {}
+    metrics.update(measure_picture(tracker, frames, args.conf))
+    metrics.update(measure_stages(tracker, frames, args.conf))
+    metrics.update(measure_video(tracker, frames, args.conf, args.batch_size))
+    metrics.update(measure_output_stats(tracker))
+    metrics.update(measure_peak_memory(tracker, frames, args.conf, args.batch_size))
+    return metrics
+
+
+# =============================================================================
+# BASELINE COMPARISON
+# =============================================================================
+def regression(metric, baseline, current, tolerance):
+    """Relative change if the metric got worse by more than tolerance, else None."""
+    if not baseline:
+        return None
+    if metric.endswith("_fps"):
+        change = (baseline - current) / baseline   # lower is worse
+    else:
+        change = (current - baseline) / baseline   # higher is worse (latency, memory)
+    return change if change > tolerance else None
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints every metric that regressed against the baseline.
+
+    Returns:
+        int: Number of regressed metrics.
+    """
+    regressions = 0
+    for case, metrics in results["cases"].items():
+        baseline_metrics = baseline.get("cases", {}).get(case)
+        if baseline_metrics is None:
+            print(f"[WARN] {case}: not in baseline, skipped")
+            continue
+        for metric, value in metrics.items():
+            change = regression(metric, baseline_metrics.get(metric), value, tolerance)
+            if change is not None:
+                regressions += 1
+                print(f"[WARN] {case} {metric}: {baseline_metrics[metric]} -> {value} ({change * 100:+.1f}% worse)")
+    print(f"[INFO] {regressions} regression(s) beyond {tolerance * 100:.0f}% tolerance")
+    return regressions
+
+
+def parse_resolution(text):
+    """'1280x720' -> (1280, 720)"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for InventoryTracker (stub model, synthetic frames).")
+    parser.add_argument("--tasks", nargs="+", default=["detect", "segment"], choices=["detect", "segment"])
+    parser.add_argument("--resolutions", nargs="+", default=["640x480", "1280x720", "1920x1080"])
+    parser.add_argument("--detections", type=int, nargs="+", default=[0, 10, 50, 150], help="Boxes per frame.")
+    parser.add_argument("--frames", type=int, default=100, help="Frames per case.")
+    parser.add_argument("--batch-size", type=int, default=4, help="Batch size of the track_video_stream passes.")
+    parser.add_argument("--conf", type=float, default=0.0, help="Confidence threshold.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated model time per inference call.")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/tracker-<timestamp>.json).")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression (0.15 = 15%%).")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also store the results as {DEFAULT_BASELINE}.")
+    args = parser.parse_args()
+
+    # Step 1: Run every case
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    results = {
+        "meta": {
+            "timestamp": timestamp,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "supervision": sv.__version__,
+            "args": vars(args),
+        },
+        "cases": {},
+    }
+    print(f"{'case':<32} {'picture fps':>12} {'p95 ms':>8} {'video fps':>10} {'stats-only fps':>15} {'peak MB':>8}")
+    for task in args.tasks:
+        for resolution in args.resolutions:
+            width, height = parse_resolution(resolution)
+            for num_detections in args.detections:
+                case = f"{task}/{width}x{height}/{num_detections}det"
+                metrics = run_case(task, width, height, num_detections, args)
+                results["cases"][case] = metrics
+                print(f"{case:<32} {metrics['picture_fps']:>12.1f} {metrics['picture_p95_ms']:>8.2f} "
+                      f"{metrics['video_fps']:>10.1f} {metrics['video_stats_only_fps']:>15.1f} {metrics['peak_mb']:>8.1f}")
+
+    # Step 2: Save the results
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"tracker-{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Results written to {output}")
+    if args.save_baseline:
+        with open(DEFAULT_BASELINE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] Baseline written to {DEFAULT_BASELINE}")
+
+    # Step 3: Compare against the baseline (non-zero exit code on regressions)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+# =============================================================================
+# PYTEST CONFIGURATION
+# =============================================================================
+# pytest installs a `py` compatibility module (py.path / py.error) before the
+# tests are collected, which shadows this repository's `py` package. Drop it
+# so that `from py.InventoryTracker import ...` resolves to the repository.
+#
+# Run the tests from the repository root with the pytest executable:
+#   pytest
+# (`python -m pytest` puts the repository first on sys.path before pytest
+# starts, so pytest itself would import the wrong `py`.)
+# =============================================================================
+import sys
+
+for name in [name for name in sys.modules if name == "py" or name.startswith("py.")]:
+    del sys.modules[name]
@@ -0,0 +1,323 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+from ultralytics import YOLO
+import contextlib
+import cv2
+import numpy as np
+import os
+import shutil
+import tempfile
+try:
+    import fcntl     # Cross-process export lock (POSIX)
+except ImportError:
+    fcntl = None
+
+# =============================================================================
+# INFERENCE BACKENDS - Export and cache CPU-optimized model artifacts
+# =============================================================================
+# The PyTorch .pt weights are the source of truth. For CPU-only hosts they can
+# be exported once to an ONNX Runtime or OpenVINO artifact, cached next to the
+# weights, and loaded through Ultralytics' AutoBackend, which returns the same
+# Results objects as PyTorch (so sv.Detections.from_ultralytics works as-is
+# for detection and segmentation models).
+#
+#   backend="pytorch"              -> models/model.pt
+#   backend="onnx"                 -> models/model.onnx
+#   backend="onnx",     int8=True  -> models/model.int8.onnx
+#   backend="openvino"             -> models/model_openvino_model/
+#   backend="openvino", int8=True  -> models/model_int8_openvino_model/
+#
+# Artifacts are re-exported when the .pt file is newer than the artifact.
+# Exports run under a lock file (<artifact>.lock), so processes starting
+# together (e.g. batch.py workers) export once and the others wait; each
+# export is written to a temporary path and moved into place with
+# os.replace(), so a reader never sees a half-written artifact.
+# INT8 artifacts are calibrated on sample frames (e.g. from real store videos),
+# so they must be created with calibration frames the first time; see the
+# command-line usage at the bottom of this file.
+# =============================================================================
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+# Default export resolution (Ultralytics default training size)
+DEFAULT_IMGSZ = 640
+
+
+def artifact_path(model_path, backend, int8=False):
+    """
+    Returns where the artifact for a backend is cached.
+
+    Args:
+        model_path (str): Path to the .pt weights.
+        backend (str): One of BACKENDS.
+        int8 (bool): INT8-quantized variant.
+    """
+    stem = os.path.splitext(model_path)[0]
+    if backend == "pytorch":
+        return model_path
+    if backend == "onnx":
+        return f"{stem}.int8.onnx" if int8 else f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+
+def _is_fresh(artifact, model_path):
+    """True if the artifact exists and is not older than the weights."""
+    return os.path.exists(artifact) and os.path.getmtime(artifact) >= os.path.getmtime(model_path)
+
+
+def resolve_model_artifact(model_path, backend="pytorch", int8=False, calibration_frames=None, imgsz=DEFAULT_IMGSZ):
+    """
+    Returns a path YOLO() can load for the backend, exporting it if needed.
+
+    Args:
+        model_path (str): Path to the .pt weights.
+        backend (str): "pytorch", "onnx" or "openvino".
+        int8 (bool): Use the INT8-quantized artifact (onnx/openvino only).
+        calibration_frames (list[np.ndarray], optional): BGR frames used to
+                            calibrate INT8 quantization. Required only when
+                            the INT8 artifact has to be (re)built.
+        imgsz (int): Export resolution.
+
+    Returns:
+        str: Path of the .pt, .onnx file or OpenVINO model directory.
+    """
+    # Step 1: PyTorch needs no export
+    if backend == "pytorch":
+        if int8:
+            print("[WARN] INT8 is only available for the onnx/openvino backends, using FP32 PyTorch")
+        return model_path
+
+    # Step 2: Reuse the cached artifact when it is up to date
+    artifact = artifact_path(model_path, backend, int8)
+    if _is_fresh(artifact, model_path):
+        return artifact
+
+    with _export_lock(artifact):
+        # Step 3: Another process may have exported it while this one waited
+        if _is_fresh(artifact, model_path):
+            return artifact
+
+        # Step 4: INT8 artifacts cannot be built without calibration data
+        if int8 and not calibration_frames:
+            raise ValueError(
+                f"INT8 {backend} artifact '{artifact}' is missing or outdated and no calibration frames were given. "
+                f"Build it with: python -m py.InferenceBackend {model_path} --backend {backend} --int8 --calibration <video>"
+            )
+
+        print(f"[INFO] Exporting {model_path} to {backend}{' INT8' if int8 else ''}: {artifact}")
+        if backend == "onnx":
+            _export_onnx(model_path, artifact, int8, calibration_frames, imgsz)
+        else:
+            _export_openvino(model_path, artifact, int8, calibration_frames, imgsz)
+    return artifact
+
+
+@contextlib.contextmanager
+def _export_lock(artifact):
+    """Holds an exclusive lock on <artifact>.lock (no-op where fcntl is unavailable)."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{artifact}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _export_from_copy(model_path, work_dir, **export_args):
+    """
+    Exports a copy of the weights placed in work_dir.
+
+    Ultralytics writes exports next to the weights; exporting a copy keeps
+    the half-written output away from the final artifact path.
+
+    Returns:
+        str: Path of the exported file or directory (inside work_dir).
+    """
+    weights_copy = os.path.join(work_dir, os.path.basename(model_path))
+    shutil.copy2(model_path, weights_copy)
+    return YOLO(weights_copy).export(**export_args)
+
+
+def artifact_task(artifact):
+    """
+    Reads the task ("detect", "segment", ...) stored in an exported artifact.
+
+    YOLO() cannot inspect exported models until the first prediction, so the
+    task is passed explicitly instead of being guessed from the file name.
+
+    Args:
+        artifact (str): .onnx file or OpenVINO model directory.
+
+    Returns:
+        str or None: The task, or None if not recorded.
+    """
+    if artifact.endswith(".onnx"):
+        import onnx
+        metadata = {prop.key: prop.value for prop in onnx.load(artifact, load_external_data=False).metadata_props}
+        return metadata.get("task")
+    metadata_path = os.path.join(artifact, "metadata.yaml")
+    if os.path.exists(metadata_path):
+        import yaml
+        with open(metadata_path) as f:
+            return (yaml.safe_load(f) or {}).get("task")
+    return None
+
+
+# =============================================================================
+# ONNX RUNTIME
+# =============================================================================
+def _export_onnx(model_path, artifact, int8, calibration_frames, imgsz):
+    """Exports FP32 ONNX (dynamic batch) and optionally quantizes it to INT8 (export lock held)."""
+    # Step 1: INT8 is quantized from the FP32 artifact (exported under its own lock)
+    if int8:
+        fp32_path = resolve_model_artifact(model_path, "onnx", int8=False, imgsz=imgsz)
+    else:
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(artifact))) as work_dir:
+            exported = _export_from_copy(model_path, work_dir, format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+            os.replace(exported, artifact)
+        return
+
+    # Step 2: Static INT8 quantization calibrated on sample frames
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class FrameCalibrationReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.batches = iter([{input_name: letterbox_tensor(frame, imgsz)} for frame in calibration_frames])
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    fp32_model = onnx.load(fp32_path)
+    input_name = fp32_model.graph.input[0].name
+    tmp_path = f"{artifact}.{os.getpid()}.tmp"
+    quantize_static(
+        fp32_path,
+        tmp_path,
+        FrameCalibrationReader(input_name),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+
+    # Step 3: Keep Ultralytics metadata (task, names, stride, imgsz) so AutoBackend can load it
+    quantized = onnx.load(tmp_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(quantized, tmp_path)
+    os.replace(tmp_path, artifact)
+
+
+def letterbox_tensor(frame, imgsz):
+    """
+    Preprocesses a BGR frame like Ultralytics does (letterbox, RGB, 0-1, NCHW).
+
+    Args:
+        frame (np.ndarray): BGR frame.
+        imgsz (int): Square model input size.
+
+    Returns:
+        np.ndarray: float32 tensor of shape (1, 3, imgsz, imgsz).
+    """
+    height, width = frame.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    resized = cv2.resize(frame, (int(round(width * scale)), int(round(height * scale))), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor[None])
+
+
+# =============================================================================
+# OPENVINO
+# =============================================================================
+def _export_openvino(model_path, artifact, int8, calibration_frames, imgsz):
+    """Exports an OpenVINO model directory, INT8 calibrated on the given frames (export lock held)."""
+    with tempfile.TemporaryDirectory() as calibration_dir, \
+            tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(artifact))) as work_dir:
+        export_args = {"format": "openvino", "imgsz": imgsz, "dynamic": True}
+        if int8:
+            # Ultralytics calibrates OpenVINO INT8 (NNCF) on a dataset YAML:
+            # write the sample frames as a one-split image dataset
+            names = YOLO(model_path).names
+            export_args.update(int8=True, data=_write_calibration_dataset(calibration_dir, calibration_frames, names))
+        exported = _export_from_copy(model_path, work_dir, **export_args)
+
+        # A directory cannot replace a non-empty one: remove the outdated artifact first
+        if os.path.exists(artifact):
+            shutil.rmtree(artifact)
+        os.replace(exported, artifact)
+
+
+def _write_calibration_dataset(directory, frames, names):
+    """Writes frames as JPEGs plus a dataset YAML; returns the YAML path."""
+    images_dir = os.path.join(directory, "images")
+    os.makedirs(images_dir)
+    for index, frame in enumerate(frames):
+        cv2.imwrite(os.path.join(images_dir, f"{index:05d}.jpg"), frame)
+
+    yaml_path = os.path.join(directory, "calibration.yaml")
+    with open(yaml_path, "w") as f:
+        f.write(f"path: {directory}\ntrain: images\nval: images\nnames:\n")
+        for class_id, name in sorted(names.items()):
+            f.write(f"  {class_id}: \"{name}\"\n")
+    return yaml_path
+
+
+# =============================================================================
+# CALIBRATION FRAMES
+# =============================================================================
+def sample_video_frames(video_paths, num_frames=200):
+    """
+    Picks frames evenly spread over one or more videos for INT8 calibration.
+
+    Args:
+        video_paths (list[str]): Representative store videos.
+        num_frames (int): Total frames to return.
+
+    Returns:
+        list[np.ndarray]: BGR frames.
+    """
+    frames = []
+    per_video = max(1, num_frames // max(1, len(video_paths)))
+    for video_path in video_paths:
+        cap = cv2.VideoCapture(video_path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_video
+        for position in np.linspace(0, total - 1, per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+        cap.release()
+    return frames
+
+
+# =============================================================================
+# COMMAND LINE - Pre-build artifacts (e.g. at image build time)
+# =============================================================================
+# Usage:
+#   python -m py.InferenceBackend models/model-segment_25-10-10.pt --backend openvino
+#   python -m py.InferenceBackend models/model-segment_25-10-10.pt --backend onnx --int8 --calibration store1.mp4 store2.mp4
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a YOLO model to a CPU inference backend.")
+    parser.add_argument("model", help="Path to the .pt weights.")
+    parser.add_argument("--backend", choices=["onnx", "openvino"], required=True)
+    parser.add_argument("--int8", action="store_true", help="INT8 quantization (needs --calibration).")
+    parser.add_argument("--calibration", nargs="*", default=[], help="Videos to sample calibration frames from.")
+    parser.add_argument("--calibration-frames", type=int, default=200, help="Number of calibration frames.")
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ, help="Export resolution.")
+    args = parser.parse_args()
+
+    frames = sample_video_frames(args.calibration, args.calibration_frames) if args.calibration else None
+    print(resolve_model_artifact(args.model, args.backend, args.int8, frames, args.imgsz))
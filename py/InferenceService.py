@@ -0,0 +1,191 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import threading                        # Batching worker thread
+import time                             # Latency budget
+from concurrent.futures import Future   # Per-request results
+
+# =============================================================================
+# INFERENCE SERVICE - Cross-client micro-batching for one shared model
+# =============================================================================
+# Without it, every Streamlit session calls the model on its own thread and
+# the sessions take turns on the model lock, one small call each. With it,
+# callers put their frames on a request queue and a single worker thread
+# runs them in combined batches:
+#
+#   session A ──┐
+#   session B ──┼──► queue ──► worker: one model call for A+B+C ──► futures
+#   session C ──┘
+#
+# A batch is sent when it holds `max_batch` frames or when its oldest request
+# has waited `max_wait_ms`, so the batching delay added to any request is
+# bounded by the budget. Requests are only combined if they use the same
+# predict arguments (e.g. imgsz). Each batch runs at the lowest confidence
+# threshold among its requests; results are then filtered per request, so
+# every caller gets the detections its own threshold would have produced.
+#
+# Only inference is shared: ByteTrack, statistics and annotation stay on
+# each caller (InventoryTracker), which receives ordinary Ultralytics Results.
+# =============================================================================
+
+class _Request:
+    """Frames of one predict() call waiting for a batch."""
+
+    __slots__ = ("frames", "confidence", "kwargs", "key", "future", "enqueued")
+
+    def __init__(self, frames, confidence, kwargs):
+        self.frames = frames
+        self.confidence = confidence
+        self.kwargs = kwargs
+        self.key = tuple(sorted(kwargs.items()))  # Only requests with the same arguments share a batch
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class InferenceService:
+    def __init__(self, shared_model, max_batch=8, max_wait_ms=10.0):
+        """
+        Starts a micro-batching worker for a shared model.
+
+        Args:
+            shared_model (SharedModel): Model whose run_batch() executes the batches.
+            max_batch (int): Frames per model call before a batch is sent right away.
+            max_wait_ms (float): Longest a request waits for other requests to join its batch.
+        """
+        self.shared_model = shared_model
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []                      # Requests in arrival order
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # Counters for stats()
+        self.batches = 0
+        self.frames = 0
+        self.requests = 0
+
+        self._worker = threading.Thread(target=self._run, name="inference-service", daemon=True)
+        self._worker.start()
+
+    # -------------------------------------------------------------------------
+    # Client side
+    # -------------------------------------------------------------------------
+    def submit(self, frames, conf=0.25, **kwargs):
+        """
+        Queues frames for inference.
+
+        Args:
+            frames (list[np.ndarray]): Frames in BGR format.
+            conf (float): Confidence threshold of this request.
+            **kwargs: Other Ultralytics predict arguments (e.g. imgsz).
+
+        Returns:
+            Future: Resolves to one Ultralytics Results per frame, in input order.
+        """
+        request = _Request(list(frames), conf, kwargs)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Inference service is closed")
+            self._pending.append(request)
+            self._condition.notify()
+        return request.future
+
+    def predict(self, frames, **kwargs):
+        """Same as SharedModel.predict(), through the batching queue (blocks until done)."""
+        return self.submit(frames, **kwargs).result()
+
+    def close(self):
+        """Stops the worker after the queued requests have been served."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._worker is not threading.current_thread():
+            self._worker.join()
+
+    def stats(self):
+        """
+        Returns batching counters.
+
+        Returns:
+            dict: {"requests", "batches", "frames", "mean_batch"}
+        """
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "frames": self.frames,
+            "mean_batch": round(self.frames / self.batches, 2) if self.batches else 0.0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Worker side
+    # -------------------------------------------------------------------------
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._execute(batch)
+
+    def _next_batch(self):
+        """Waits until a batch is full or its oldest request is out of budget; None once closed and drained."""
+        with self._condition:
+            # Step 1: Wait for the first request
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+            # Step 2: Let compatible requests join until the batch is full or the budget is spent
+            first = self._pending[0]
+            deadline = first.enqueued + self.max_wait
+            while not self._closed:
+                queued = sum(len(request.frames) for request in self._pending if request.key == first.key)
+                remaining = deadline - time.perf_counter()
+                if queued >= self.max_batch or remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            # Step 3: Take compatible requests in arrival order, up to max_batch frames
+            # (the first request is always taken, even if it alone exceeds max_batch)
+            batch, size = [], 0
+            for request in list(self._pending):
+                if request.key != first.key:
+                    continue
+                if batch and size + len(request.frames) > self.max_batch:
+                    break
+                batch.append(request)
+                size += len(request.frames)
+                self._pending.remove(request)
+            return batch
+
+    def _execute(self, batch):
+        """Runs one model call for the batch and resolves every request's future."""
+        try:
+            # Step 1: One call at the lowest threshold of the batch
+            frames = [frame for request in batch for frame in request.frames]
+            confidence = min(request.confidence for request in batch)
+            results = self.shared_model.run_batch(frames, conf=confidence, **batch[0].kwargs)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.frames += len(frames)
+        self.requests += len(batch)
+
+        # Step 2: Hand each request its slice, filtered to its own threshold
+        start = 0
+        for request in batch:
+            own = results[start:start + len(request.frames)]
+            start += len(request.frames)
+            if request.confidence > confidence:
+                own = [_filter_confidence(frame_results, request.confidence) for frame_results in own]
+            request.future.set_result(own)
+
+
+def _filter_confidence(results, confidence):
+    """Keeps the detections of one Ultralytics Results at or above a threshold (boxes and masks together)."""
+    if results.boxes is None or len(results.boxes) == 0:
+        return results
+    return results[results.boxes.conf >= confidence]
@@ -1,37 +1,27 @@
 # =============================================================================
 # IMPORTS
 # =============================================================================
-from ultralytics import YOLO
 import supervision as sv
+import copy
 import numpy as np
 import pandas as pd
-from collections import defaultdict
-import os
-
-# =============================================================================
-# LABEL CATALOG - Load product metadata from Excel
-# =============================================================================
-
-def load_label_catalog():
-    """
-    Load labelling-catalog dataframe (only once).
-    This Excel file contains product metadata (SKU, name, brand, category, etc.)
-    """
-    DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "labelling-catalog.xlsx")
-    return pd.read_excel(DATA_PATH)
-
-# Load catalog once at module level for efficiency
-label_catalog = load_label_catalog()
-
-# Build lookup dictionary for fast metadata access by SKU code
-# Example: {"sku_1": {"item_name": "Product A", "brand": "Brand X", ...}, ...}
-sku_lookup = label_catalog.set_index("sku_code").to_dict(orient="index") 
+import time
+import weakref
+from py.LabelCatalog import LABEL_MODES, label_catalog
+from py.ModelRegistry import model_registry
+from py.MotionGate import MotionGate
+from py.PerfRecorder import perf_recorder
+from py.ResourceGovernor import resource_governor
+from py.roi import clip_roi, crop_to_roi, detections_to_full_frame
+from py.tiling import merge_tile_detections, tile_grid
+from py.StatsEngine import StatsEngine
+from py.WindowedStats import WindowedStats
 
 # =============================================================================
 # YOLO INVENTORY TRACKER CLASS
 # =============================================================================
 class InventoryTracker:
-    def __init__(self, model_path="models/model-segment_25-10-10.pt", label_mode="item_name"):
+    def __init__(self, model_path="models/model-segment_25-10-10.pt", label_mode="item_name", backend="pytorch", int8=False):
         """
         Initializes the tracker with YOLO model (detection or segmentation) and summary stats.
         
@@ -42,23 +32,137 @@ class InventoryTracker:
         Args:
             model_path (str): Path to YOLO model weights (.pt file).
                              Can be a detection model or segmentation model.
+                             Loaded once per process and shared between trackers.
             label_mode (str): Label to display on frames and aggregate stats.
                              Options: "sku_code", "item_name", "brand", "sub_category", "category"
+            backend (str): Inference backend: "pytorch" (the .pt weights), or a
+                             CPU-optimized "onnx" / "openvino" artifact exported
+                             from the weights and cached next to them.
+            int8 (bool): Use the INT8-quantized onnx/openvino artifact
+                             (must have been built with calibration frames).
         """
-        # Step 1: Load YOLO model (automatically detects if it's detection or segmentation)
-        self.model = YOLO(model_path)
+        # Step 1: Initialize confidence threshold (can be updated per request)
+        self.confidence_threshold = 0.0
         
-        # Step 2: Check if this is a segmentation model
-        # Segmentation models have 'seg' in their task name
-        self.is_segmentation = hasattr(self.model, 'task') and 'seg' in str(self.model.task).lower()
+        # Frames per inference call in track_video_stream (1 = frame by frame)
+        # Larger batches amortize per-call overhead on CPU hosts
+        self.batch_size = 1
         
-        # Step 3: Initialize confidence threshold (can be updated per request)
-        self.confidence_threshold = 0.0
+        # Counting-only mode: skip the frame copy, all annotators and full-size
+        # masks when only live_summary and the final stats are needed
+        self.stats_only = False
+        
+        # Region of interest (x1, y1, x2, y2) in pixels or relative (0-1):
+        # only this part of each frame is sent to the model (None = whole frame)
+        self.roi = None
+        
+        # Inference image size (None = model default); lower is faster but
+        # loses small items
+        self.imgsz = None
+        
+        # Tiled inference for high-resolution stills (tile_size=None disables it):
+        # overlapping tiles are inferred in batches at tile resolution and merged
+        self.tile_size = None
+        self.tile_overlap = 0.2
+        self.tile_batch_size = 4
+        
+        # Temporal sampling of videos: analyze at most analysis_fps frames per second
+        # (None = every frame), or every frame_stride-th frame (see configure_sampling)
+        self.analysis_fps = None
+        self.frame_stride = 1
+        
+        # Frame rate of the analyzed frames of the current video (set by configure_sampling)
+        self.analyzed_fps = None
+        
+        # Windowed time series (window_s=None disables it): counts per window of
+        # window_s seconds of video, the last max_windows windows are kept
+        self.window_s = None
+        self.max_windows = 120
+        
+        # Motion gate for fixed cameras (motion_threshold=None disables it): frames
+        # whose mean change since the last inferred frame is at most the threshold
+        # (0.0-1.0) reuse its detections; inference is forced at least every
+        # motion_refresh_interval frames
+        self.motion_threshold = None
+        self.motion_refresh_interval = 30
+        self.motion_gate = MotionGate()
+        
+        # Per-stage timings (process-wide recorder; free while instrumentation is off)
+        self.perf = perf_recorder
+        
+        # CPU budget and admission of concurrent jobs (process-wide, see py/ResourceGovernor.py)
+        self.governor = resource_governor
+        
+        # Step 2: Store label catalog reference
+        self.label_catalog = label_catalog
+       
+        # Step 3: Validate and assign label_mode
+        self.valid_label_modes = set(LABEL_MODES)
+        if label_mode not in self.valid_label_modes:
+            print(f"[WARN] Invalid label_mode '{label_mode}', falling back to 'item_name'")
+            self.label_mode = "item_name"
+        else:
+            self.label_mode = label_mode
+
+        # Step 4: Attach the shared YOLO model (detection or segmentation)
+        # The weights are loaded once per process by the model registry;
+        # this also creates the per-session tracker, annotators and stats
+        self.shared_model = None
+        self.model_path = None
+        self.backend = None
+        self.int8 = None
+        self._release_model = None
+        self.set_model(model_path, backend, int8)
+
+    @property
+    def model(self):
+        """The shared Ultralytics YOLO model (read-only; use set_model() to switch)."""
+        return self.shared_model.model
+
+    def set_model(self, model_path, backend=None, int8=None):
+        """
+        Switches this tracker to another model and resets all per-session state.
+        
+        The weights come from the process-wide model registry, so trackers
+        using the same model path share one copy in memory. The previous
+        model is released (and may be evicted if no tracker uses it anymore).
+        
+        Args:
+            model_path (str): Path to YOLO model weights (.pt file).
+            backend (str, optional): "pytorch", "onnx" or "openvino".
+                                     Defaults to the current backend.
+            int8 (bool, optional): Use the INT8-quantized artifact.
+                                   Defaults to the current setting.
+        """
+        # Step 1: Nothing to do if the model is already attached
+        backend = backend or self.backend or "pytorch"
+        int8 = bool(self.int8 if int8 is None else int8)
+        if (model_path, backend, int8) == (self.model_path, self.backend, self.int8):
+            return
+        
+        # Step 2: Acquire the new model before releasing the old one
+        # (so switching back and forth does not reload weights); the thread
+        # budget is applied once per process, before the first model is loaded
+        self.governor.apply_thread_budget()
+        shared_model = model_registry.acquire(model_path, backend, int8)
+        if self._release_model is not None:
+            self._release_model()
+        self.shared_model = shared_model
+        self.model_path = model_path
+        self.backend = backend
+        self.int8 = int8
+        
+        # Step 3: Release the model automatically when this tracker is garbage collected
+        # (e.g. when a Streamlit session ends)
+        self._release_model = weakref.finalize(self, model_registry.release, shared_model)
         
-        # Step 4: Initialize ByteTrack tracker for object tracking across frames
+        # Step 4: Check if this is a segmentation model
+        self.is_segmentation = shared_model.is_segmentation
+        
+        # Step 5: Initialize ByteTrack tracker for object tracking across frames
         self.tracker = sv.ByteTrack()
         
-        # Step 5: Initialize annotators based on model type
+        # Step 6: Initialize annotators based on model type
         if self.is_segmentation:
             # For segmentation models: use MaskAnnotator to draw filled masks
             self.mask_annotator = sv.MaskAnnotator()
@@ -68,27 +172,38 @@ class InventoryTracker:
             # For detection models: only use BoxAnnotator for bounding boxes
             self.box_annotator = sv.BoxAnnotator()
         
-        # Step 6: Initialize label and trace annotators (common for both types)
+        # Step 7: Initialize label and trace annotators (common for both types)
         self.label_annotator = sv.LabelAnnotator()
         self.trace_annotator = sv.TraceAnnotator()
-        
-        # Step 7: Store label catalog reference
-        self.label_catalog = label_catalog
-       
-        # Step 8: Validate and assign label_mode
-        self.valid_label_modes = {"sku_code", "item_name", "brand", "sub_category", "category"}
-        if label_mode not in self.valid_label_modes:
-            print(f"[WARN] Invalid label_mode '{label_mode}', falling back to 'item_name'")
-            self.label_mode = "item_name"
-        else:
-            self.label_mode = label_mode
 
-        # Step 9: Initialize statistics tracking
+        # Step 8: Initialize statistics tracking
         self.reset_output_stats()
+
+    def configure_sampling(self, source_fps):
+        """
+        Prepares tracking of a video decoded with temporal sampling.
+        
+        Computes the stride (frames advanced per analyzed frame) from
+        self.frame_stride or self.analysis_fps, and restarts ByteTrack at the
+        effective frame rate, so that its lost-track buffer still spans the
+        same time and IDs stay stable across the larger gaps between frames.
         
-        # Step 10: Log model type for debugging
-        model_type = "SEGMENTATION" if self.is_segmentation else "DETECTION"
-        print(f"[INFO] Loaded {model_type} model from: {model_path}")
+        Args:
+            source_fps (float): Frame rate of the video file.
+
+        Returns:
+            int: Stride; the caller analyzes one frame out of every `stride`.
+        """
+        # Step 1: Fixed stride wins; otherwise derive it from the target analysis rate
+        stride = max(1, int(self.frame_stride or 1))
+        if stride == 1 and self.analysis_fps:
+            stride = max(1, int(round(source_fps / self.analysis_fps)))
+        
+        # Step 2: Fresh ByteTrack configured for the effective frame rate
+        # (also the frame rate of the time series windows)
+        self.analyzed_fps = source_fps / stride
+        self.tracker = sv.ByteTrack(frame_rate=max(1, int(round(self.analyzed_fps))))
+        return stride
 
     def reset_output_stats(self):
         """
@@ -96,16 +211,93 @@ class InventoryTracker:
         
         This method clears all tracking data:
         - Frame counter
-        - Class appearance counts
-        - Tracked object IDs
-        - Confidence scores
+        - Unique tracked object IDs per SKU
+        - Running confidence aggregates
+        - Frames-present counters
+        - The detections of the last frame
+        """
+        # Running aggregates per SKU and per label of every label mode
+        # (memory does not grow with the number of frames)
+        self.stats = StatsEngine(
+            self.shared_model.class_skus,
+            self.shared_model.label_tables(self.label_catalog)
+        )
+        
+        # Windows of the time series, sized in analyzed frames (24 fps when
+        # the frame rate is unknown, as in the video handler)
+        self.time_series = None
+        if self.window_s:
+            fps = self.analyzed_fps or 24.0
+            self.time_series = WindowedStats(
+                self.shared_model.class_skus,
+                self.shared_model.label_tables(self.label_catalog),
+                window_frames=round(self.window_s * fps),
+                num_windows=self.max_windows,
+                fps=fps
+            )
+        
+        # Tracked detections of the last processed frame (see redraw())
+        self.last_detections = None
+        
+        # Motion gate reference frame, its YOLO results and the skip counters
+        self.motion_gate.reset()
+        self._gated_results = None
+
+    def state_dict(self, results=None):
+        """
+        Returns the per-video state, e.g. to checkpoint a long video (see py/VideoCheckpoint.py).
+        
+        Holds everything the next frames depend on: ByteTrack, the statistics
+        and, with the motion gate enabled, its reference and the results it
+        reuses. The ByteTrack object is not copied, so the state must be
+        serialized before the next frame is processed.
+        
+        Args:
+            results (optional): YOLO results of the last processed frame
+                                (only kept with the motion gate enabled).
+
+        Returns:
+            dict: State for load_state_dict(); "frames" is the number of frames processed.
+        """
+        gate_state = self.motion_gate.state_at(self.stats.frame_count) if self.motion_threshold is not None else None
+        if gate_state is not None and results is not None:
+            # The frame itself is not needed to convert the results again
+            results = copy.copy(results)
+            results.orig_img = None
+        return {
+            "frames": self.stats.frame_count,
+            "tracker": self.tracker,
+            "stats": self.stats.state_dict(),
+            "gate": gate_state,
+            "gated_results": results if gate_state is not None else None,
+            "time_series": self.time_series.state_dict() if self.time_series is not None else None,
+        }
+
+    def load_state_dict(self, state):
+        """
+        Restores the per-video state saved with state_dict(), to continue a video.
+        
+        The caller resumes with the frame after state["frames"] (in analyzed
+        frames), with the same model and settings.
+        
+        Args:
+            state (dict): Output of state_dict().
         """
-        self.frame_count = 0
-        self.class_appearances = defaultdict(int)  # counts per sku
-        self.overall_tracked_ids = defaultdict(set)  # unique IDs per sku
-        self.confidence = defaultdict(list)  # list of confidence scores per sku
+        self.reset_output_stats()
+        self.tracker = state["tracker"]
+        self.stats.load_state_dict(state["stats"])
+        if state.get("gate") is not None:
+            self.motion_gate.load_state(state["gate"])
+            self._gated_results = state["gated_results"]
+        if self.time_series is not None and state.get("time_series") is not None:
+            self.time_series.load_state_dict(state["time_series"])
+
+    @property
+    def frame_count(self):
+        """int: Number of frames processed since the last reset."""
+        return self.stats.frame_count
 
-    def track_picture_stream(self, frame: np.ndarray, confidence_threshold: float):
+    def track_picture_stream(self, frame: np.ndarray, confidence_threshold: float, stats_only=None, tiled=None):
         """
         Core logic to process a single frame for detection/segmentation, tracking, and stats gathering.
         
@@ -116,63 +308,311 @@ class InventoryTracker:
         Args:
             frame (np.ndarray): Input frame (BGR format from OpenCV).
             confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+            stats_only (bool, optional): Only update tracking and statistics
+                                         (no annotation, no full-size masks).
+                                         Defaults to self.stats_only.
+            tiled (bool, optional): Use tiled inference (for large still images).
+                                    Defaults to True when self.tile_size is set
+                                    and the image is larger than one tile.
 
         Returns:
-            annotated_frame (np.ndarray): Frame with annotations (boxes/masks + labels).
+            annotated_frame (np.ndarray): Frame with annotations (boxes/masks + labels),
+                                          or None in stats-only mode.
             live_summary (dict): Running summary of detections {label: count}.
         """
-        # Step 1: Increment frame counter
-        self.frame_count += 1
+        # Step 1: Resolve the modes (explicit arguments win over the tracker settings)
+        stats_only = self.stats_only if stats_only is None else stats_only
+        if tiled is None:
+            tiled = self.tile_size is not None and max(frame.shape[:2]) > self.tile_size
         
-        # Step 2: Run YOLO inference on the frame
-        # For segmentation models, results will include masks
-        # For detection models, results will only include boxes
-        results = self.model(frame, conf=confidence_threshold, verbose=False)[0]
+        # Step 2: Tiled path - overlapping tiles, batched, merged with cross-tile NMS
+        if tiled:
+            detections = self.detect_tiled(frame, confidence_threshold, with_masks=not stats_only)
+            return self.process_detections(frame, detections, annotate=not stats_only)
         
-        # Step 3: Convert YOLO results to Supervision Detections format
-        # This automatically handles both detection and segmentation results
-        detections = sv.Detections.from_ultralytics(results)
+        # Step 3: Run YOLO inference on the frame (a batch of one),
+        # unless the motion gate reuses the last results
+        results = self.infer_gated([frame], confidence_threshold)[0]
+
+        # Step 4: Track, gather statistics and annotate
+        return self.process_result(frame, results, annotate=not stats_only)
+
+    def detect_tiled(self, frame: np.ndarray, confidence_threshold: float, with_masks=True):
+        """
+        Detects objects in a large image by running the model on overlapping tiles.
         
-        # Step 4: Update object tracker with new detections
-        # ByteTrack assigns persistent IDs to tracked objects across frames
-        tracked_detections = self.tracker.update_with_detections(detections)
-        
-        # Step 5: Process each tracked detection to gather statistics and create labels
-        labels = []
-        for i, det in enumerate(tracked_detections):
-            # Extract detection properties
-            class_id = det[3]  # Class ID from model
-            tracker_id = det[4]  # Unique tracker ID assigned by ByteTrack
-            
-            # Step 6: Get the SKU code from model class names
-            detected_sku = self.model.model.names[class_id]  # e.g., "sku_1"
+        Tiles of self.tile_size pixels (overlapping by self.tile_overlap) are
+        inferred at tile resolution, self.tile_batch_size per model call, so
+        small items keep their pixels. Per-tile detections are merged with a
+        cross-tile NMS, and masks of segmentation models are stitched into
+        full-size masks.
+        
+        Args:
+            frame (np.ndarray): Input image (BGR format from OpenCV).
+            confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+            with_masks (bool): Keep and stitch segmentation masks.
+
+        Returns:
+            sv.Detections: Merged detections in full-frame coordinates.
+        """
+        # Step 1: Tile the region of interest (or the whole image)
+        tile_size = self.tile_size or 640
+        bounds = clip_roi(self.roi, frame.shape)
+        region = crop_to_roi(frame, bounds)
+        tiles = tile_grid(region.shape[1], region.shape[0], tile_size, self.tile_overlap)
+        
+        # Step 2: Run the tiles through the model in batches (tiles are views, no copies)
+        tile_detections = []
+        batch_size = max(1, int(self.tile_batch_size))
+        for start in range(0, len(tiles), batch_size):
+            crops = [region[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles[start:start + batch_size]]
+            with self.perf.stage("infer"):
+                batch_results = self.shared_model.predict(crops, conf=confidence_threshold, imgsz=tile_size)
+            with self.perf.stage("convert"):
+                for results in batch_results:
+                    if not with_masks and getattr(results, 'masks', None) is not None:
+                        results.masks = None
+                    tile_detections.append(sv.Detections.from_ultralytics(results))
+        
+        # Step 3: Merge tiles (cross-tile NMS + mask stitching) and map back to the full frame
+        with self.perf.stage("convert"):
+            detections = merge_tile_detections(tile_detections, tiles, region.shape)
+            return detections_to_full_frame(detections, bounds, frame.shape)
+
+    def infer_frames(self, frames, confidence_threshold):
+        """
+        Runs a single YOLO inference call on one or more frames.
+        
+        Passing a list of frames lets Ultralytics stack them into one batch,
+        which amortizes the per-call overhead (pre/post-processing setup,
+        tensor allocation) and keeps all CPU cores busy.
+        
+        If self.roi is set, only that region of each frame is sent to the
+        model, at self.imgsz resolution if set; the returned results are in
+        ROI coordinates until process_result() maps them back.
+        
+        Args:
+            frames (list[np.ndarray]): Frames in BGR format.
+            confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+
+        Returns:
+            list: One Ultralytics Results object per frame, in input order.
+        """
+        with self.perf.stage("infer"):
+            # Crop to the region of interest first (a view, no copy): pixels
+            # outside it cost no compute. process_result() maps detections back.
+            frames = [crop_to_roi(frame, clip_roi(self.roi, frame.shape)) for frame in frames]
             
-            # Step 7: Lookup product metadata from catalog
-            meta = sku_lookup.get(detected_sku, {})
+            # For segmentation models, results will include masks
+            # For detection models, results will only include boxes
+            # The shared model serializes calls from concurrent sessions
+            predict_args = {"conf": confidence_threshold}
+            if self.imgsz:
+                predict_args["imgsz"] = self.imgsz
+            return self.shared_model.predict(frames, **predict_args)
+
+    def infer_gated(self, frames, confidence_threshold):
+        """
+        Runs YOLO on the frames that changed, reusing the last results for the others.
+        
+        With self.motion_threshold set, each frame (its ROI) is compared with
+        the last inferred frame by the motion gate (see py/MotionGate.py);
+        only the frames that changed are sent to the model, in one call. The
+        other frames get the results of the last inferred frame, so they
+        still go through ByteTrack and the statistics. Without a threshold
+        this is infer_frames().
+        
+        Must be called in frame order (the gate keeps a reference frame).
+        
+        Args:
+            frames (list[np.ndarray]): Consecutive frames in BGR format.
+            confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+
+        Returns:
+            list: One Ultralytics Results object per frame, in input order
+                  (reused frames share the object of their reference frame).
+        """
+        if self.motion_threshold is None:
+            return self.infer_frames(frames, confidence_threshold)
+        
+        # Step 1: Decide per frame (compared on the region that is inferred)
+        with self.perf.stage("gate"):
+            changed = [
+                self.motion_gate.changed(crop_to_roi(frame, clip_roi(self.roi, frame.shape)),
+                                         self.motion_threshold, self.motion_refresh_interval)
+                for frame in frames
+            ]
+        
+        # Step 2: One model call for the frames that changed (timed for the savings estimate)
+        changed_frames = [frame for frame, is_changed in zip(frames, changed) if is_changed]
+        inferred = []
+        if changed_frames:
+            start = time.perf_counter()
+            inferred = self.infer_frames(changed_frames, confidence_threshold)
+            self.motion_gate.record_inference(time.perf_counter() - start, len(changed_frames))
+        
+        # Step 3: Unchanged frames reuse the results of the last inferred frame
+        inferred = iter(inferred)
+        results = []
+        for is_changed in changed:
+            if is_changed:
+                self._gated_results = next(inferred)
+            results.append(self._gated_results)
+        return results
+
+    def get_gate_stats(self):
+        """
+        Returns how many frames the motion gate skipped since the last reset.
+        
+        Returns:
+            dict: {"frames", "skipped", "skipped_fraction", "time_saved_s"};
+                  the time saved is estimated from the mean inference time per frame.
+        """
+        return self.motion_gate.stats()
+
+    def process_result(self, frame: np.ndarray, results, annotate=True):
+        """
+        Applies tracking, statistics and annotation for one frame's YOLO result.
+        
+        Must be called in frame order: ByteTrack and the statistics are
+        stateful, so this is the sequential part of both the per-frame and
+        the batched paths.
+        
+        Args:
+            frame (np.ndarray): Original frame (BGR format from OpenCV).
+            results: Ultralytics Results object for this frame.
+            annotate (bool): Draw the overlays. When False (stats-only mode, or
+                             a frame the preview will not show), only tracking
+                             and statistics are updated: the frame is not
+                             copied and segmentation masks are never scaled
+                             up to full resolution.
+
+        Returns:
+            annotated_frame (np.ndarray): Frame with annotations (boxes/masks + labels),
+                                          or None when annotate is False.
+            live_summary (dict): Running summary of detections {label: count}.
+        """
+        detections = self.to_detections(frame, results, with_masks=annotate)
+        return self.process_detections(frame, detections, annotate=annotate)
+
+    def to_detections(self, frame: np.ndarray, results, with_masks=True):
+        """
+        Converts one frame's YOLO result to full-frame Supervision Detections.
+        
+        Args:
+            frame (np.ndarray): Original frame (BGR format from OpenCV).
+            results: Ultralytics Results object for this frame.
+            with_masks (bool): Keep segmentation masks. Without them, masks are
+                               never resized to full frame size (nor carried
+                               through ByteTrack).
+
+        Returns:
+            sv.Detections: Detections in full-frame coordinates.
+        """
+        # Step 1: Convert YOLO results to Supervision Detections format
+        # This automatically handles both detection and segmentation results
+        # Masks are detached only for the conversion: results reused by the
+        # motion gate may be converted again for an annotated frame
+        with self.perf.stage("convert"):
+            masks = getattr(results, 'masks', None)
+            if not with_masks and masks is not None:
+                results.masks = None
+            try:
+                detections = sv.Detections.from_ultralytics(results)
+            finally:
+                if masks is not None:
+                    results.masks = masks
             
-            # Step 8: Extract confidence score from results
-            # Try multiple ways to get confidence as the structure may vary
-            if hasattr(tracked_detections, 'confidence') and tracked_detections.confidence is not None:
-                confidence = float(tracked_detections.confidence[i])
-            elif hasattr(results, 'boxes') and hasattr(results.boxes, 'conf'):
-                # Get confidence from YOLO results
-                confidence = float(results.boxes.conf[i]) if len(results.boxes.conf) > i else 0.0
-            else:
-                confidence = 0.0
+            # Step 2: Map boxes (and masks) from the ROI crop back to full-frame coordinates
+            return detections_to_full_frame(detections, clip_roi(self.roi, frame.shape), frame.shape)
+
+    def process_detections(self, frame: np.ndarray, detections, annotate=True):
+        """
+        Applies tracking, statistics and annotation for one frame's detections.
+        
+        Must be called in frame order (ByteTrack and the statistics are stateful).
+        
+        Args:
+            frame (np.ndarray): Original frame (BGR format from OpenCV).
+            detections (sv.Detections): Detections in full-frame coordinates.
+            annotate (bool): Draw the overlays (see process_result).
 
-            # Step 9: Generate label text based on label_mode
-            # Either show SKU code or a metadata field (item_name, brand, etc.)
-            label_text = detected_sku if self.label_mode == "sku_code" else meta.get(self.label_mode, detected_sku)
-            labels.append(f"#{tracker_id} {label_text}")
+        Returns:
+            annotated_frame (np.ndarray): Frame with annotations (boxes/masks + labels),
+                                          or None when annotate is False.
+            live_summary (dict): Running summary of detections {label: count}.
+        """
+        # Step 1: Update object tracker with new detections
+        # ByteTrack assigns persistent IDs to tracked objects across frames
+        with self.perf.stage("track"):
+            tracked_detections = self.tracker.update_with_detections(detections)
+            self.last_detections = tracked_detections
+        
+        with self.perf.stage("stats"):
+            # Step 2: Read the per-detection arrays
+            # class_id: class ID from model, tracker_id: unique ID assigned by ByteTrack
+            # (both are None on an empty frame)
+            class_ids = np.asarray(tracked_detections.class_id if len(tracked_detections) else [], dtype=np.int64)
+            tracker_ids = np.asarray(tracked_detections.tracker_id if len(tracked_detections) else [], dtype=np.int64)
+            if tracked_detections.confidence is not None:
+                confidences = tracked_detections.confidence.astype(float)
+            else:
+                confidences = np.zeros(len(tracked_detections))
             
-            # Step 10: Track statistics (deduplication by tracker_id)
-            # Only count each unique tracked object once
-            if tracker_id not in self.overall_tracked_ids[detected_sku]:
-                self.overall_tracked_ids[detected_sku].add(tracker_id)
-                self.class_appearances[detected_sku] += 1
-                self.confidence[detected_sku].append(confidence)
-
-        # Step 11: Annotate the frame with visual overlays
+            # Step 3: Update running statistics (deduplication by tracker_id)
+            # Only the first sighting of each track counts towards count and confidence,
+            # while every frame counts towards frame presence
+            self.stats.update(class_ids, tracker_ids, confidences)
+            if self.time_series is not None:
+                self.time_series.update(class_ids, tracker_ids, confidences)
+
+            # Step 4: Create live summary of current detections
+            # Returns dictionary like {"Product A": 3, "Product B": 2}
+            live_summary = self.stats.live_summary()
+        
+        # Skip all drawing for frames that will not be displayed
+        if not annotate:
+            return None, live_summary
+
+        with self.perf.stage("annotate"):
+            return self._annotate(frame, tracked_detections, class_ids, tracker_ids), live_summary
+
+    def redraw(self, frame: np.ndarray, detections=None):
+        """
+        Annotates a frame again from already tracked detections, with the current label_mode.
+        
+        No inference, tracking or statistics update happens, so switching the
+        label mode of a processed image costs only the drawing.
+        
+        Args:
+            frame (np.ndarray): The frame the detections were made on (BGR).
+            detections (sv.Detections, optional): Tracked detections.
+                                                  Defaults to self.last_detections.
+
+        Returns:
+            np.ndarray: Annotated copy of the frame.
+        """
+        detections = self.last_detections if detections is None else detections
+        if detections is None or len(detections) == 0:
+            return frame.copy()
+        class_ids = np.asarray(detections.class_id, dtype=np.int64)
+        tracker_ids = np.asarray(detections.tracker_id, dtype=np.int64)
+        with self.perf.stage("annotate"):
+            return self._annotate(frame, detections, class_ids, tracker_ids)
+
+    def _annotate(self, frame, tracked_detections, class_ids, tracker_ids):
+        """Draws masks, boxes, labels and traces on a copy of the frame (steps 5-9 of process_detections)."""
+
+        # Step 5: Generate label text based on label_mode
+        # Class id -> label (SKU code or metadata field such as item_name, brand, etc.)
+        # is a precomputed table on the shared model, so this is one array lookup
+        label_table = self.shared_model.label_tables(self.label_catalog)[self.label_mode]
+        labels = [
+            f"#{tracker_id} {label_text}"
+            for tracker_id, label_text in zip(tracker_ids.tolist(), label_table[class_ids].tolist())
+        ]
+
+        # Step 6: Annotate the frame with visual overlays
         annotated_frame = frame.copy()
         
         # For segmentation models: draw masks first (as background layer)
@@ -182,91 +622,78 @@ class InventoryTracker:
                 detections=tracked_detections
             )
         
-        # Step 12: Draw bounding boxes (for both detection and segmentation models)
+        # Step 7: Draw bounding boxes (for both detection and segmentation models)
         annotated_frame = self.box_annotator.annotate(
             scene=annotated_frame, 
             detections=tracked_detections
         )
         
-        # Step 13: Add text labels with tracker IDs and product names
+        # Step 8: Add text labels with tracker IDs and product names
         annotated_frame = self.label_annotator.annotate(
             scene=annotated_frame, 
             detections=tracked_detections, 
             labels=labels
         )
         
-        # Step 14: Draw tracking traces (shows movement path of tracked objects)
+        # Step 9: Draw tracking traces (shows movement path of tracked objects)
         annotated_frame = self.trace_annotator.annotate(
             scene=annotated_frame, 
             detections=tracked_detections
         )
+        
+        return annotated_frame
 
-        # Step 15: Create live summary of current detections
-        # Returns dictionary like {"Product A": 3, "Product B": 2}
-        live_summary = {name: len(ids) for name, ids in self.overall_tracked_ids.items() if len(ids) > 0}
+    def get_perf_stats(self):
+        """
+        Returns rolling per-stage timings (decode, gate, infer, convert, track, stats, annotate).
+        
+        Timings are only collected while instrumentation is enabled
+        (self.perf.enabled, or PERF_METRICS=1). The default recorder is
+        process-wide, so concurrent sessions are aggregated; assign a
+        PerfRecorder of its own to self.perf to time one tracker only.
         
-        return annotated_frame, live_summary
+        Returns:
+            dict: {stage: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "total_s"}}
+        """
+        return self.perf.get_stats()
 
     def get_output_stats(self):
         """
         Generates a summary DataFrame, aggregating detection statistics by SKU or another attribute.
         
-        This method compiles all tracked data into a pandas DataFrame with:
+        The table is built from running aggregates kept by the statistics
+        engine, so the cost depends on the number of labels, not frames:
         - Item counts (unique tracked IDs)
-        - Average confidence scores
-        - Frame presence percentages
+        - Average confidence scores (over unique tracked objects)
+        - Frame presence percentages (frames in which the item was detected)
         
         Returns:
             pd.DataFrame: Aggregated summary with columns based on label_mode.
                          Empty DataFrame if no frames have been processed.
         """
-        # Step 1: Return empty DataFrame if no frames processed
-        if self.frame_count == 0:
-            return pd.DataFrame()
-            
-        summary_data = []
+        return self.stats.summary(self.label_mode)
+
+    def get_time_series(self, label_mode=None):
+        """
+        Returns the counts per time window (see py/WindowedStats.py).
         
-        # Step 2: Iterate through all tracked SKUs
-        for sku, ids in self.overall_tracked_ids.items():
-            # Skip SKUs with no tracked IDs
-            if not ids:
-                continue
-            
-            # Step 3: Get metadata for this SKU from catalog
-            meta = sku_lookup.get(sku, {})
-            
-            # Step 4: Determine the display key based on label_mode
-            key_value = sku if self.label_mode == "sku_code" else meta.get(self.label_mode, sku)
-
-            # Step 5: Calculate statistics
-            total_unique_items = len(ids)  # Number of unique tracked objects
-            appearance_frames = self.class_appearances[sku]  # Number of frames where SKU appeared
-            presence_percentage = (appearance_frames / self.frame_count) * 100  # % of frames with this SKU
-            mean_confidence = np.mean(self.confidence.get(sku, [0])) * 100  # Average confidence score
-            
-            # Step 6: Append row to summary data
-            summary_data.append({
-                self.label_mode: key_value,
-                "count": total_unique_items,
-                "confidence(%)": f"{int(round(mean_confidence))}",
-                "frame_presence(%)": f"{int(round(presence_percentage))}"
-            })
-
-        # Step 7: Convert to DataFrame
-        output = pd.DataFrame(summary_data)
-
-        # Step 8: If not grouping by SKU, aggregate by the chosen label_mode
-        # Example: Multiple SKUs with same item_name should be combined
-        if self.label_mode != "sku_code" and not output.empty:
-            output = output.groupby(self.label_mode, as_index=False).agg({
-                "count": "sum",  # Sum all counts for same label
-                "confidence(%)": lambda x: f"{int(round(np.mean([float(v) for v in x])))}",  # Average confidence
-                "frame_presence(%)": lambda x: f"{int(round(np.mean([float(v) for v in x])))}"  # Average presence
-            })
-
-        return output
-
-    def track_video_stream(self, frame_generator, confidence_threshold):
+        Can be called at any time during processing; only the last
+        self.max_windows windows are kept.
+        
+        Args:
+            label_mode (str, optional): Label mode of the rows. Defaults to self.label_mode.
+
+        Returns:
+            pd.DataFrame: One row per window and label, with the window start/end
+                          in seconds of video, unique tracks, mean confidence and
+                          frame presence. Empty if the time series is disabled.
+        """
+        if self.time_series is None:
+            return pd.DataFrame()
+        return self.time_series.to_frame(label_mode or self.label_mode)
+
+    def track_video_stream(self, frame_generator, confidence_threshold, batch_size=None, stats_only=None,
+                           resume=None, checkpointer=None):
         """
         Processes frames from a video stream and yields annotated results.
         
@@ -274,17 +701,64 @@ class InventoryTracker:
         yielding annotated frames and live summaries as they're processed.
         Useful for streaming/real-time applications.
         
+        With batch_size > 1, frames are collected into batches of that size and
+        sent to the model in a single inference call. Tracking, statistics and
+        annotation are still applied frame by frame, in order, so the results
+        are identical to the per-frame path; only the latency of the first
+        yielded frame grows by (batch_size - 1) frames.
+        
         Args:
             frame_generator (iterable): Iterator that yields frames (np.ndarray).
             confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+            batch_size (int, optional): Frames per inference call.
+                                        Defaults to self.batch_size.
+            stats_only (bool, optional): Skip annotation (annotated_frame is None).
+                                         Defaults to self.stats_only.
+            resume (dict, optional): Checkpointed state_dict() to continue from; the
+                                     generator must start after its resume["frames"] frames.
+            checkpointer (VideoCheckpointer, optional): Saves the state periodically.
 
         Yields:
             tuple: (annotated_frame, live_summary) for each processed frame
         """
-        # Step 1: Reset statistics before processing video
+        # Step 1: Reset statistics before processing video (or continue a checkpointed run)
         self.reset_output_stats()
+        if resume is not None:
+            self.load_state_dict(resume)
         
-        # Step 2: Process each frame from the generator
+        # Step 2: Resolve batch size (1 = original per-frame behaviour) and mode
+        batch_size = max(1, int(batch_size or self.batch_size))
+        annotate = not (self.stats_only if stats_only is None else stats_only)
+        
+        # Step 3: Collect frames into batches and process each batch
+        batch = []
         for frame in frame_generator:
-            # Yield the annotated frame and current detection summary
-            yield self.track_picture_stream(frame, confidence_threshold)
\ No newline at end of file
+            batch.append(frame)
+            if len(batch) < batch_size:
+                continue
+            yield from self._track_batch(batch, confidence_threshold, annotate, checkpointer)
+            batch = []
+        
+        # Step 4: Flush the last (possibly partial) batch
+        if batch:
+            yield from self._track_batch(batch, confidence_threshold, annotate, checkpointer)
+
+    def _track_batch(self, frames, confidence_threshold, annotate=True, checkpointer=None):
+        """
+        Runs one inference call for a batch of frames, then tracks them in order.
+        
+        Args:
+            frames (list[np.ndarray]): Consecutive frames of a video.
+            confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+            annotate (bool): Draw the overlays (False in stats-only mode).
+            checkpointer (VideoCheckpointer, optional): Saves the state when due.
+
+        Yields:
+            tuple: (annotated_frame, live_summary) for each frame of the batch
+        """
+        batch_results = self.infer_gated(frames, confidence_threshold)
+        for frame, results in zip(frames, batch_results):
+            output = self.process_result(frame, results, annotate=annotate)
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.save(self, results)
+            yield output
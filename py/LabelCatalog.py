@@ -0,0 +1,209 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import pandas as pd
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+# =============================================================================
+# LABEL CATALOG - Product metadata with a compiled on-disk cache
+# =============================================================================
+# Parsing the Excel catalog through openpyxl is slow, so the parsed result is
+# compiled into a pickle next to the .xlsx file. The compiled artifact is
+# reused until the .xlsx changes (mtime/size differ AND the content hash
+# differs), and nothing is read until the first lookup.
+# =============================================================================
+
+# Bump when the layout of the compiled artifact changes
+COMPILED_FORMAT_VERSION = 1
+
+# Labels that can be displayed on frames and used to aggregate stats
+LABEL_MODES = ("sku_code", "item_name", "brand", "sub_category", "category")
+
+
+class LabelCatalog:
+    def __init__(self, xlsx_path, compiled_path=None, check_interval=5.0):
+        """
+        Lazily loaded product catalog (SKU, name, brand, category, etc.).
+
+        Args:
+            xlsx_path (str): Path to the labelling-catalog Excel file.
+            compiled_path (str, optional): Where to store the compiled artifact.
+                                           Defaults to "<xlsx_path without .xlsx>.compiled.pkl".
+            check_interval (float): Seconds between checks of the .xlsx mtime
+                                    once loaded (0 = check on every access).
+        """
+        self.xlsx_path = xlsx_path
+        self.compiled_path = compiled_path or os.path.splitext(xlsx_path)[0] + ".compiled.pkl"
+        self.check_interval = check_interval
+
+        # Loaded state (filled on first access)
+        self._compiled = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Public accessors
+    # -------------------------------------------------------------------------
+    @property
+    def dataframe(self):
+        """pd.DataFrame: The catalog as read from Excel."""
+        return self._ensure_loaded()["dataframe"]
+
+    @property
+    def lookup(self):
+        """
+        dict: Metadata per SKU code.
+        Example: {"sku_1": {"item_name": "Product A", "brand": "Brand X", ...}, ...}
+        """
+        return self._ensure_loaded()["lookup"]
+
+    def mapping(self, label_mode):
+        """
+        Returns the precomputed SKU code -> label mapping for a label mode.
+
+        Args:
+            label_mode (str): One of LABEL_MODES.
+
+        Returns:
+            dict: {sku_code: label}. SKUs missing from the catalog are not included;
+                  callers fall back to the SKU code itself.
+        """
+        return self._ensure_loaded()["mappings"][label_mode]
+
+    def label_for(self, sku, label_mode):
+        """
+        Returns the label of a SKU for a label mode (the SKU code if unknown).
+
+        Args:
+            sku (str): SKU code (model class name).
+            label_mode (str): One of LABEL_MODES.
+        """
+        return self.mapping(label_mode).get(sku, sku)
+
+    @property
+    def version(self):
+        """str: Content hash of the .xlsx the catalog was compiled from."""
+        return self._ensure_loaded()["source_sha256"]
+
+    # -------------------------------------------------------------------------
+    # Loading and invalidation
+    # -------------------------------------------------------------------------
+    def _ensure_loaded(self):
+        """Returns the compiled catalog, (re)building it if the .xlsx changed."""
+        now = time.monotonic()
+        compiled = self._compiled
+        if compiled is not None and now - self._checked_at < self.check_interval:
+            return compiled
+
+        with self._lock:
+            stat = os.stat(self.xlsx_path)
+            compiled = self._compiled
+
+            # Step 1: Fast path - loaded and the .xlsx is unchanged
+            if compiled is not None and self._same_stat(compiled, stat):
+                self._checked_at = now
+                return compiled
+
+            # Step 2: Load the compiled artifact from disk if not in memory yet
+            if compiled is None:
+                compiled = self._read_compiled()
+
+            # Step 3: Reuse it if mtime/size match, or if only the mtime changed
+            # (e.g. the file was copied into a container) but the content is the same
+            source_sha256 = None
+            if compiled is not None and not self._same_stat(compiled, stat):
+                source_sha256 = self._hash_file()
+                if source_sha256 == compiled["source_sha256"]:
+                    compiled["source_mtime"] = stat.st_mtime
+                    compiled["source_size"] = stat.st_size
+                    self._write_compiled(compiled)
+                else:
+                    compiled = None
+
+            # Step 4: Parse the Excel file only when the catalog actually changed
+            if compiled is None:
+                compiled = self._compile(stat, source_sha256 or self._hash_file())
+                self._write_compiled(compiled)
+
+            self._compiled = compiled
+            self._checked_at = now
+            return compiled
+
+    @staticmethod
+    def _same_stat(compiled, stat):
+        return compiled["source_mtime"] == stat.st_mtime and compiled["source_size"] == stat.st_size
+
+    def _hash_file(self):
+        """SHA-256 of the .xlsx content."""
+        digest = hashlib.sha256()
+        with open(self.xlsx_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _compile(self, stat, source_sha256):
+        """Parses the Excel file and precomputes the lookups for every label mode."""
+        print(f"[INFO] Compiling label catalog from: {self.xlsx_path}")
+        dataframe = pd.read_excel(self.xlsx_path)
+
+        # Metadata per SKU code, as the tracker used to build it at import time
+        lookup = dataframe.set_index("sku_code").to_dict(orient="index")
+
+        # SKU code -> label for every label mode (sku_code maps to itself)
+        mappings = {}
+        for label_mode in LABEL_MODES:
+            if label_mode == "sku_code":
+                mappings[label_mode] = {sku: sku for sku in lookup}
+            else:
+                mappings[label_mode] = {sku: meta.get(label_mode, sku) for sku, meta in lookup.items()}
+
+        return {
+            "format_version": COMPILED_FORMAT_VERSION,
+            "source_mtime": stat.st_mtime,
+            "source_size": stat.st_size,
+            "source_sha256": source_sha256,
+            "dataframe": dataframe,
+            "lookup": lookup,
+            "mappings": mappings,
+        }
+
+    def _read_compiled(self):
+        """Loads the compiled artifact, or returns None if missing/unreadable/outdated."""
+        try:
+            with open(self.compiled_path, "rb") as f:
+                compiled = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable compiled catalog '{self.compiled_path}': {e}")
+            return None
+        if not isinstance(compiled, dict) or compiled.get("format_version") != COMPILED_FORMAT_VERSION:
+            return None
+        return compiled
+
+    def _write_compiled(self, compiled):
+        """Atomically writes the compiled artifact (kept in memory only if the disk is read-only)."""
+        tmp_path = f"{self.compiled_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.compiled_path)
+        except OSError as e:
+            print(f"[WARN] Could not write compiled catalog '{self.compiled_path}': {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+# =============================================================================
+# DEFAULT CATALOG
+# =============================================================================
+
+# This Excel file contains product metadata (SKU, name, brand, category, etc.)
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "labelling-catalog.xlsx")
+
+# Nothing is read at import time: the catalog is loaded on first lookup from a
+# compiled cache that is rebuilt only when the Excel file changes
+label_catalog = LabelCatalog(DATA_PATH)
@@ -0,0 +1,261 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+from ultralytics import YOLO
+from collections import OrderedDict
+import numpy as np
+import os
+import threading
+from py.InferenceBackend import artifact_task, resolve_model_artifact
+from py.InferenceService import InferenceService
+from py.LabelCatalog import LABEL_MODES, label_catalog
+
+# =============================================================================
+# SHARED MODEL - One loaded copy of a YOLO model, usable from many sessions
+# =============================================================================
+class SharedModel:
+    def __init__(self, model_path, backend="pytorch", int8=False):
+        """
+        Loads YOLO weights once so they can be shared by every InventoryTracker.
+
+        Only the weights live here. Per-session state (ByteTrack, statistics,
+        annotators) stays on each InventoryTracker.
+
+        Args:
+            model_path (str): Path to YOLO model weights (.pt file).
+            backend (str): "pytorch", "onnx" or "openvino". Non-PyTorch backends
+                           load an artifact exported from (and cached next to) the weights.
+            int8 (bool): Use the INT8-quantized artifact (onnx/openvino only).
+        """
+        # Step 1: Load YOLO model (automatically detects if it's detection or segmentation)
+        # ONNX/OpenVINO artifacts run through Ultralytics AutoBackend and return
+        # the same Results objects as PyTorch
+        self.model_path = model_path
+        self.backend = backend
+        self.int8 = int8
+        self.artifact_path = resolve_model_artifact(model_path, backend, int8)
+        task = artifact_task(self.artifact_path) if backend != "pytorch" else None
+        self.model = YOLO(self.artifact_path, task=task)
+
+        # Step 2: Check if this is a segmentation model
+        # Segmentation models have 'seg' in their task name
+        self.is_segmentation = hasattr(self.model, 'task') and 'seg' in str(self.model.task).lower()
+
+        # Step 3: Class id -> class name (SKU code) mapping of the model
+        # (Model.names also works for exported backends, whose .model is only a path)
+        self.names = self.model.names
+
+        # Step 4: Same mapping as an array, so a whole frame of class ids can be
+        # translated with one fancy-indexing operation
+        num_classes = max(self.names) + 1 if self.names else 0
+        self.class_skus = np.array([self.names.get(i, str(i)) for i in range(num_classes)], dtype=object)
+        self._label_tables = (None, None)  # (catalog version, tables), swapped atomically
+
+        # Step 5: Ultralytics predictors are not thread-safe, so concurrent
+        # sessions take turns on the same model
+        self.lock = threading.Lock()
+
+        # Step 6: Number of trackers currently using this model (managed by ModelRegistry)
+        self.ref_count = 0
+
+        # Step 7: Optional micro-batching service shared by all callers (see start_service)
+        self.service = None
+
+    def label_tables(self, catalog):
+        """
+        Returns class id -> label arrays for every label mode.
+
+        The tables are built once per model and rebuilt only if the catalog
+        content changes, so per-frame label lookup is a single array index.
+
+        Args:
+            catalog (LabelCatalog): Product catalog used for the labels.
+
+        Returns:
+            dict: {label_mode: np.ndarray of labels indexed by class id}
+        """
+        version = catalog.version
+        tables_version, tables = self._label_tables
+        if tables is None or tables_version != version:
+            tables = {
+                label_mode: np.array([catalog.label_for(sku, label_mode) for sku in self.class_skus], dtype=object)
+                for label_mode in LABEL_MODES
+            }
+            self._label_tables = (version, tables)
+        return tables
+
+    def predict(self, frames, **kwargs):
+        """
+        Runs inference on a list of frames (thread-safe).
+
+        With the inference service running, the frames are micro-batched with
+        concurrent requests from other callers; otherwise they are run directly.
+
+        Args:
+            frames (list[np.ndarray]): Frames in BGR format.
+            **kwargs: Extra Ultralytics predict arguments (e.g. conf).
+
+        Returns:
+            list: One Ultralytics Results object per frame, in input order.
+        """
+        service = self.service
+        if service is not None:
+            return service.predict(frames, **kwargs)
+        return self.run_batch(frames, **kwargs)
+
+    def run_batch(self, frames, **kwargs):
+        """Runs one model call on the frames (serialized by the model lock)."""
+        with self.lock:
+            return self.model(list(frames), verbose=False, **kwargs)
+
+    def start_service(self, max_batch=8, max_wait_ms=10.0):
+        """
+        Routes predict() through a cross-client micro-batching service.
+
+        Args:
+            max_batch (int): Frames per model call before a batch is sent right away.
+            max_wait_ms (float): Longest a request waits for others to join its batch.
+        """
+        if self.service is None:
+            self.service = InferenceService(self, max_batch, max_wait_ms)
+
+    def stop_service(self):
+        """Serves queued requests, then goes back to direct inference calls."""
+        service, self.service = self.service, None
+        if service is not None:
+            service.close()
+
+# =============================================================================
+# MODEL REGISTRY - Process-wide cache of SharedModel instances
+# =============================================================================
+class ModelRegistry:
+    def __init__(self, max_models=2, max_batch=1, max_wait_ms=10.0):
+        """
+        Process-wide registry of loaded models, keyed by model path
+        (and inference backend).
+
+        Models are reference counted: every InventoryTracker acquires its
+        model on creation and releases it when it switches model or is
+        garbage collected. Models nobody uses stay cached for quick reuse
+        until the registry holds more than `max_models`; then the least
+        recently used unused models are evicted. Models in use are never
+        evicted, so the limit can be exceeded temporarily.
+
+        With max_batch > 1, every loaded model gets an inference service that
+        micro-batches concurrent requests from all sessions into one call.
+
+        Args:
+            max_models (int): Number of loaded models to keep before evicting.
+            max_batch (int): Frames per batched model call (1 = no cross-session batching).
+            max_wait_ms (float): Latency budget a request may wait for a batch to fill.
+        """
+        self.max_models = max_models
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._models = OrderedDict()  # (model_path, backend, int8) -> SharedModel, least recently used first
+        self._lock = threading.Lock()  # Guards _models and _load_locks (never held while loading)
+        self._load_locks = {}          # key -> lock held while that model loads
+
+    def acquire(self, model_path, backend="pytorch", int8=False):
+        """
+        Returns the shared model for a path, loading it on first use.
+
+        Args:
+            model_path (str): Path to YOLO model weights.
+            backend (str): "pytorch", "onnx" or "openvino".
+            int8 (bool): Use the INT8-quantized artifact (onnx/openvino only).
+
+        Returns:
+            SharedModel: Shared model with its reference count incremented.
+        """
+        key = (model_path, backend, int8)
+        with self._lock:
+            shared_model = self._models.get(key)
+            if shared_model is not None:
+                return self._use(key, shared_model)
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock: a first-use export or INT8 calibration
+        # can take minutes and must not block sessions using other models.
+        # Concurrent acquires of the same model wait for the first load.
+        with load_lock:
+            with self._lock:
+                shared_model = self._models.get(key)
+                if shared_model is not None:
+                    return self._use(key, shared_model)
+
+            shared_model = SharedModel(model_path, backend, int8)
+            if self.max_batch > 1:
+                shared_model.start_service(self.max_batch, self.max_wait_ms)
+            # Precompute the class id -> label tables at model load
+            shared_model.label_tables(label_catalog)
+            model_type = "SEGMENTATION" if shared_model.is_segmentation else "DETECTION"
+            print(f"[INFO] Loaded {model_type} model from: {shared_model.artifact_path} ({backend})")
+
+            with self._lock:
+                self._models[key] = shared_model
+                self._load_locks.pop(key, None)
+                return self._use(key, shared_model)
+
+    def _use(self, key, shared_model):
+        """Marks a model as most recently used and adds a reference (lock held)."""
+        self._models.move_to_end(key)
+        shared_model.ref_count += 1
+        self._evict()
+        return shared_model
+
+    def register(self, shared_model):
+        """
+        Adds an already constructed model to the registry.
+
+        Trackers created afterwards with the same (model_path, backend, int8)
+        use it instead of loading weights - e.g. the stub detector of the
+        benchmark suite. An existing entry with the same key is replaced.
+
+        Args:
+            shared_model (SharedModel): Model (or a stand-in with the same interface).
+        """
+        key = (shared_model.model_path, shared_model.backend, shared_model.int8)
+        with self._lock:
+            self._models[key] = shared_model
+            shared_model.label_tables(label_catalog)
+            if self.max_batch > 1:
+                shared_model.start_service(self.max_batch, self.max_wait_ms)
+            self._evict()
+
+    def release(self, shared_model):
+        """
+        Drops one reference to a shared model.
+
+        Args:
+            shared_model (SharedModel): Model previously returned by acquire().
+        """
+        with self._lock:
+            shared_model.ref_count = max(0, shared_model.ref_count - 1)
+            self._evict()
+
+    def _evict(self):
+        """Evicts least recently used, unreferenced models above max_models (lock held)."""
+        for key in list(self._models):
+            if len(self._models) <= self.max_models:
+                break
+            if self._models[key].ref_count == 0:
+                self._models.pop(key).stop_service()
+                print(f"[INFO] Evicted model from registry: {key[0]} ({key[1]})")
+
+    def loaded_models(self):
+        """
+        Returns the loaded models and how many trackers use each.
+
+        Returns:
+            dict: {(model_path, backend, int8): ref_count}, least recently used first.
+        """
+        with self._lock:
+            return {key: model.ref_count for key, model in self._models.items()}
+
+# Process-wide registry shared by all sessions
+# INFERENCE_MAX_BATCH > 1 batches inference across sessions (INFERENCE_MAX_WAIT_MS = latency budget)
+model_registry = ModelRegistry(
+    max_batch=int(os.environ.get("INFERENCE_MAX_BATCH", "1")),
+    max_wait_ms=float(os.environ.get("INFERENCE_MAX_WAIT_MS", "10")),
+)
@@ -0,0 +1,192 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import collections  # Recent decisions (for checkpoints)
+import cv2          # Downsampling and grayscale conversion
+import numpy as np  # Signature differences
+import threading    # Guards the history shared with checkpoints
+
+# =============================================================================
+# MOTION GATE - Skip inference on frames where the scene has not changed
+# =============================================================================
+# Fixed shelf cameras produce long stretches of near-identical frames. The
+# gate compares a tiny grayscale thumbnail of each frame (64x36 by default,
+# area-averaged, so sensor noise mostly cancels out) with the thumbnail of
+# the last frame that went through the model:
+#
+#   change = mean |thumbnail - reference| / 255      (0.0 = identical)
+#
+# Frames with change <= threshold reuse the detections of that reference
+# frame, which are still passed through ByteTrack and the statistics, so
+# track ids and frame presence behave as if the frame had been inferred.
+# Comparing with the last *inferred* frame (not the previous frame) means a
+# slow drift still adds up and triggers inference. A refresh is also forced
+# after `refresh_interval` reused frames in a row, whatever the change.
+#
+# The thumbnail costs well under a millisecond at 1080p, against tens to
+# hundreds of milliseconds for a YOLO (segmentation) call on CPU.
+#
+# In the video pipeline (py/handlers/pipeline.py) changed() and
+# record_inference() run on the infer thread while checkpoints call
+# state_at() from the annotate thread, so the history and the counters are
+# guarded by a lock.
+# =============================================================================
+
+class MotionGate:
+    def __init__(self, size=(64, 36)):
+        """
+        Creates a gate for one video (call reset() before the next one).
+
+        Args:
+            size (tuple): (width, height) of the compared thumbnails.
+        """
+        self.size = size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forgets the reference frame and clears the counters."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        """Clears the state (called with the lock held)."""
+        self.reference = None
+        self.reused_in_a_row = 0
+
+        # Counters reported by stats()
+        self.frames = 0
+        self.skipped = 0
+        self.inferred_frames = 0
+        self.inference_seconds = 0.0
+
+        # (frame number, reference, reused_in_a_row, skipped) after each recent
+        # decision: the gate runs ahead of tracking in the pipeline, so a
+        # checkpoint taken after frame n needs the gate state as of frame n
+        self.history = collections.deque(maxlen=1024)
+
+    def signature(self, frame):
+        """
+        Returns the grayscale thumbnail a frame is compared by.
+
+        Args:
+            frame (np.ndarray): Frame (BGR) or region of a frame.
+
+        Returns:
+            np.ndarray: (height, width) float32 thumbnail.
+        """
+        thumbnail = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        return thumbnail.astype(np.float32)
+
+    def changed(self, frame, threshold, refresh_interval=None):
+        """
+        Decides whether a frame has to go through the model.
+
+        Must be called once per frame, in frame order. A frame that needs
+        inference becomes the new reference.
+
+        Args:
+            frame (np.ndarray): Frame (BGR) or the region of it that is inferred.
+            threshold (float): Max mean absolute change (0.0-1.0) for reusing detections.
+            refresh_interval (int, optional): Force inference after this many reused frames in a row.
+
+        Returns:
+            bool: True if the frame must be inferred, False if the last detections can be reused.
+        """
+        signature = self.signature(frame)
+
+        # Step 1: Reuse while the change since the reference stays under the threshold
+        reuse = (self.reference is not None
+                 and self.reference.shape == signature.shape
+                 and (not refresh_interval or self.reused_in_a_row < refresh_interval)
+                 and float(np.mean(np.abs(signature - self.reference))) / 255.0 <= threshold)
+
+        # Step 2: Changed (or refresh due): this frame becomes the reference
+        with self._lock:
+            self.frames += 1
+            if reuse:
+                self.reused_in_a_row += 1
+                self.skipped += 1
+            else:
+                self.reference = signature
+                self.reused_in_a_row = 0
+            self.history.append((self.frames, self.reference, self.reused_in_a_row, self.skipped))
+        return not reuse
+
+    def record_inference(self, seconds, frames):
+        """
+        Adds the duration of a model call, used to estimate the time saved.
+
+        Args:
+            seconds (float): Duration of the call.
+            frames (int): Frames inferred in the call.
+        """
+        with self._lock:
+            self.inference_seconds += seconds
+            self.inferred_frames += frames
+
+    def state_at(self, frame_number):
+        """
+        Returns the gate state right after the decision for a frame (for checkpoints).
+
+        Args:
+            frame_number (int): 1-based number of the frame since the last reset.
+
+        Returns:
+            dict or None: State for load_state(), or None if the frame is not
+                          among the recent decisions (or the gate never ran).
+        """
+        # Snapshot under the lock: the infer thread keeps appending meanwhile
+        with self._lock:
+            history = list(self.history)
+            per_frame = self.inference_seconds / self.inferred_frames if self.inferred_frames else 0.0
+        for number, reference, reused_in_a_row, skipped in reversed(history):
+            if number == frame_number:
+                return {
+                    "frames": number,
+                    "reference": reference,
+                    "reused_in_a_row": reused_in_a_row,
+                    "skipped": skipped,
+                    "inference_seconds": (number - skipped) * per_frame,
+                }
+            if number < frame_number:
+                break
+        return None
+
+    def load_state(self, state):
+        """
+        Restores a state from state_at(), e.g. when resuming a video.
+
+        Args:
+            state (dict): Output of state_at().
+        """
+        with self._lock:
+            self._reset()
+            self.frames = state["frames"]
+            self.reference = state["reference"]
+            self.reused_in_a_row = state["reused_in_a_row"]
+            self.skipped = state["skipped"]
+            self.inferred_frames = self.frames - self.skipped
+            self.inference_seconds = state["inference_seconds"]
+
+    def stats(self):
+        """
+        Returns how much inference the gate saved.
+
+        The time saved is estimated from the mean inference time per frame
+        of the frames that were inferred.
+
+        Returns:
+            dict: {"frames", "skipped", "skipped_fraction", "time_saved_s"}
+        """
+        with self._lock:
+            frames, skipped = self.frames, self.skipped
+            per_frame = self.inference_seconds / self.inferred_frames if self.inferred_frames else 0.0
+        return {
+            "frames": frames,
+            "skipped": skipped,
+            "skipped_fraction": skipped / frames if frames else 0.0,
+            "time_saved_s": skipped * per_frame,
+        }
@@ -0,0 +1,358 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import queue        # Bounded per-stream frame buffers
+import threading    # Decode threads and the scheduler thread
+import time         # Idle waits
+import cv2          # Video files / camera URLs
+from py.InventoryTracker import InventoryTracker
+from py.roi import clip_roi, crop_to_roi
+
+# =============================================================================
+# MULTI-STREAM TRACKING - N feeds, one model, per-stream ByteTrack and stats
+# =============================================================================
+# Every stream gets its own InventoryTracker, so ByteTrack state and
+# statistics are per feed, while the weights come from the model registry
+# and are loaded once. Frames are decoded on one thread per stream into a
+# small bounded buffer; a scheduler thread collects the decoded frames of all
+# streams into one batch per model call:
+#
+#   cam-1 decode ──┐
+#   cam-2 decode ──┼──► scheduler: batch (round-robin, weighted by priority)
+#   cam-N decode ──┘        │ one model call
+#                           ▼
+#              per-stream ByteTrack + stats (in each stream's frame order)
+#
+# A stream with priority p contributes up to p frames per scheduling round,
+# so higher-priority feeds get a larger share of the model. Each round starts
+# one stream further than the previous one, so when the streams' combined
+# priority exceeds batch_size every feed still gets its turn. A feed that has
+# no frame ready is skipped, so a slow camera never stalls the others.
+#
+# Per-stream inference settings are the ROI and the inference resolution
+# (imgsz): frames of a batch are grouped by model and resolution, one model
+# call per group. The confidence threshold is the manager's; tiling and the motion
+# gate of the single-stream path are not applied to the feeds.
+#
+# Usage:
+#   manager = MultiStreamTracker("models/model-segment_25-10-10.pt", batch_size=8)
+#   manager.add_stream("aisle-1", "aisle1.mp4")
+#   manager.add_stream("checkout", "rtsp://...", priority=2)
+#   manager.start()
+#   ...  manager.summaries()  # at any time
+#   manager.join()
+# =============================================================================
+
+class _Stream:
+    """Per-feed state: source, tracker, decode buffer and scheduling weight."""
+
+    def __init__(self, stream_id, frames, tracker, priority, buffer_size):
+        self.stream_id = stream_id
+        self.frames = frames
+        self.tracker = tracker
+        self.priority = max(1, int(priority))
+        self.buffer = queue.Queue(maxsize=buffer_size)
+        self.finished = False
+        self.frames_processed = 0
+        self.thread = None
+
+
+class MultiStreamTracker:
+    def __init__(self, model_path="models/model-segment_25-10-10.pt", label_mode="item_name", backend="pytorch",
+                 int8=False, batch_size=8, confidence_threshold=0.25, stats_only=True, on_frame=None):
+        """
+        Creates a manager for several concurrent feeds sharing one model.
+
+        Args:
+            model_path (str): Path to YOLO model weights (.pt file).
+            label_mode (str): Label mode of the per-stream summaries.
+            backend (str): "pytorch", "onnx" or "openvino".
+            int8 (bool): Use the INT8-quantized artifact.
+            batch_size (int): Max frames (from all streams) per inference call.
+            confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+            stats_only (bool): Only count (no annotated frames).
+            on_frame (callable, optional): Called as on_frame(stream_id, annotated_frame,
+                                           live_summary) after each processed frame,
+                                           on the scheduler thread.
+        """
+        self.model_path = model_path
+        self.label_mode = label_mode
+        self.backend = backend
+        self.int8 = int8
+        self.batch_size = max(1, int(batch_size))
+        self.confidence_threshold = confidence_threshold
+        self.stats_only = stats_only
+        self.on_frame = on_frame
+
+        self.streams = {}                   # stream_id -> _Stream, in insertion order
+        self._lock = threading.Lock()       # Guards streams and their statistics
+        self._stop_event = threading.Event()
+        self._scheduler = None
+        self._cursor = 0                    # Stream that starts the next scheduling round
+        self.error = None
+
+    # -------------------------------------------------------------------------
+    # Streams
+    # -------------------------------------------------------------------------
+    def add_stream(self, stream_id, source, priority=1, roi=None, imgsz=None, buffer_size=4, window_s=None, fps=None):
+        """
+        Adds a feed. Streams can be added before or while the manager runs.
+
+        Args:
+            stream_id (str): Unique name of the feed.
+            source (str or iterable): Video file / camera URL opened with OpenCV,
+                                      or any iterator of BGR frames.
+            priority (int): Frames taken from this stream per scheduling round.
+            roi (tuple, optional): Region of interest of this feed (see py/roi.py).
+            imgsz (int, optional): Inference resolution of this feed. Defaults to the model's.
+            buffer_size (int): Decoded frames buffered for this stream.
+            window_s (float, optional): Keep counts per time window of this many
+                                        seconds (see get_time_series()).
+            fps (float, optional): Frame rate of the feed, to size the windows.
+                                   Defaults to the video's frame rate, else 24.
+
+        Returns:
+            InventoryTracker: The stream's tracker (its own ByteTrack and statistics).
+                              Its roi and imgsz may be changed later; its
+                              confidence threshold, tiling and motion gate
+                              settings are not used by the manager.
+        """
+        # Step 1: Per-stream tracker; the weights are shared through the model registry
+        tracker = InventoryTracker(model_path=self.model_path, label_mode=self.label_mode,
+                                   backend=self.backend, int8=self.int8)
+        tracker.roi = roi
+        tracker.imgsz = imgsz
+        tracker.stats_only = self.stats_only
+        if window_s:
+            if fps is None and isinstance(source, str):
+                cap = cv2.VideoCapture(source)
+                fps = cap.get(cv2.CAP_PROP_FPS) or None
+                cap.release()
+            tracker.window_s = window_s
+            tracker.analyzed_fps = fps
+            tracker.reset_output_stats()
+
+        # Step 2: Register the stream and start decoding it
+        frames = _read_video(source) if isinstance(source, str) else iter(source)
+        stream = _Stream(stream_id, frames, tracker, priority, buffer_size)
+        with self._lock:
+            if stream_id in self.streams:
+                raise ValueError(f"Stream '{stream_id}' already exists")
+            self.streams[stream_id] = stream
+        stream.thread = threading.Thread(target=self._decode, args=(stream,), name=f"decode-{stream_id}", daemon=True)
+        stream.thread.start()
+        return tracker
+
+    def summaries(self):
+        """
+        Returns the running summary of every stream (safe to call at any time).
+
+        Returns:
+            dict: {stream_id: {"frames": int, "finished": bool, "items": {label: count}}}
+        """
+        with self._lock:
+            return {
+                stream_id: {
+                    "frames": stream.frames_processed,
+                    "finished": stream.finished and stream.buffer.empty(),
+                    "items": stream.tracker.stats.live_summary(),
+                }
+                for stream_id, stream in self.streams.items()
+            }
+
+    def get_output_stats(self, stream_id):
+        """
+        Returns the summary table of one stream (see InventoryTracker.get_output_stats).
+
+        Args:
+            stream_id (str): Name of the feed.
+
+        Returns:
+            pd.DataFrame: Aggregated statistics of the stream.
+        """
+        with self._lock:
+            return self.streams[stream_id].tracker.get_output_stats()
+
+    def get_time_series(self, stream_id, label_mode=None):
+        """
+        Returns the counts per time window of one stream (see InventoryTracker.get_time_series).
+
+        Args:
+            stream_id (str): Name of the feed.
+            label_mode (str, optional): Label mode of the rows. Defaults to the manager's.
+
+        Returns:
+            pd.DataFrame: Time series of the stream (empty without window_s).
+        """
+        with self._lock:
+            return self.streams[stream_id].tracker.get_time_series(label_mode)
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+    def start(self):
+        """Starts the scheduler thread (returns immediately)."""
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(target=self._run, name="multistream-scheduler", daemon=True)
+            self._scheduler.start()
+
+    def join(self, timeout=None):
+        """
+        Waits until every stream has ended (or stop() was called).
+
+        Args:
+            timeout (float, optional): Give up waiting after this many seconds.
+
+        Returns:
+            bool: True if the manager has finished, False on timeout.
+
+        Raises:
+            Exception: Re-raises an error from the scheduler thread.
+        """
+        if self._scheduler is not None:
+            self._scheduler.join(timeout)
+            if self._scheduler.is_alive():
+                return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+    def stop(self):
+        """Stops scheduling and decoding (live feeds never end on their own)."""
+        self._stop_event.set()
+        self.join()
+
+    # -------------------------------------------------------------------------
+    # Workers
+    # -------------------------------------------------------------------------
+    def _decode(self, stream):
+        """Decode thread of one stream: fills its bounded buffer."""
+        try:
+            for frame in stream.frames:
+                while not self._stop_event.is_set():
+                    try:
+                        stream.buffer.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self._stop_event.is_set():
+                    return
+        finally:
+            stream.finished = True
+
+    def _next_batch(self):
+        """Takes ready frames round-robin (priority frames per stream per round) up to batch_size."""
+        with self._lock:
+            streams = list(self.streams.values())
+        if not streams:
+            return []
+
+        # Rotate the starting stream, so the first streams never monopolize a full batch
+        start = self._cursor % len(streams)
+        streams = streams[start:] + streams[:start]
+        self._cursor = start + 1
+        batch = []
+        progress = True
+        while len(batch) < self.batch_size and progress:
+            progress = False
+            for stream in streams:
+                for _ in range(stream.priority):
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        batch.append((stream, stream.buffer.get_nowait()))
+                        progress = True
+                    except queue.Empty:
+                        break
+        return batch
+
+    def _all_finished(self):
+        with self._lock:
+            return all(stream.finished and stream.buffer.empty() for stream in self.streams.values())
+
+    def _run(self):
+        """Scheduler thread: batched inference, then per-stream tracking in frame order."""
+        try:
+            while not self._stop_event.is_set():
+                # Step 1: Collect ready frames from all streams
+                batch = self._next_batch()
+                if not batch:
+                    if self._all_finished():
+                        break
+                    time.sleep(0.005)  # Nothing decoded yet
+                    continue
+
+                # Step 2: One model call per (model, inference resolution) in the batch
+                # (usually one call for the whole batch; each frame cropped to its stream's ROI)
+                batch_results = [None] * len(batch)
+                with batch[0][0].tracker.perf.stage("infer"):
+                    groups = {}
+                    for index, (stream, frame) in enumerate(batch):
+                        groups.setdefault((stream.tracker.shared_model, stream.tracker.imgsz), []).append(index)
+                    for (shared_model, imgsz), indices in groups.items():
+                        crops = [crop_to_roi(batch[i][1], clip_roi(batch[i][0].tracker.roi, batch[i][1].shape))
+                                 for i in indices]
+                        predict_args = {"conf": self.confidence_threshold}
+                        if imgsz:
+                            predict_args["imgsz"] = imgsz
+                        for i, results in zip(indices, shared_model.predict(crops, **predict_args)):
+                            batch_results[i] = results
+
+                # Step 3: Per-stream ByteTrack and statistics (frames of a stream stay in order)
+                for (stream, frame), results in zip(batch, batch_results):
+                    with self._lock:
+                        annotated_frame, live_summary = stream.tracker.process_result(
+                            frame, results, annotate=not self.stats_only)
+                        stream.frames_processed += 1
+                    if self.on_frame is not None:
+                        self.on_frame(stream.stream_id, annotated_frame, live_summary)
+        except Exception as e:
+            self.error = e
+            self._stop_event.set()
+
+
+def _read_video(source):
+    """Yields the frames of a video file or camera URL."""
+    cap = cv2.VideoCapture(source)
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+# =============================================================================
+# COMMAND LINE - Track several files at once with one model
+# =============================================================================
+# Usage:
+#   python -m py.MultiStreamTracker aisle1.mp4 aisle2.mp4 checkout.mp4 --batch-size 8
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Track several videos concurrently with one shared model.")
+    parser.add_argument("sources", nargs="+", help="Video files or camera URLs.")
+    parser.add_argument("--model", default="models/model-segment_25-10-10.pt", help="YOLO weights (.pt).")
+    parser.add_argument("--label-mode", default="item_name", help="Label mode of the summaries.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per inference call.")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence threshold.")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Seconds between progress reports.")
+    args = parser.parse_args()
+
+    manager = MultiStreamTracker(args.model, label_mode=args.label_mode, batch_size=args.batch_size,
+                                 confidence_threshold=args.conf)
+    for source in args.sources:
+        manager.add_stream(os.path.basename(source), source)
+    manager.start()
+
+    start = time.perf_counter()
+    while not manager.join(args.report_every):
+        total = sum(summary["frames"] for summary in manager.summaries().values())
+        print(f"[INFO] {total} frames, {total / (time.perf_counter() - start):.1f} fps over {len(args.sources)} streams")
+
+    for stream_id in manager.streams:
+        print(f"\n{stream_id}")
+        print(manager.get_output_stats(stream_id).to_string(index=False))
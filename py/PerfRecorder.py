@@ -0,0 +1,228 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import contextlib   # No-op context when instrumentation is off
+import os           # Environment configuration, atomic file writes
+import threading    # Stages are recorded from the pipeline worker threads
+import time         # perf_counter timings
+import numpy as np  # Ring buffers and percentiles
+
+# =============================================================================
+# PER-STAGE TIMING INSTRUMENTATION
+# =============================================================================
+# Times every stage of the frame path so a slow video can be attributed to
+# one of them:
+#
+#   decode      reading the next frame from the video
+#   gate        motion gate thumbnails (only with a motion threshold)
+#   infer       the model call (includes the ROI crop)
+#   convert     sv.Detections.from_ultralytics + mapping back to the full frame
+#   track       ByteTrack update
+#   stats       statistics update + live summary
+#   annotate    label lookup, frame copy and the annotators
+#   checkpoint  serializing and writing a video checkpoint
+#
+# Each stage keeps the last `window` durations in a ring buffer (a rolling
+# histogram), plus a total count and sum. Percentiles are computed only when
+# the statistics are read.
+#
+# Instrumentation is off by default. While off, stage() returns one shared
+# no-op context manager: no clock reads, no locking, no allocation.
+# Enable it with PERF_METRICS=1 (or perf_recorder.enabled = True).
+#
+# Export for Prometheus:
+#   PERF_METRICS_PORT=9464         serve /metrics on a local port
+#   PERF_METRICS_FILE=/path.prom   write a node_exporter textfile (flush())
+# =============================================================================
+
+# Shared no-op context returned while instrumentation is disabled
+_NOOP = contextlib.nullcontext()
+
+
+class _StageTimer:
+    """Context manager that records the duration of its block into a recorder."""
+
+    __slots__ = ("recorder", "stage", "start")
+
+    def __init__(self, recorder, stage):
+        self.recorder = recorder
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class PerfRecorder:
+    def __init__(self, window=2048, enabled=False, metrics_file=None):
+        """
+        Creates a recorder of per-stage durations.
+
+        Args:
+            window (int): Number of recent samples kept per stage for percentiles.
+            enabled (bool): Start with instrumentation on.
+            metrics_file (str, optional): Prometheus textfile written by flush().
+        """
+        self.window = window
+        self.enabled = enabled
+        self.metrics_file = metrics_file
+        self._lock = threading.Lock()
+        self._stages = {}   # stage -> [ring buffer, samples written, total seconds]
+        self._server = None
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+    def stage(self, name):
+        """
+        Times a block of code:
+
+            with perf.stage("infer"):
+                results = model(frames)
+
+        Args:
+            name (str): Stage name.
+
+        Returns:
+            Context manager (a shared no-op while disabled).
+        """
+        if not self.enabled:
+            return _NOOP
+        return _StageTimer(self, name)
+
+    def record(self, name, seconds):
+        """
+        Adds one duration to a stage.
+
+        Args:
+            name (str): Stage name.
+            seconds (float): Measured duration.
+        """
+        with self._lock:
+            entry = self._stages.get(name)
+            if entry is None:
+                entry = self._stages[name] = [np.zeros(self.window), 0, 0.0]
+            ring, written, _ = entry
+            ring[written % self.window] = seconds
+            entry[1] = written + 1
+            entry[2] += seconds
+
+    def reset(self):
+        """Clears all samples."""
+        with self._lock:
+            self._stages = {}
+
+    # -------------------------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------------------------
+    def get_stats(self):
+        """
+        Returns the rolling statistics of every stage.
+
+        Returns:
+            dict: {stage: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "total_s"}}.
+                  count and total_s cover all samples since the last reset;
+                  the percentiles cover the last `window` samples.
+        """
+        with self._lock:
+            snapshot = {name: (ring[:min(written, self.window)].copy(), written, total)
+                        for name, (ring, written, total) in self._stages.items()}
+
+        stats = {}
+        for name, (samples, written, total) in snapshot.items():
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000 if len(samples) else (0.0, 0.0, 0.0)
+            stats[name] = {
+                "count": written,
+                "mean_ms": round(total / written * 1000, 3) if written else 0.0,
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "total_s": round(total, 3),
+            }
+        return stats
+
+    def to_prometheus(self, prefix="inventory_tracker_stage"):
+        """
+        Renders the statistics in the Prometheus text exposition format.
+
+        Each stage becomes one series of a `summary` metric (in seconds):
+            <prefix>_seconds{stage="infer",quantile="0.95"} 0.0412
+            <prefix>_seconds_sum{stage="infer"} 12.3
+            <prefix>_seconds_count{stage="infer"} 301
+
+        Returns:
+            str: Exposition text.
+        """
+        metric = f"{prefix}_seconds"
+        lines = [
+            f"# HELP {metric} Duration of each frame processing stage (rolling window quantiles).",
+            f"# TYPE {metric} summary",
+        ]
+        for name, stats in sorted(self.get_stats().items()):
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'{metric}{{stage="{name}",quantile="{quantile}"}} {stats[key] / 1000:.6f}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {stats["total_s"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    # -------------------------------------------------------------------------
+    # Export
+    # -------------------------------------------------------------------------
+    def flush(self):
+        """Writes the Prometheus textfile (atomically), if one is configured and instrumentation is on."""
+        if not (self.enabled and self.metrics_file):
+            return
+        tmp_path = f"{self.metrics_file}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, self.metrics_file)
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serves the statistics on http://host:port/metrics from a daemon thread.
+
+        Calling it again is a no-op, so it is safe from a Streamlit script that reruns.
+
+        Args:
+            port (int): Local port.
+            host (str): Interface to bind (local only by default).
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        with self._lock:
+            if self._server is not None:
+                return
+            recorder = self
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = recorder.to_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass  # No access log on stderr
+
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, name="perf-metrics", daemon=True).start()
+        print(f"[INFO] Serving stage timings on http://{host}:{port}/metrics")
+
+
+# Process-wide recorder shared by all sessions (configured from the environment)
+perf_recorder = PerfRecorder(
+    enabled=os.environ.get("PERF_METRICS", "").lower() in ("1", "true", "yes"),
+    metrics_file=os.environ.get("PERF_METRICS_FILE") or None,
+)
+if os.environ.get("PERF_METRICS_PORT"):
+    perf_recorder.enabled = True
+    perf_recorder.serve(int(os.environ["PERF_METRICS_PORT"]))
@@ -0,0 +1,212 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import collections  # FIFO of waiting jobs
+import contextlib   # admit() context manager
+import math         # Rounding the CPU quota
+import os           # CPU affinity and environment configuration
+import threading    # Admission condition variable
+
+# =============================================================================
+# RESOURCE GOVERNOR - CPU budget and admission control for inference jobs
+# =============================================================================
+# Without limits, every session runs inference with as many torch (and
+# OpenCV) threads as the host has cores, even in a container limited to a
+# fraction of them, and N concurrent uploads run N x cores threads: the cores
+# are oversubscribed, threads are throttled by the CFS quota and total
+# throughput collapses.
+#
+# The governor sizes everything from the CPUs the container may actually use
+# (cgroup v2 cpu.max, cgroup v1 cfs quota, CPU affinity):
+#
+#   max_jobs          inference jobs (uploads) processed at the same time
+#   torch_threads     torch intra-op threads = cpus
+#
+# Torch's intra-op pool is process-wide, and the jobs share one model whose
+# calls are serialized by its lock (py/ModelRegistry.py): only one inference
+# runs at any time, so it gets the whole quota. Splitting the quota between
+# the jobs would leave the rest of the cores idle during every model call.
+# The admitted jobs overlap only in their single-threaded stages (decoding,
+# tracking, annotation). Further jobs wait in a FIFO admission queue and are
+# told their position until a slot frees up.
+#
+# Configuration:
+#   INFERENCE_MAX_JOBS=2     concurrent jobs (default: one per 4 CPUs)
+#   INFERENCE_THREADS=4      torch intra-op threads (default: cpus)
+# =============================================================================
+
+def available_cpus():
+    """
+    Returns the number of CPUs this process may use, honouring container limits.
+
+    Checks the cgroup v2 quota (cpu.max), the cgroup v1 quota
+    (cpu.cfs_quota_us / cpu.cfs_period_us) and the CPU affinity mask; the
+    smallest wins. A fractional quota is rounded down (at least 1), so the
+    threads are never throttled.
+
+    Returns:
+        int: Usable CPUs (>= 1).
+    """
+    # Step 1: CPUs the scheduler lets this process run on
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+
+    # Step 2: CFS bandwidth quota of the container (cgroup v2, then v1)
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()[:2]
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, max(1, math.floor(quota)))
+    return max(1, cpus)
+
+
+class ResourceGovernor:
+    def __init__(self, cpus=None, max_jobs=None, torch_threads=None):
+        """
+        Creates a governor for one process.
+
+        Args:
+            cpus (int, optional): CPU budget. Defaults to available_cpus().
+            max_jobs (int, optional): Concurrent inference jobs. Defaults to one per 4 CPUs.
+            torch_threads (int, optional): Torch intra-op threads, shared by the
+                                           serialized model calls. Defaults to cpus.
+        """
+        self.cpus = int(cpus or available_cpus())
+        self.max_jobs = max(1, int(max_jobs or round(self.cpus / 4)))
+        self.torch_threads = max(1, int(torch_threads or self.cpus))
+
+        self._condition = threading.Condition()
+        self._waiting = collections.deque()     # Tickets of waiting jobs, in arrival order
+        self.running = 0
+        self.threads_applied = None             # Thread count set by apply_thread_budget()
+
+    # -------------------------------------------------------------------------
+    # Thread budget
+    # -------------------------------------------------------------------------
+    def apply_thread_budget(self, threads=None):
+        """
+        Limits torch and OpenCV threads for this process (once; later calls are no-ops).
+
+        Called before the first model is loaded. Torch's intra-op pool is
+        process-wide; model calls are serialized, so one call at a time uses
+        it and it is sized to the whole budget. OpenCV runs single-threaded
+        next to it. Processes that each load their own model (batch.py
+        workers) pass their share of the CPUs instead.
+
+        Args:
+            threads (int, optional): Torch intra-op threads. Defaults to torch_threads.
+        """
+        if self.threads_applied is not None:
+            return
+        threads = max(1, int(threads or self.torch_threads))
+
+        # Step 1: OpenMP/MKL pools created later (e.g. by exported backends)
+        os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+        os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+
+        # Step 2: Torch intra-op threads (inter-op threads can only be set before any parallel work)
+        import cv2
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Torch already ran parallel work in this process
+        cv2.setNumThreads(1)
+
+        self.threads_applied = threads
+        print(f"[INFO] Resource governor: {self.cpus} CPUs, {self.max_jobs} concurrent jobs, "
+              f"{threads} torch threads")
+
+    # -------------------------------------------------------------------------
+    # Admission control
+    # -------------------------------------------------------------------------
+    @contextlib.contextmanager
+    def admit(self, on_wait=None, poll_interval=0.5):
+        """
+        Waits for a free job slot (first come, first served) and holds it for the with-block.
+
+            with resource_governor.admit(on_wait=show_position):
+                ...  # run inference
+
+        Args:
+            on_wait (callable, optional): Called as on_wait(position) from the
+                                          waiting thread whenever the job's
+                                          position in the queue (1 = next) changes.
+                                          Not called if a slot is free right away.
+            poll_interval (float): Max seconds between two checks of the position.
+        """
+        ticket = object()
+        last_position = None
+        with self._condition:
+            self._waiting.append(ticket)
+        try:
+            # Step 1: Wait until this job is first in line and a slot is free
+            while True:
+                with self._condition:
+                    if self._waiting[0] is ticket and self.running < self.max_jobs:
+                        self._waiting.popleft()
+                        self.running += 1
+                        break
+                    position = self._waiting.index(ticket) + 1
+                    if position == last_position:
+                        self._condition.wait(poll_interval)
+                        continue
+                # Report outside the lock (the callback may be slow, e.g. a UI update)
+                last_position = position
+                if on_wait is not None:
+                    on_wait(position)
+        except BaseException:
+            # Abandoned while waiting (error, or the session went away): leave the queue
+            with self._condition:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                self._condition.notify_all()
+            raise
+
+        # Step 2: Run the job, then hand the slot to the next one in line
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.running -= 1
+                self._condition.notify_all()
+
+    def stats(self):
+        """
+        Returns the current load.
+
+        Returns:
+            dict: {"cpus", "max_jobs", "torch_threads", "running", "waiting"}
+        """
+        with self._condition:
+            return {
+                "cpus": self.cpus,
+                "max_jobs": self.max_jobs,
+                "torch_threads": self.threads_applied or self.torch_threads,
+                "running": self.running,
+                "waiting": len(self._waiting),
+            }
+
+
+# Process-wide governor shared by all sessions
+resource_governor = ResourceGovernor(
+    max_jobs=int(os.environ.get("INFERENCE_MAX_JOBS", "0")) or None,
+    torch_threads=int(os.environ.get("INFERENCE_THREADS", "0")) or None,
+)
@@ -0,0 +1,259 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import collections
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from py.LabelCatalog import label_catalog
+
+# =============================================================================
+# RESULT CACHE - Content-addressed, size-bounded on-disk cache of run results
+# =============================================================================
+# Re-uploading the same photo or video with the same settings returns the
+# stored statistics instead of running inference again. An entry is keyed by:
+#
+#   - the SHA-256 of the uploaded bytes (not the file name)
+#   - the model: path, backend, INT8 flag and a fingerprint of the weights
+#   - the label catalog version (content hash of the .xlsx)
+#   - every setting that changes detections: confidence threshold, ROI,
+#     inference resolution, tiling, temporal sampling, motion gate
+#
+# so replacing the weights or the catalog changes the key and old entries
+# are simply never hit again (and age out). The label mode is not part of the
+# key: entries hold the raw per-SKU statistics (StatsEngine.state_dict()) and
+# time series (WindowedStats.state_dict()), from which any label mode can be
+# shown. Annotated previews depend on the
+# label mode and are stored per mode; image entries also keep the compact
+# detections of the run, so a mode without a preview is redrawn.
+#
+# Entries are pickles in RESULT_CACHE_DIR (default: cache/results). The
+# directory is bounded to RESULT_CACHE_MAX_MB; the least recently used entries
+# (file mtime, refreshed on every hit) are evicted first.
+# =============================================================================
+
+# Bump when the layout of cache entries changes
+CACHE_FORMAT_VERSION = 2
+
+# Upload digests remembered for reruns (least recently used are forgotten)
+MAX_UPLOAD_DIGESTS = 256
+
+
+class ResultCache:
+    def __init__(self, directory, max_bytes=512 * 2**20):
+        """
+        Creates a cache in a directory (created on first write).
+
+        Args:
+            directory (str): Where entries are stored.
+            max_bytes (int): Size bound of the directory; 0 disables the cache.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._weights_fingerprints = {}     # (path, mtime_ns, size) -> sha256
+        self._upload_digests = collections.OrderedDict()  # Streamlit file_id -> sha256 (reruns skip re-hashing), LRU
+        self._digests_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """bool: False when the size bound is 0."""
+        return self.max_bytes > 0
+
+    # -------------------------------------------------------------------------
+    # Keys
+    # -------------------------------------------------------------------------
+    def upload_digest(self, uploaded_file):
+        """
+        Returns the SHA-256 of an upload, hashing its buffer in place (no copy).
+
+        Args:
+            uploaded_file: Streamlit UploadedFile.
+
+        Returns:
+            str: Hex digest.
+        """
+        file_id = getattr(uploaded_file, "file_id", None)
+        if file_id is not None:
+            with self._digests_lock:
+                if file_id in self._upload_digests:
+                    self._upload_digests.move_to_end(file_id)
+                    return self._upload_digests[file_id]
+
+        digest = hashlib.sha256()
+        buffer = uploaded_file.getbuffer()
+        try:
+            for start in range(0, len(buffer), 8 * 2**20):
+                digest.update(buffer[start:start + 8 * 2**20])
+        finally:
+            try:
+                buffer.release()
+            except BufferError:
+                pass  # Still exported elsewhere; released with the upload
+        if file_id is not None:
+            with self._digests_lock:
+                self._upload_digests[file_id] = digest.hexdigest()
+                while len(self._upload_digests) > MAX_UPLOAD_DIGESTS:
+                    self._upload_digests.popitem(last=False)
+        return digest.hexdigest()
+
+    def weights_fingerprint(self, model_path):
+        """
+        Returns the SHA-256 of a weights file, recomputed only when its mtime or size change.
+
+        Args:
+            model_path (str): Path to the .pt weights.
+
+        Returns:
+            str: Hex digest (the path itself if the file does not exist).
+        """
+        if not os.path.isfile(model_path):
+            return model_path
+        stat = os.stat(model_path)
+        key = (model_path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._weights_fingerprints:
+            digest = hashlib.sha256()
+            with open(model_path, "rb") as f:
+                for chunk in iter(lambda: f.read(8 * 2**20), b""):
+                    digest.update(chunk)
+            self._weights_fingerprints[key] = digest.hexdigest()
+        return self._weights_fingerprints[key]
+
+    def key_for(self, uploaded_file, tracker):
+        """
+        Computes the cache key of processing an upload with a tracker's settings.
+
+        Args:
+            uploaded_file: Streamlit UploadedFile.
+            tracker (InventoryTracker): Tracker with the model and settings to use.
+
+        Returns:
+            str: Hex key.
+        """
+        return self._key(self.upload_digest(uploaded_file), tracker)
+
+    def key_for_file(self, path, tracker):
+        """
+        Computes the key of processing a file on disk with a tracker's settings.
+
+        The file is identified by its path, size and modification time
+        (not hashed: batch inputs can be hours of video).
+
+        Args:
+            path (str): Input file.
+            tracker (InventoryTracker): Tracker with the model and settings to use.
+
+        Returns:
+            str: Hex key.
+        """
+        stat = os.stat(path)
+        return self._key(["file", os.path.abspath(path), stat.st_size, stat.st_mtime_ns], tracker)
+
+    def _key(self, content, tracker):
+        """Hashes the content identity with every setting that changes the results."""
+        fields = {
+            "format": CACHE_FORMAT_VERSION,
+            "content": content,
+            "model": [tracker.model_path, tracker.backend, tracker.int8, self.weights_fingerprint(tracker.model_path)],
+            "catalog": label_catalog.version,
+            "conf": tracker.confidence_threshold,
+            "roi": tracker.roi,
+            "imgsz": tracker.imgsz,
+            "tiling": [tracker.tile_size, tracker.tile_overlap],
+            "sampling": [tracker.analysis_fps, tracker.frame_stride],
+            "motion": [tracker.motion_threshold, tracker.motion_refresh_interval],
+            "windows": [tracker.window_s, tracker.max_windows],
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+    # -------------------------------------------------------------------------
+    # Entries
+    # -------------------------------------------------------------------------
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """
+        Returns a stored entry and marks it as recently used.
+
+        Args:
+            key (str): Key from key_for().
+
+        Returns:
+            dict or None: {"stats": StatsEngine state, "previews": {label_mode: JPEG bytes},
+                          "time_series", "last_run"}, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(path)  # LRU: most recently used
+        except OSError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Truncated, or pickled with classes that no longer exist: never usable again
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry if entry.get("format") == CACHE_FORMAT_VERSION else None
+
+    def put(self, key, stats, preview=None, label_mode=None, time_series=None, last_run=None):
+        """
+        Stores (or extends) an entry, then evicts entries beyond the size bound.
+
+        Args:
+            key (str): Key from key_for().
+            stats (dict): StatsEngine.state_dict() of the run.
+            preview (bytes, optional): Encoded annotated preview (e.g. JPEG).
+            label_mode (str, optional): Label mode the preview was drawn with.
+            time_series (dict, optional): WindowedStats.state_dict() of the run.
+            last_run (dict, optional): Compact image run (see cached_handler.pack_last_run()),
+                                       to redraw it in label modes without a preview.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            # Keep previews of other label modes already stored for the same key
+            entry = self.get(key) or {"format": CACHE_FORMAT_VERSION, "previews": {}}
+            entry["stats"] = stats
+            entry["time_series"] = time_series
+            entry["created"] = time.time()
+            if preview is not None:
+                entry["previews"][label_mode] = preview
+            if last_run is not None:
+                entry["last_run"] = last_run
+
+            # Atomic write: readers never see a partial entry
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+
+    def _evict(self):
+        """Deletes least recently used entries until the directory fits max_bytes (lock held)."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+# Process-wide cache shared by all sessions
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "cache", "results"))
+result_cache = ResultCache(RESULT_CACHE_DIR, max_bytes=int(float(os.environ.get("RESULT_CACHE_MAX_MB", "512")) * 2**20))
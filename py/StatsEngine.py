@@ -0,0 +1,236 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# STREAMING STATISTICS ENGINE
+# =============================================================================
+# Keeps running aggregates instead of raw per-detection lists:
+#
+#   per class (SKU)         : unique tracks, confidence sum, frames present
+#   per label of each mode  : the same three aggregates, rolled up on the fly
+#
+# Memory does not grow with the number of frames (only one int64 key per
+# unique track is kept, for deduplication), and a summary for any label mode
+# costs O(#labels) - no DataFrame groupby and no string re-parsing.
+#
+# SKUs whose catalog value for a label mode is missing (NaN) are left out of
+# that mode's summary, as the DataFrame groupby of the original summary
+# dropped NaN keys: they are rolled up into one extra slot after the last
+# label, which is never reported.
+# =============================================================================
+
+def label_index(table, num_classes):
+    """
+    Maps class ids to the distinct labels of one label mode.
+
+    Args:
+        table (np.ndarray): Label per class id (SharedModel.label_tables()[label_mode]).
+        num_classes (int): Number of model classes.
+
+    Returns:
+        tuple: (sorted distinct labels, class id -> label index as int64);
+               classes without a label map to len(labels).
+    """
+    table = np.asarray(table[:num_classes], dtype=object)
+    labelled = pd.notna(table)
+    labels, inverse = np.unique(table[labelled].astype(str), return_inverse=True)
+    class_to_label = np.full(len(table), len(labels), dtype=np.int64)
+    class_to_label[labelled] = inverse
+    return labels, class_to_label
+
+
+class StatsEngine:
+    def __init__(self, class_skus, label_tables):
+        """
+        Creates an engine for one model's classes.
+
+        Args:
+            class_skus (np.ndarray): SKU code per class id (SharedModel.class_skus).
+            label_tables (dict): {label_mode: np.ndarray of labels per class id}
+                                 (SharedModel.label_tables()).
+        """
+        self.class_skus = class_skus
+        num_classes = len(class_skus)
+
+        # Step 1: Per label mode, the sorted distinct labels and the class id -> label index map
+        # Several SKUs can share a label (e.g. one brand), so their stats are summed into one slot
+        # (plus the unreported slot of unlabelled SKUs, see label_index())
+        self.label_modes = {label_mode: label_index(table, num_classes) for label_mode, table in label_tables.items()}
+
+        self.reset()
+
+    def reset(self):
+        """Clears all statistics for a new video or session."""
+        num_classes = len(self.class_skus)
+        self.frame_count = 0
+
+        # Per class aggregates
+        self.class_count = np.zeros(num_classes, dtype=np.int64)      # unique tracked objects
+        self.class_conf_sum = np.zeros(num_classes, dtype=np.float64)  # sum of first-seen confidences
+        self.class_frames = np.zeros(num_classes, dtype=np.int64)     # frames with >= 1 detection
+
+        # Per label aggregates for every label mode, updated together with the class ones
+        self.label_count = {mode: np.zeros(len(labels) + 1, dtype=np.int64) for mode, (labels, _) in self.label_modes.items()}
+        self.label_conf_sum = {mode: np.zeros(len(labels) + 1, dtype=np.float64) for mode, (labels, _) in self.label_modes.items()}
+        self.label_frames = {mode: np.zeros(len(labels) + 1, dtype=np.int64) for mode, (labels, _) in self.label_modes.items()}
+
+        # Sorted (class_id << 32 | tracker_id) keys of every track seen so far
+        self.seen_track_keys = np.empty(0, dtype=np.int64)
+
+        # Class ids in the order their first track appeared (keeps the original row order)
+        self.first_seen = []
+
+    def update(self, class_ids, tracker_ids, confidences):
+        """
+        Adds one frame of tracked detections.
+
+        Args:
+            class_ids (np.ndarray): Class id per detection (int64).
+            tracker_ids (np.ndarray): ByteTrack id per detection (int64).
+            confidences (np.ndarray): Confidence per detection (float).
+
+        Returns:
+            np.ndarray: Boolean mask of detections whose track was seen for the first time.
+        """
+        # Step 1: Count the frame (also when nothing is detected)
+        self.frame_count += 1
+
+        # Step 2: Find tracks seen for the first time
+        keys = (class_ids << 32) | tracker_ids
+        is_new = ~np.isin(keys, self.seen_track_keys)
+
+        # Step 3: Update unique-track counts and confidence sums
+        if is_new.any():
+            self.seen_track_keys = np.union1d(self.seen_track_keys, keys[is_new])
+            new_classes = class_ids[is_new]
+            new_confidences = confidences[is_new]
+
+            # Remember first appearances in detection order
+            for class_id in dict.fromkeys(new_classes.tolist()):
+                if self.class_count[class_id] == 0:
+                    self.first_seen.append(class_id)
+
+            np.add.at(self.class_count, new_classes, 1)
+            np.add.at(self.class_conf_sum, new_classes, new_confidences)
+            for label_mode, (_, class_to_label) in self.label_modes.items():
+                np.add.at(self.label_count[label_mode], class_to_label[new_classes], 1)
+                np.add.at(self.label_conf_sum[label_mode], class_to_label[new_classes], new_confidences)
+
+        # Step 4: Count the frame once for every class/label present in it
+        if len(class_ids):
+            present_classes = np.unique(class_ids)
+            self.class_frames[present_classes] += 1
+            for label_mode, (_, class_to_label) in self.label_modes.items():
+                self.label_frames[label_mode][np.unique(class_to_label[present_classes])] += 1
+
+        return is_new
+
+    def live_summary(self):
+        """
+        Returns the running count of unique tracked objects per SKU.
+
+        Returns:
+            dict: {sku: count}, in order of first appearance.
+        """
+        return {self.class_skus[class_id]: int(self.class_count[class_id]) for class_id in self.first_seen}
+
+    def summary(self, label_mode):
+        """
+        Builds the summary table for a label mode from the running aggregates.
+
+        Args:
+            label_mode (str): "sku_code", "item_name", "brand", "sub_category" or "category".
+
+        Returns:
+            pd.DataFrame: Columns [label_mode, "count", "confidence(%)", "frame_presence(%)"].
+                          Empty DataFrame if no frames have been processed.
+        """
+        # Step 1: Return empty DataFrame if no frames processed
+        if self.frame_count == 0:
+            return pd.DataFrame()
+
+        # Step 2: Select rows - SKUs in order of first appearance, other modes sorted by label
+        if label_mode == "sku_code":
+            index = np.asarray(self.first_seen, dtype=np.int64)
+            names = self.class_skus[index]
+            count = self.class_count[index]
+            conf_sum = self.class_conf_sum[index]
+            frames = self.class_frames[index]
+        else:
+            labels = self.label_modes[label_mode][0]
+            index = np.flatnonzero(self.label_count[label_mode][:len(labels)])
+            names = labels[index]
+            count = self.label_count[label_mode][index]
+            conf_sum = self.label_conf_sum[label_mode][index]
+            frames = self.label_frames[label_mode][index]
+
+        if len(index) == 0:
+            return pd.DataFrame()
+
+        # Step 3: Mean confidence over unique tracks and share of frames with the item
+        mean_confidence = conf_sum / count * 100
+        presence_percentage = frames / self.frame_count * 100
+
+        return pd.DataFrame({
+            label_mode: names,
+            "count": count,
+            "confidence(%)": [f"{int(round(v))}" for v in mean_confidence],
+            "frame_presence(%)": [f"{int(round(v))}" for v in presence_percentage],
+        })
+
+    def state_dict(self):
+        """
+        Returns the raw statistics as plain arrays (e.g. to cache or restore a run).
+
+        Returns:
+            dict: Per-class aggregates, first-seen order, track keys and the
+                  per-label frame presence of every label mode.
+        """
+        return {
+            "class_skus": [str(sku) for sku in self.class_skus],
+            "frame_count": self.frame_count,
+            "class_count": self.class_count.copy(),
+            "class_conf_sum": self.class_conf_sum.copy(),
+            "class_frames": self.class_frames.copy(),
+            "seen_track_keys": self.seen_track_keys.copy(),
+            "first_seen": list(self.first_seen),
+            # Frame presence of a label is not the sum of its SKUs' (they can share frames)
+            "label_frames": {
+                label_mode: dict(zip(labels.tolist(), self.label_frames[label_mode].tolist()))
+                for label_mode, (labels, _) in self.label_modes.items()
+            },
+        }
+
+    def load_state_dict(self, state):
+        """
+        Restores statistics saved with state_dict().
+
+        Label counts and confidence sums are rebuilt from the per-class
+        aggregates with the current label tables.
+
+        Args:
+            state (dict): Output of state_dict() for the same model classes.
+
+        Raises:
+            ValueError: If the state was recorded for different model classes.
+        """
+        if list(state["class_skus"]) != [str(sku) for sku in self.class_skus]:
+            raise ValueError("Statistics were recorded for a model with different classes")
+
+        # Step 1: Per class aggregates as recorded
+        self.frame_count = int(state["frame_count"])
+        self.class_count = np.asarray(state["class_count"], dtype=np.int64).copy()
+        self.class_conf_sum = np.asarray(state["class_conf_sum"], dtype=np.float64).copy()
+        self.class_frames = np.asarray(state["class_frames"], dtype=np.int64).copy()
+        self.seen_track_keys = np.asarray(state["seen_track_keys"], dtype=np.int64).copy()
+        self.first_seen = list(state["first_seen"])
+
+        # Step 2: Per label rollups
+        for label_mode, (labels, class_to_label) in self.label_modes.items():
+            self.label_count[label_mode] = np.bincount(class_to_label, weights=self.class_count, minlength=len(labels) + 1).astype(np.int64)
+            self.label_conf_sum[label_mode] = np.bincount(class_to_label, weights=self.class_conf_sum, minlength=len(labels) + 1)
+            frames = state["label_frames"].get(label_mode, {})
+            self.label_frames[label_mode] = np.array([frames.get(label, 0) for label in labels.tolist()] + [0], dtype=np.int64)
@@ -0,0 +1,151 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import os
+import pickle
+import time
+
+# =============================================================================
+# VIDEO CHECKPOINTS - Resume long videos after a crash, restart or lost session
+# =============================================================================
+# While a video is processed, the per-video state of the InventoryTracker is
+# written to disk every `interval_s` seconds (wall time):
+#
+#   - the number of frames processed (the resume position)
+#   - ByteTrack (tracks, Kalman state, id counters)
+#   - the statistics (unique track keys, confidence sums, frame counts)
+#   - the motion gate reference and the results it reuses, if enabled
+#
+# Processing the same video with the same settings again (same key) loads
+# the checkpoint, skips the frames already processed and continues, so the
+# final counts are identical to an uninterrupted run. The checkpoint is
+# deleted once the video is complete.
+#
+# The state is O(tracks), not O(frames): a checkpoint is a few KB to a few
+# hundred KB and is written atomically (temporary file + rename), so one
+# write every 30 s costs a few milliseconds at most.
+#
+# Checkpoints live in CHECKPOINT_DIR (default: cache/checkpoints). Runs that
+# are abandoned (tab closed, another file uploaded) never complete, so every
+# new run first removes checkpoints older than CHECKPOINT_MAX_AGE_H hours
+# (default 48), then the oldest ones beyond CHECKPOINT_MAX_MB (default 256).
+# Checkpoints written in the last 10 minutes belong to runs that are still
+# going and are never removed.
+# =============================================================================
+
+# Bump when the layout of checkpoints changes
+CHECKPOINT_FORMAT_VERSION = 2
+
+CHECKPOINT_DIR = os.environ.get("CHECKPOINT_DIR", os.path.join(os.path.dirname(__file__), "..", "cache", "checkpoints"))
+CHECKPOINT_MAX_AGE_S = float(os.environ.get("CHECKPOINT_MAX_AGE_H", "48")) * 3600
+CHECKPOINT_MAX_BYTES = int(float(os.environ.get("CHECKPOINT_MAX_MB", "256")) * 2**20)
+
+# Checkpoints written more recently than this belong to running videos
+ACTIVE_CHECKPOINT_S = 600
+
+
+def prune_checkpoints(directory=CHECKPOINT_DIR, max_age_s=CHECKPOINT_MAX_AGE_S, max_bytes=CHECKPOINT_MAX_BYTES,
+                      keep=None):
+    """
+    Removes abandoned checkpoints: first those older than max_age_s, then the oldest beyond max_bytes.
+
+    Args:
+        directory (str): Checkpoint directory.
+        max_age_s (float): Age (since the last write) after which a checkpoint is removed.
+        max_bytes (int): Size bound of the directory.
+        keep (str, optional): Path of a checkpoint that is never removed (the caller's own).
+    """
+    if not os.path.isdir(directory):
+        return
+    keep = os.path.abspath(keep) if keep else None
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.abspath(os.path.join(directory, name))
+        if not name.endswith(".ckpt") or path == keep:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue  # Removed meanwhile (e.g. its run completed)
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if (now - mtime <= max_age_s and total <= max_bytes) or now - mtime < ACTIVE_CHECKPOINT_S:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+class VideoCheckpointer:
+    def __init__(self, key, directory=CHECKPOINT_DIR, interval_s=30.0):
+        """
+        Creates the checkpoint of one video run (and prunes abandoned ones).
+
+        Args:
+            key (str): Identifies the video and every setting that changes the
+                       results (e.g. ResultCache.key_for()).
+            directory (str): Where checkpoints are stored (created on first write).
+            interval_s (float): Min seconds between two checkpoints.
+        """
+        self.path = os.path.join(directory, f"{key}.ckpt")
+        prune_checkpoints(directory, keep=self.path)
+        self.interval_s = interval_s
+        self.last_save = time.monotonic()
+        self.saves = 0
+
+    def load(self):
+        """
+        Returns the saved tracker state, if a checkpoint exists.
+
+        Returns:
+            dict or None: InventoryTracker.state_dict() of the last checkpoint,
+                          or None if there is no (readable) checkpoint.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                checkpoint = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if checkpoint.get("format") != CHECKPOINT_FORMAT_VERSION:
+            return None
+        return checkpoint["state"]
+
+    def due(self):
+        """bool: True once interval_s seconds have passed since the last checkpoint."""
+        return time.monotonic() - self.last_save >= self.interval_s
+
+    def save(self, tracker, results=None):
+        """
+        Writes a checkpoint of the tracker after a fully processed frame.
+
+        Must be called from the thread that tracks the frames, between two
+        frames (the state is serialized before this returns).
+
+        Args:
+            tracker (InventoryTracker): Tracker of the run.
+            results (optional): YOLO results of the last processed frame
+                                (reused by the motion gate for unchanged frames).
+        """
+        with tracker.perf.stage("checkpoint"):
+            payload = pickle.dumps(
+                {"format": CHECKPOINT_FORMAT_VERSION, "created": time.time(), "state": tracker.state_dict(results)},
+                protocol=pickle.HIGHEST_PROTOCOL)
+
+            # Atomic write: a crash during the write leaves the previous checkpoint intact
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        self.last_save = time.monotonic()
+        self.saves += 1
+
+    def discard(self):
+        """Deletes the checkpoint (the video was processed completely)."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,221 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import numpy as np
+import pandas as pd
+from py.StatsEngine import label_index
+
+# =============================================================================
+# WINDOWED STATISTICS - Constant-memory inventory time series
+# =============================================================================
+# StatsEngine only keeps totals since the last reset. To see restocking and
+# depletion over a shift, this engine splits the stream into fixed windows
+# (e.g. one per minute of video) and keeps, per window:
+#
+#   per class (SKU)         : unique tracks seen, confidence sum, frames present
+#   per label of each mode  : frames present (a label's presence is not the
+#                             sum of its SKUs', they can share frames)
+#
+# The windows live in ring buffers of `num_windows` slots: when a new window
+# starts, the oldest slot is cleared and reused, so memory is fixed no
+# matter how long the stream runs. Only the track keys of the current window
+# are kept, for deduplication within it.
+#
+# A track counts once per window in which it is seen (with the confidence of
+# its first sighting in that window), so a count is "distinct items visible
+# during the window", not "items that appeared for the first time".
+# =============================================================================
+
+class WindowedStats:
+    def __init__(self, class_skus, label_tables, window_frames, num_windows=120, fps=None):
+        """
+        Creates a time series for one model's classes.
+
+        Args:
+            class_skus (np.ndarray): SKU code per class id (SharedModel.class_skus).
+            label_tables (dict): {label_mode: np.ndarray of labels per class id}
+                                 (SharedModel.label_tables()).
+            window_frames (int): Frames per window.
+            num_windows (int): Windows kept (older ones are dropped).
+            fps (float, optional): Frame rate of the processed frames, for the
+                                   window start/end times in the exported table.
+        """
+        self.class_skus = class_skus
+        self.window_frames = max(1, int(window_frames))
+        self.num_windows = max(1, int(num_windows))
+        self.fps = fps
+        num_classes = len(class_skus)
+
+        # Per label mode, the sorted distinct labels and the class id -> label index map
+        # (unlabelled SKUs share one extra slot that is never reported, as in StatsEngine)
+        self.label_modes = {label_mode: label_index(table, num_classes) for label_mode, table in label_tables.items()}
+
+        self.reset()
+
+    def reset(self):
+        """Clears all windows for a new video or session."""
+        num_slots, num_classes = self.num_windows, len(self.class_skus)
+        self.frame_count = 0
+        self.window_index = -1      # Number of the current window since the reset (-1 = none yet)
+
+        # Ring buffers: one row (slot) per window, slot = window number % num_windows
+        self.slot_window = np.full(num_slots, -1, dtype=np.int64)       # window number held by each slot
+        self.slot_frames = np.zeros(num_slots, dtype=np.int64)          # frames processed in the window
+        self.class_count = np.zeros((num_slots, num_classes), dtype=np.int64)
+        self.class_conf_sum = np.zeros((num_slots, num_classes), dtype=np.float64)
+        self.class_frames = np.zeros((num_slots, num_classes), dtype=np.int64)
+        self.label_frames = {mode: np.zeros((num_slots, len(labels) + 1), dtype=np.int64)
+                             for mode, (labels, _) in self.label_modes.items()}
+
+        # Sorted (class_id << 32 | tracker_id) keys of the tracks seen in the current window
+        self.window_track_keys = np.empty(0, dtype=np.int64)
+
+    def _start_window(self, window_index):
+        """Clears the slot of the oldest window and makes it the current one."""
+        slot = window_index % self.num_windows
+        self.slot_window[slot] = window_index
+        self.slot_frames[slot] = 0
+        self.class_count[slot] = 0
+        self.class_conf_sum[slot] = 0.0
+        self.class_frames[slot] = 0
+        for label_frames in self.label_frames.values():
+            label_frames[slot] = 0
+        self.window_track_keys = np.empty(0, dtype=np.int64)
+        self.window_index = window_index
+
+    def update(self, class_ids, tracker_ids, confidences):
+        """
+        Adds one frame of tracked detections (same arguments as StatsEngine.update).
+
+        Args:
+            class_ids (np.ndarray): Class id per detection (int64).
+            tracker_ids (np.ndarray): ByteTrack id per detection (int64).
+            confidences (np.ndarray): Confidence per detection (float).
+        """
+        # Step 1: Move to a new window every window_frames frames
+        window_index = self.frame_count // self.window_frames
+        if window_index != self.window_index:
+            self._start_window(window_index)
+        slot = window_index % self.num_windows
+        self.frame_count += 1
+        self.slot_frames[slot] += 1
+
+        # Step 2: Tracks seen for the first time in this window
+        keys = (class_ids << 32) | tracker_ids
+        is_new = ~np.isin(keys, self.window_track_keys)
+        if is_new.any():
+            self.window_track_keys = np.union1d(self.window_track_keys, keys[is_new])
+            np.add.at(self.class_count[slot], class_ids[is_new], 1)
+            np.add.at(self.class_conf_sum[slot], class_ids[is_new], confidences[is_new])
+
+        # Step 3: Count the frame once for every class/label present in it
+        if len(class_ids):
+            present_classes = np.unique(class_ids)
+            self.class_frames[slot, present_classes] += 1
+            for label_mode, (_, class_to_label) in self.label_modes.items():
+                self.label_frames[label_mode][slot, np.unique(class_to_label[present_classes])] += 1
+
+    def to_frame(self, label_mode):
+        """
+        Builds the time series table for a label mode (safe to call during processing).
+
+        Args:
+            label_mode (str): "sku_code", "item_name", "brand", "sub_category" or "category".
+
+        Returns:
+            pd.DataFrame: One row per window and label present in it, oldest window first:
+                          ["window", "start_s", "end_s", label_mode, "count",
+                          "confidence(%)", "frame_presence(%)"]. Times are None
+                          without a frame rate. Empty if no frames were processed.
+        """
+        labels, class_to_label = self.label_modes[label_mode]
+        columns = {"window": [], "start_s": [], "end_s": [], label_mode: [],
+                   "count": [], "confidence(%)": [], "frame_presence(%)": []}
+
+        # Step 1: Filled slots in window order (the ring wraps around)
+        slots = [slot for slot in np.argsort(self.slot_window) if self.slot_window[slot] >= 0]
+        for slot in slots:
+            window_index = int(self.slot_window[slot])
+            frames = int(self.slot_frames[slot])
+            if frames == 0:
+                continue
+
+            # Step 2: Roll the per-class aggregates up to labels (one bincount each)
+            count = np.bincount(class_to_label, weights=self.class_count[slot], minlength=len(labels) + 1)
+            conf_sum = np.bincount(class_to_label, weights=self.class_conf_sum[slot], minlength=len(labels) + 1)
+            label_frames = self.label_frames[label_mode][slot, :len(labels)]
+
+            # Step 3: One row per label present in the window
+            start_frame = window_index * self.window_frames
+            for index in np.flatnonzero(label_frames).tolist():
+                columns["window"].append(window_index)
+                columns["start_s"].append(round(start_frame / self.fps, 3) if self.fps else None)
+                columns["end_s"].append(round((start_frame + frames) / self.fps, 3) if self.fps else None)
+                columns[label_mode].append(labels[index])
+                columns["count"].append(int(count[index]))
+                columns["confidence(%)"].append(round(conf_sum[index] / count[index] * 100, 1) if count[index] else None)
+                columns["frame_presence(%)"].append(round(label_frames[index] / frames * 100, 1))
+
+        return pd.DataFrame(columns) if columns["window"] else pd.DataFrame()
+
+    def to_csv(self, path_or_buffer, label_mode):
+        """
+        Writes the time series of a label mode as CSV.
+
+        Args:
+            path_or_buffer: File path or buffer (None returns the CSV as a string).
+            label_mode (str): Label mode of the rows.
+
+        Returns:
+            str or None: The CSV text if path_or_buffer is None.
+        """
+        return self.to_frame(label_mode).to_csv(path_or_buffer, index=False)
+
+    def state_dict(self):
+        """
+        Returns all windows as plain arrays (e.g. to checkpoint a run).
+
+        Returns:
+            dict: Ring buffers, the current window and its track keys.
+        """
+        return {
+            "class_skus": [str(sku) for sku in self.class_skus],
+            "window_frames": self.window_frames,
+            "num_windows": self.num_windows,
+            "fps": self.fps,
+            "frame_count": self.frame_count,
+            "window_index": self.window_index,
+            "slot_window": self.slot_window.copy(),
+            "slot_frames": self.slot_frames.copy(),
+            "class_count": self.class_count.copy(),
+            "class_conf_sum": self.class_conf_sum.copy(),
+            "class_frames": self.class_frames.copy(),
+            "label_frames": {mode: frames.copy() for mode, frames in self.label_frames.items()},
+            "window_track_keys": self.window_track_keys.copy(),
+        }
+
+    def load_state_dict(self, state):
+        """
+        Restores windows saved with state_dict().
+
+        Args:
+            state (dict): Output of state_dict() with the same classes and window layout.
+
+        Raises:
+            ValueError: If the state was recorded for other classes or another window layout.
+        """
+        if list(state["class_skus"]) != [str(sku) for sku in self.class_skus]:
+            raise ValueError("Time series was recorded for a model with different classes")
+        if (state["window_frames"], state["num_windows"]) != (self.window_frames, self.num_windows):
+            raise ValueError("Time series was recorded with a different window layout")
+
+        self.frame_count = int(state["frame_count"])
+        self.window_index = int(state["window_index"])
+        self.slot_window = state["slot_window"].copy()
+        self.slot_frames = state["slot_frames"].copy()
+        self.class_count = state["class_count"].copy()
+        self.class_conf_sum = state["class_conf_sum"].copy()
+        self.class_frames = state["class_frames"].copy()
+        for mode in self.label_frames:
+            self.label_frames[mode] = state["label_frames"][mode].copy()
+        self.window_track_keys = state["window_track_keys"].copy()
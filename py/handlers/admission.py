@@ -0,0 +1,29 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import contextlib   # wait_for_slot() context manager
+import streamlit as st  # Streamlit for the queue position message
+
+# =============================================================================
+# ADMISSION - Queue uploads behind the resource governor's job slots
+# =============================================================================
+@contextlib.contextmanager
+def wait_for_slot(tracker):
+    """
+    Holds one of the governor's inference job slots for the with-block.
+
+    While all slots are busy, the user sees their position in the queue;
+    the message is removed as soon as processing starts.
+
+    Args:
+        tracker: InventoryTracker instance (its governor is process-wide).
+    """
+    placeholder = st.empty()
+
+    def show_position(position):
+        ahead = "you are next" if position == 1 else f"{position - 1} uploads ahead of you"
+        placeholder.info(f"⏳ The server is busy with other uploads: waiting for a free slot ({ahead}).")
+
+    with tracker.governor.admit(on_wait=show_position):
+        placeholder.empty()
+        yield
@@ -0,0 +1,162 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import cv2           # JPEG encoding of the cached preview
+import numpy as np   # Packing masks of the last run
+import supervision as sv  # Detections of the last run
+import streamlit as st  # Streamlit for UI components
+
+# =============================================================================
+# CACHED RESULT HANDLER
+# =============================================================================
+def encode_preview(annotated_frame, quality=90):
+    """
+    Encodes an annotated frame for the result cache.
+
+    Args:
+        annotated_frame (np.ndarray): Annotated image (BGR), or None.
+        quality (int): JPEG quality (0-100).
+
+    Returns:
+        bytes or None: JPEG bytes.
+    """
+    if annotated_frame is None:
+        return None
+    ok, encoded = cv2.imencode(".jpg", annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes() if ok else None
+
+
+def pack_last_run(key, frame, detections, quality=90):
+    """
+    Builds a compact session entry of an image run, from which handle_last_run() can redraw it.
+
+    The full-resolution frame and full-frame masks of a segmentation model
+    would pin tens of MB per session. Only the encoded frame, the boxes and
+    ids, and every mask cropped to its own extent and packed to bits are kept.
+
+    Args:
+        key (str): Cache key of the run.
+        frame (np.ndarray): The processed image (BGR).
+        detections (sv.Detections or None): Tracked detections of the image.
+        quality (int): JPEG quality of the stored frame (0-100).
+
+    Returns:
+        dict: last_run entry for st.session_state.
+    """
+    last_run = {"key": key, "frame": encode_preview(frame, quality), "detections": None}
+    if detections is None:
+        return last_run
+
+    # Step 1: Boxes and ids (a few bytes per detection)
+    packed = {
+        "xyxy": detections.xyxy,
+        "confidence": detections.confidence,
+        "class_id": detections.class_id,
+        "tracker_id": detections.tracker_id,
+        "mask_shape": None,
+        "masks": None,
+    }
+
+    # Step 2: Masks cropped to the rows/columns they cover, 1 bit per pixel
+    if detections.mask is not None:
+        packed["mask_shape"] = detections.mask.shape[1:]
+        packed["masks"] = []
+        for mask in detections.mask:
+            rows, columns = np.flatnonzero(mask.any(axis=1)), np.flatnonzero(mask.any(axis=0))
+            if len(rows) == 0:
+                packed["masks"].append(None)
+                continue
+            y1, y2, x1, x2 = rows[0], rows[-1] + 1, columns[0], columns[-1] + 1
+            packed["masks"].append(((y1, y2, x1, x2), np.packbits(mask[y1:y2, x1:x2])))
+    last_run["detections"] = packed
+    return last_run
+
+
+def _unpack_last_run(last_run):
+    """Returns (frame, detections) of an entry from pack_last_run(); frame is None for videos."""
+    if last_run.get("frame") is None:
+        return None, None
+    frame = cv2.imdecode(np.frombuffer(last_run["frame"], dtype=np.uint8), cv2.IMREAD_COLOR)
+    packed = last_run.get("detections")
+    if packed is None:
+        return frame, None
+
+    mask = None
+    if packed["masks"] is not None:
+        mask = np.zeros((len(packed["masks"]), *packed["mask_shape"]), dtype=bool)
+        for row, crop in enumerate(packed["masks"]):
+            if crop is None:
+                continue
+            (y1, y2, x1, x2), bits = crop
+            mask[row, y1:y2, x1:x2] = np.unpackbits(bits, count=(y2 - y1) * (x2 - x1)).reshape(y2 - y1, x2 - x1)
+    detections = sv.Detections(xyxy=packed["xyxy"], confidence=packed["confidence"], class_id=packed["class_id"],
+                               tracker_id=packed["tracker_id"], mask=mask)
+    return frame, detections
+
+
+def handle_cached_result(entry, tracker, title="📦 Item summary"):
+    """
+    Shows a result from the result cache instead of processing the upload again.
+
+    The cached per-SKU statistics are loaded into the tracker, so the table
+    (and any later label mode switch) is built exactly as after a real run.
+
+    Args:
+        entry (dict): Entry returned by ResultCache.get().
+        tracker: InventoryTracker instance with the same model as the cached run.
+        title (str): Header shown above the statistics table.
+    """
+    # Step 1: Restore the statistics (and time series, sized for the cached video's frame rate) of the cached run
+    time_series = entry.get("time_series")
+    if time_series is not None and tracker.window_s:
+        tracker.analyzed_fps = time_series["fps"]
+        tracker.reset_output_stats()
+        tracker.time_series.load_state_dict(time_series)
+    tracker.stats.load_state_dict(entry["stats"])
+
+    # Step 2: Show the cached preview (images) next to the table, or the table alone (videos);
+    # an image without a preview in this label mode is redrawn from its stored detections
+    note = "⚡ Same file and settings as an earlier run: results served from the cache."
+    preview = entry.get("previews", {}).get(tracker.label_mode)
+    if preview is None and entry.get("last_run") is not None:
+        frame, detections = _unpack_last_run(entry["last_run"])
+        _show_results(tracker, tracker.redraw(frame, detections), title, note, channels="BGR")
+        return
+    _show_results(tracker, preview, title, note)
+
+
+def handle_last_run(last_run, tracker, title="📦 Item summary"):
+    """
+    Shows the results of the session's last run again, e.g. after a label mode switch.
+
+    The tracker still holds the per-SKU statistics of that run, which are kept
+    for every label mode, so regrouping the table needs no reprocessing. An
+    image is redrawn from its tracked detections with the new labels.
+
+    Args:
+        last_run (dict): {"key": cache key} for videos, or an image entry from pack_last_run().
+        tracker: InventoryTracker instance that produced the run.
+        title (str): Header shown above the statistics table (videos).
+    """
+    frame, detections = _unpack_last_run(last_run)
+    annotated_frame = tracker.redraw(frame, detections) if frame is not None else None
+    _show_results(tracker, annotated_frame, title, "⚡ Regrouped from the last run (no reprocessing).", channels="BGR")
+
+
+def _show_results(tracker, image, title, note, channels="RGB"):
+    """Shows an optional image next to the statistics table, or the table under a header."""
+    if image is not None:
+        col_img, col_table = st.columns([2, 2])
+        with col_img:
+            st.image(image, caption="", channels=channels, use_container_width=True)
+    else:
+        st.subheader(title)
+        col_table = st.container()
+
+    with col_table:
+        output_stats = tracker.get_output_stats()
+        if not output_stats.empty:
+            st.dataframe(output_stats, use_container_width=True)
+        else:
+            st.info("🔍 No items detected.")
+        st.caption(note)
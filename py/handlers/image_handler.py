@@ -5,6 +5,7 @@ import cv2           # OpenCV for image processing and color conversion
 import numpy as np   # NumPy for array operations
 from PIL import Image  # Python Imaging Library for reading uploaded images
 import streamlit as st  # Streamlit for UI components
+from py.handlers.admission import wait_for_slot  # Inference job slots (queue position shown)
 
 # =============================================================================
 # IMAGE HANDLER FUNCTION
@@ -23,6 +24,10 @@ def handle_image(uploaded_file, tracker):
         uploaded_file: Streamlit UploadedFile object (image file from user)
         tracker: InventoryTracker instance (can be detection or segmentation model)
     
+    Returns:
+        tuple: (frame, annotated_frame), the input and annotated images (BGR),
+               e.g. to cache or redraw them.
+    
     Note:
         - For detection models: Shows boxes + labels + traces
         - For segmentation models: Shows masks + boxes + labels + traces
@@ -56,10 +61,12 @@ def handle_image(uploaded_file, tracker):
         # Returns:
         #   - annotated_frame: Image with visual overlays (masks/boxes/labels/traces)
         #   - live_summary: Dict of detections (not used here, but available)
-        annotated_frame, _ = tracker.track_picture_stream(
-            frame, 
-            tracker.confidence_threshold
-        )
+        # Waits for a free inference slot first when other uploads are running
+        with wait_for_slot(tracker):
+            annotated_frame, _ = tracker.track_picture_stream(
+                frame, 
+                tracker.confidence_threshold
+            )
 
         # =====================================================================
         # STEP 4: DISPLAY RESULTS IN TWO COLUMNS
@@ -101,6 +108,8 @@ def handle_image(uploaded_file, tracker):
                 # This could mean low confidence threshold or no items in image
                 st.info("🔍 No items detected.")
 
+        return frame, annotated_frame
+
     except Exception as e:
         # =====================================================================
         # ERROR HANDLING
@@ -0,0 +1,214 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import queue        # Bounded queues between pipeline stages
+import threading    # Worker threads for each stage
+
+# =============================================================================
+# PIPELINED FRAME PROCESSING
+# =============================================================================
+# Video processing is split into stages that run concurrently:
+#
+#   decode ──► infer ──► track/annotate ──► render (caller's thread)
+#
+# Each arrow is a bounded queue, so at most `queue_depth` frames wait between
+# two stages and memory stays capped no matter how long the video is.
+# Every stage is a single thread reading a FIFO queue, so frames leave the
+# pipeline in the same order they were decoded, and ByteTrack still sees them
+# sequentially.
+# =============================================================================
+
+# Marker that tells the next stage there are no more frames
+_END = object()
+
+
+class PipelineStopped(Exception):
+    """Raised inside a worker when the pipeline is shutting down early."""
+
+
+class FramePipeline:
+    def __init__(self, frames, tracker, confidence_threshold, queue_depth=8, batch_size=None, should_annotate=None,
+                 resume=None, checkpointer=None):
+        """
+        Runs decode, inference and annotation on worker threads.
+
+        Use as a context manager and iterate over it from the thread that
+        renders the results (Streamlit calls must stay on the script thread):
+
+            with FramePipeline(frame_generator(), tracker, conf) as pipeline:
+                for annotated_frame, live_summary in pipeline:
+                    ...
+
+        Leaving the `with` block (normally, on error or on an early `break`)
+        stops all workers and waits for them to exit.
+
+        Args:
+            frames (iterable): Iterator that yields frames (np.ndarray).
+                               It is consumed on the decode thread.
+            tracker: InventoryTracker instance.
+            confidence_threshold (float): YOLO confidence threshold (0.0-1.0).
+            queue_depth (int): Max frames buffered between two stages.
+            batch_size (int, optional): Max frames per inference call.
+                                        Defaults to tracker.batch_size.
+            should_annotate (callable, optional): Called once per frame on the
+                                        annotation thread; frames for which it
+                                        returns False are tracked and counted
+                                        but not drawn (yielded frame is None).
+                                        Default: annotate every frame.
+            resume (dict, optional): Checkpointed tracker state to continue from;
+                                        `frames` must start after its resume["frames"] frames.
+            checkpointer (VideoCheckpointer, optional): Saves the tracker state
+                                        periodically (on the annotation thread,
+                                        between two frames).
+        """
+        self.frames = frames
+        self.tracker = tracker
+        self.confidence_threshold = confidence_threshold
+        self.batch_size = max(1, int(batch_size or tracker.batch_size))
+        self.should_annotate = should_annotate
+        self.resume = resume
+        self.checkpointer = checkpointer
+
+        # Step 1: Bounded queues between stages (cap memory at queue_depth frames each)
+        self.decoded = queue.Queue(maxsize=queue_depth)
+        self.inferred = queue.Queue(maxsize=queue_depth)
+        self.output = queue.Queue(maxsize=queue_depth)
+
+        # Step 2: Shutdown signal and first error raised by any worker
+        self.stop_event = threading.Event()
+        self.error = None
+
+        # Step 3: One thread per stage
+        self.threads = [
+            threading.Thread(target=self._run_stage, args=(self._decode,), name="pipeline-decode", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._infer,), name="pipeline-infer", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._annotate,), name="pipeline-annotate", daemon=True),
+        ]
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+    def __enter__(self):
+        # Reset statistics before processing video (as track_video_stream does),
+        # or restore a checkpoint before any stage touches the tracker
+        self.tracker.reset_output_stats()
+        if self.resume is not None:
+            self.tracker.load_state_dict(self.resume)
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Stops all stages and waits for the worker threads to exit."""
+        self.stop_event.set()
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join()
+
+    def __iter__(self):
+        """
+        Yields (annotated_frame, live_summary) in frame order
+        (annotated_frame is None for frames that were not annotated).
+
+        Raises:
+            Exception: Re-raises the first error raised by any stage.
+        """
+        while True:
+            item = self._get(self.output)
+            if item is _END:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    # -------------------------------------------------------------------------
+    # Queue helpers (never block forever, so shutdown is always prompt)
+    # -------------------------------------------------------------------------
+    def _put(self, q, item):
+        while True:
+            if self.stop_event.is_set():
+                raise PipelineStopped()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                # Workers that died or were stopped never send _END downstream
+                if self.stop_event.is_set():
+                    return _END
+
+    def _run_stage(self, stage):
+        """Runs a stage, records its error and always signals the next stage."""
+        try:
+            stage()
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            # Keep the first error; stop every other stage
+            if self.error is None:
+                self.error = e
+            self.stop_event.set()
+
+    # -------------------------------------------------------------------------
+    # Stages
+    # -------------------------------------------------------------------------
+    def _decode(self):
+        """Stage 1: pull frames from the decoder."""
+        frames = iter(self.frames)
+        perf = self.tracker.perf
+        while True:
+            with perf.stage("decode"):
+                frame = next(frames, _END)
+            if frame is _END:
+                break
+            self._put(self.decoded, frame)
+        self._put(self.decoded, _END)
+
+    def _infer(self):
+        """Stage 2: run YOLO on whatever frames are ready, up to batch_size at a time."""
+        finished = False
+        while not finished:
+            # Block for the first frame, then take what is already decoded
+            item = self._get(self.decoded)
+            if item is _END:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.decoded.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _END:
+                    finished = True
+                    break
+                batch.append(item)
+
+            # Frames the motion gate finds unchanged reuse the last results (if enabled)
+            results = self.tracker.infer_gated(batch, self.confidence_threshold)
+            for frame, frame_results in zip(batch, results):
+                self._put(self.inferred, (frame, frame_results))
+        self._put(self.inferred, _END)
+
+    def _annotate(self):
+        """Stage 3: ByteTrack update, statistics and annotation (strictly in order)."""
+        while True:
+            item = self._get(self.inferred)
+            if item is _END:
+                break
+            frame, results = item
+            annotate = self.should_annotate() if self.should_annotate is not None else True
+            output = self.tracker.process_result(frame, results, annotate=annotate)
+            if self.checkpointer is not None and self.checkpointer.due():
+                self.checkpointer.save(self.tracker, results)
+            self._put(self.output, output)
+        self._put(self.output, _END)
@@ -0,0 +1,138 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import cv2          # OpenCV for downscaling preview frames
+import threading    # Background render thread
+import time         # Display rate limiting
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# =============================================================================
+# RATE-LIMITED PREVIEW RENDERER
+# =============================================================================
+# Pushing every processed frame to the browser costs an image encode and a
+# websocket message per frame, which throttles processing to the speed of the
+# connection. PreviewRenderer decouples the two:
+#
+#   - at most `fps` frames per second are accepted for display; callers ask
+#     claim_frame() first and only annotate the frames that will be shown
+#   - accepted frames are downscaled to the display width before encoding
+#   - a single-slot mailbox keeps only the newest frame (stale ones are dropped)
+#   - a background thread (attached to the Streamlit script context) does the
+#     actual st.image / progress calls, so processing never waits on the UI
+# =============================================================================
+
+class PreviewRenderer:
+    def __init__(self, video_placeholder, progress_bar=None, fps=5.0, width=320):
+        """
+        Args:
+            video_placeholder: st.empty() placeholder that shows the preview frame.
+            progress_bar: st.progress() element (optional), updated at the same rate.
+            fps (float): Maximum preview frames per second sent to the browser.
+            width (int): Display width in pixels; frames are downscaled to it.
+        """
+        self.video_placeholder = video_placeholder
+        self.progress_bar = progress_bar
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.width = width
+
+        # Single-slot mailboxes (newest value wins) and their lock
+        self._lock = threading.Lock()
+        self._frame = None
+        self._progress = None
+        self._last_claim = 0.0
+
+        # Background render thread, allowed to call Streamlit for this session
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="preview-render", daemon=True)
+        add_script_run_ctx(self._thread, get_script_run_ctx())
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Renders whatever is still pending and stops the render thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    # -------------------------------------------------------------------------
+    # Producer side (called from the processing threads)
+    # -------------------------------------------------------------------------
+    def claim_frame(self):
+        """
+        Returns True if the next frame should be annotated and shown.
+
+        At most one frame per display interval is claimed, so annotation is
+        skipped for the frames that would never reach the browser.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_claim < self.interval:
+                return False
+            self._last_claim = now
+            return True
+
+    def submit(self, frame):
+        """
+        Queues a frame for display, replacing any frame not yet shown.
+
+        Args:
+            frame (np.ndarray): Annotated frame (BGR format).
+        """
+        # Downscale before encoding: the browser only shows `width` pixels
+        height, width = frame.shape[:2]
+        if width > self.width:
+            frame = cv2.resize(frame, (self.width, int(height * self.width / width)), interpolation=cv2.INTER_AREA)
+        with self._lock:
+            self._frame = frame
+        self._wake.set()
+
+    def set_progress(self, progress):
+        """
+        Queues a progress value (0.0-1.0); only the latest one is rendered.
+        """
+        with self._lock:
+            self._progress = progress
+        self._wake.set()
+
+    # -------------------------------------------------------------------------
+    # Render thread
+    # -------------------------------------------------------------------------
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            stopping = self._stop.is_set()
+
+            # Take the newest frame/progress and leave the slots empty
+            with self._lock:
+                frame, self._frame = self._frame, None
+                progress, self._progress = self._progress, None
+
+            started = time.monotonic()
+            try:
+                if progress is not None and self.progress_bar is not None:
+                    self.progress_bar.progress(progress)
+                if frame is not None:
+                    self.video_placeholder.image(frame, channels="BGR", width=self.width)
+            except Exception:
+                # The session went away (e.g. rerun); nothing left to render to
+                return
+
+            if stopping:
+                return
+
+            # Cap the display rate (wakes early only to stop)
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                self._stop.wait(remaining)
@@ -0,0 +1,210 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import cv2          # Video encoding and resizing
+import os           # Output file cleanup
+import queue        # Bounded queue between the pipeline and the encoder
+import tempfile     # Output file location
+import threading    # Background encoder thread
+import time         # Age of old exports
+
+# =============================================================================
+# ANNOTATED VIDEO EXPORT
+# =============================================================================
+# Writes the annotated stream to a video file while the video is processed:
+#
+#   - the output frame rate can be lower than the source: only every
+#     `stride`-th frame is exported, and callers ask wants(index) so that
+#     only those frames are annotated for the export
+#   - frames go through a bounded queue to a background thread that resizes
+#     them to the output resolution and encodes them, so encoding overlaps
+#     with inference; memory is capped at `queue_depth` frames
+#   - the file is written incrementally to a file in EXPORT_DIR (default:
+#     cache/exports), which is then offered for download; no frames are kept
+#     in memory
+#
+# If the encoder falls behind, submit() waits for queue space rather than
+# dropping frames, so the export is always complete.
+#
+# Exports of sessions that closed or timed out are never downloaded again.
+# Each new export first removes finished exports older than
+# EXPORT_MAX_AGE_H hours (default 6), then the oldest ones beyond
+# EXPORT_MAX_MB (default 2048), so the directory cannot fill the disk.
+# Exports still being written are never removed.
+# =============================================================================
+
+# Output resolutions offered in the UI: label -> output height (None = source)
+EXPORT_RESOLUTIONS = {"Source": None, "1080p": 1080, "720p": 720, "480p": 480}
+
+# Codecs tried in order: H.264 (plays in browsers) if OpenCV was built with it, else MPEG-4 Part 2
+FOURCCS = ("avc1", "mp4v")
+
+# Marker that tells the encoder there are no more frames
+_END = object()
+
+# Managed export directory and its bounds
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "cache", "exports"))
+EXPORT_MAX_AGE_S = float(os.environ.get("EXPORT_MAX_AGE_H", "6")) * 3600
+EXPORT_MAX_BYTES = int(float(os.environ.get("EXPORT_MAX_MB", "2048")) * 2**20)
+
+# Exports being written in this process (never removed by cleanup_exports())
+_active_paths = set()
+_active_lock = threading.Lock()
+
+
+def cleanup_exports(directory=EXPORT_DIR, max_age_s=EXPORT_MAX_AGE_S, max_bytes=EXPORT_MAX_BYTES):
+    """
+    Removes old exports: first those older than max_age_s, then the oldest beyond max_bytes.
+
+    Args:
+        directory (str): Export directory.
+        max_age_s (float): Age (since the last write) after which an export is removed.
+        max_bytes (int): Size bound of the directory.
+    """
+    if not os.path.isdir(directory):
+        return
+    with _active_lock:
+        active = set(_active_paths)
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.abspath(os.path.join(directory, name))
+        if not name.endswith(".mp4") or path in active:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue  # Removed meanwhile (e.g. by its session)
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if now - mtime <= max_age_s and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+class VideoExportWriter:
+    def __init__(self, source_fps, source_size, fps=None, height=None, queue_depth=16, path=None):
+        """
+        Prepares an export of an annotated video.
+
+        Args:
+            source_fps (float): Frame rate of the processed video.
+            source_size (tuple): (width, height) of the processed video.
+            fps (float, optional): Output frame rate (<= source_fps). Defaults to the source rate.
+            height (int, optional): Output height; width follows the aspect ratio.
+                                    Defaults to the source resolution (never upscaled).
+            queue_depth (int): Max frames waiting for the encoder.
+            path (str, optional): Output file. Defaults to a new .mp4 file in EXPORT_DIR
+                                  (old exports are cleaned up first).
+        """
+        # Step 1: Output frame rate -> export every `stride`-th source frame
+        fps = min(fps or source_fps, source_fps)
+        self.stride = max(1, int(round(source_fps / fps)))
+        self.fps = source_fps / self.stride
+
+        # Step 2: Output size (even dimensions, as most encoders require)
+        width, source_height = source_size
+        height = min(height or source_height, source_height)
+        self.size = (int(width * height / source_height) // 2 * 2, int(height) // 2 * 2)
+
+        # Step 3: Output file (kept after close() so it can be downloaded,
+        # until cleanup_exports() ages it out)
+        if path is None:
+            cleanup_exports()
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            handle, path = tempfile.mkstemp(suffix=".mp4", prefix="export_", dir=EXPORT_DIR)
+            os.close(handle)
+        self.path = os.path.abspath(path)
+        with _active_lock:
+            _active_paths.add(self.path)
+
+        # Step 4: Bounded queue and encoder thread
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._writer = None
+        self.error = None
+        self.frames_written = 0
+        self._thread = threading.Thread(target=self._run, name="video-export", daemon=True)
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+    def __enter__(self):
+        self._writer = self._open_writer()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Encodes the frames still queued, then finalizes the file."""
+        if self._thread.is_alive():
+            self._queue.put(_END)
+            self._thread.join()
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        with _active_lock:
+            _active_paths.discard(self.path)
+
+    def discard(self):
+        """Closes the writer and deletes the output file."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _open_writer(self):
+        for fourcc in FOURCCS:
+            writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*fourcc), self.fps, self.size)
+            if writer.isOpened():
+                return writer
+            writer.release()
+        raise RuntimeError(f"No video encoder available for {self.path}")
+
+    # -------------------------------------------------------------------------
+    # Producer side (called from the processing threads)
+    # -------------------------------------------------------------------------
+    def wants(self, index):
+        """
+        Returns True if the frame with this index (0-based, in decode order) is exported.
+        """
+        return index % self.stride == 0
+
+    def submit(self, frame):
+        """
+        Queues an annotated frame for encoding (waits if the encoder is behind).
+
+        Args:
+            frame (np.ndarray): Annotated frame (BGR format), at source resolution.
+
+        Raises:
+            Exception: Re-raises an encoder error.
+        """
+        if self.error is not None:
+            raise self.error
+        self._queue.put(frame)
+
+    # -------------------------------------------------------------------------
+    # Encoder thread
+    # -------------------------------------------------------------------------
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is _END:
+                return
+            if self.error is not None:
+                continue  # Keep draining so submit() never blocks forever
+            try:
+                if (frame.shape[1], frame.shape[0]) != self.size:
+                    frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+                self._writer.write(frame)
+                self.frames_written += 1
+            except Exception as e:
+                self.error = e
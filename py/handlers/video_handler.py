@@ -1,29 +1,51 @@
 # =============================================================================
 # IMPORTS
 # =============================================================================
+import contextlib   # Optional export writer in the processing with-block
+import itertools    # Frame counter of the annotation predicate
 import cv2          # OpenCV for video capture and frame processing
-import os           # Operating system operations (file deletion)
-import tempfile     # Create temporary files for uploaded videos
 import streamlit as st  # Streamlit for UI components and progress tracking
+from py.handlers.admission import wait_for_slot  # Inference job slots (queue position shown)
+from py.handlers.pipeline import FramePipeline  # Threaded decode → infer → annotate stages
+from py.handlers.preview import PreviewRenderer  # Rate-limited live preview
+from py.handlers.video_export import VideoExportWriter  # Background annotated-video encoder
+from py.handlers.video_source import UploadedVideo  # Streaming ingest of the upload
+from py.VideoCheckpoint import VideoCheckpointer  # Periodic, resumable progress
 
 # =============================================================================
 # VIDEO HANDLER FUNCTION
 # =============================================================================
-def handle_video(uploaded_file, tracker):
+def handle_video(uploaded_file, tracker, export=None, checkpoint_key=None):
     """
     Handles video upload and real-time processing in the Streamlit UI.
     
     This function:
-    1. Saves uploaded video to a temporary file
-    2. Opens video with OpenCV VideoCapture
-    3. Processes frames one-by-one using a generator
+    1. Opens the uploaded video with OpenCV VideoCapture, decoding straight
+       from the upload buffer where supported (else via a chunked temp file)
+    2. Reads the video properties
+    3. Processes frames in a pipeline (decode, inference and annotation
+       run on separate worker threads joined by bounded queues)
     4. Displays real-time progress with annotated frames
     5. Updates statistics periodically during processing
-    6. Cleans up temporary file after completion
+    6. Optionally encodes the annotated stream to a video file in the background
+    7. Cleans up the capture and any temporary file (also on errors)
+    
+    With a checkpoint key, the tracker state is saved periodically; if the
+    run is interrupted (error, restart, lost session), processing the same
+    video with the same settings again resumes from the last checkpoint.
     
     Args:
         uploaded_file: Streamlit UploadedFile object (video file from user)
         tracker: InventoryTracker instance (can be detection or segmentation model)
+        export (dict, optional): Export the annotated video, e.g.
+                                 {"fps": 10, "height": 720} (None values = source).
+        checkpoint_key (str, optional): Identifies the video and settings
+                                 (e.g. the result cache key); enables checkpoints
+                                 (ignored with an export).
+    
+    Returns:
+        dict: {"export_path": path of the exported video or None} once the
+              whole video has been processed.
     
     Note:
         - Works with both detection and segmentation models
@@ -34,26 +56,23 @@ def handle_video(uploaded_file, tracker):
     # Display section header
     st.subheader("📹 Detecting items from video")
     
+    # Video source released in the finally block, whatever happens during processing
+    video = UploadedVideo(uploaded_file)
+    export_writer = None
+    # Checkpoints (not with an export: the encoded frames are not part of them)
+    checkpointer = VideoCheckpointer(checkpoint_key) if checkpoint_key and export is None else None
+    resumed_frames = 0
+    
     try:
         # =====================================================================
-        # STEP 1: SAVE UPLOADED VIDEO TO TEMPORARY FILE
-        # =====================================================================
-        # OpenCV VideoCapture requires a file path, not a file-like object
-        # Create a temporary file that won't be deleted immediately (delete=False)
-        tfile = tempfile.NamedTemporaryFile(delete=False)
-        
-        # Write the uploaded video bytes to the temporary file
-        tfile.write(uploaded_file.read())
-        
-        # Close the file to ensure all data is written
-        # File remains on disk due to delete=False
-        tfile.close()
-        
+        # STEP 1: OPEN UPLOADED VIDEO WITH OPENCV
         # =====================================================================
-        # STEP 2: OPEN VIDEO WITH OPENCV
-        # =====================================================================
-        # Create VideoCapture object to read frames from the saved file
-        cap = cv2.VideoCapture(tfile.name)
+        # The upload is never copied into a second in-memory bytes object:
+        # frames are decoded from the upload buffer directly when the OpenCV
+        # backend supports stream readers, otherwise the buffer is copied to
+        # a temporary file in fixed-size chunks. Peak memory does not depend
+        # on the video size.
+        cap = video.open()
 
         # Verify the video file opened successfully
         if not cap.isOpened():
@@ -61,7 +80,7 @@ def handle_video(uploaded_file, tracker):
             st.stop()  # Stop execution if video can't be opened
 
         # =====================================================================
-        # STEP 3: GET VIDEO PROPERTIES
+        # STEP 2: GET VIDEO PROPERTIES
         # =====================================================================
         # Get total number of frames in the video for progress calculation
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -71,12 +90,28 @@ def handle_video(uploaded_file, tracker):
         if fps == 0:
             fps = 24  # Fallback FPS if video metadata is missing
 
+        # Frame size, for the optional export
+        frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        # Temporal sampling: analyze one frame out of every `stride` (ByteTrack is
+        # set up for the effective rate). Progress, the refresh interval and the
+        # frame_presence(%) stats all count analyzed frames only
+        stride = tracker.configure_sampling(fps)
+        fps = fps / stride
+        total_frames = max(1, -(-total_frames // stride))
+
+        # Continue an interrupted run of the same video and settings, if any
+        resume = checkpointer.load() if checkpointer is not None else None
+        resumed_frames = resume["frames"] if resume is not None else 0
+        if resumed_frames:
+            st.info(f"↩️ Resuming an interrupted run from frame {resumed_frames * stride}.")
+
         # =====================================================================
-        # STEP 4: SETUP UI COMPONENTS FOR LIVE UPDATES
+        # STEP 3: SETUP UI COMPONENTS FOR LIVE UPDATES
         # =====================================================================
-        # Calculate how many frames equal 3 seconds for periodic updates
+        # Calculate how many (analyzed) frames equal 3 seconds for periodic updates
         # Example: 30fps × 3 seconds = update every 90 frames
-        update_interval_frames = int(fps * 3)
+        update_interval_frames = max(1, int(fps * 3))
         
         # Create progress bar (0-100%) for tracking video processing
         progress_bar = st.progress(0)
@@ -86,7 +121,7 @@ def handle_video(uploaded_file, tracker):
         summary_placeholder = st.empty()  # For showing statistics table
 
         # =====================================================================
-        # STEP 5: DEFINE FRAME GENERATOR FUNCTION
+        # STEP 4: DEFINE FRAME GENERATOR FUNCTION
         # =====================================================================
         def frame_generator():
             """
@@ -94,10 +129,18 @@ def handle_video(uploaded_file, tracker):
             
             This approach is memory-efficient as it doesn't load the entire
             video into memory. Frames are yielded one-by-one for processing.
+            With sampling, the frames in between are skipped with grab(),
+            which advances the decoder without retrieving (converting and
+            copying) their pixels.
             
             Yields:
                 numpy.ndarray: Video frame in BGR format (OpenCV standard)
             """
+            # Skip the frames a resumed run has already processed (decoded, not retrieved)
+            for _ in range(resumed_frames * stride):
+                if not cap.grab():
+                    break
+
             # Continue reading while video is open
             while cap.isOpened():
                 # Read the next frame
@@ -111,82 +154,121 @@ def handle_video(uploaded_file, tracker):
                 
                 # Yield the frame for processing
                 yield frame
+
+                # Skip the frames between two analyzed frames
+                for _ in range(stride - 1):
+                    if not cap.grab():
+                        break
             
             # Release video capture when done
             # Frees system resources and closes the video file
             cap.release()
 
         # =====================================================================
-        # STEP 6: PROCESS VIDEO FRAMES WITH TRACKING
+        # STEP 5: PROCESS VIDEO FRAMES WITH TRACKING
         # =====================================================================
         # Track when we last updated the statistics display
         last_update_frame = 0
 
-        # Process video using tracker's stream processing method
-        # track_video_stream() yields (annotated_frame, live_summary) for each frame
+        # The preview is pushed to the browser from a background thread at
+        # most 5 times per second, downscaled to the 320px display width.
+        # Only the frames it claims are annotated; the others are only tracked
+        # and counted, so throughput no longer depends on the connection
+        preview = PreviewRenderer(video_placeholder, progress_bar, fps=5, width=320)
+
+        # Optional export: a background thread encodes every `stride`-th
+        # annotated frame (output fps) at the output resolution
+        if export is not None:
+            export_writer = VideoExportWriter(fps, frame_size, fps=export.get("fps"), height=export.get("height"))
+
+        # Annotate the frames the preview will show and the frames being exported
+        # (called once per frame, in order, on the annotation thread)
+        frame_counter = itertools.count()
+
+        def should_annotate():
+            exported = export_writer is not None and export_writer.wants(next(frame_counter))
+            return preview.claim_frame() or exported
+
+        # Process video in a pipeline: decoding, YOLO inference and annotation
+        # run on worker threads, this thread only hands results to the preview.
+        # FramePipeline yields (annotated_frame, live_summary) in frame order
+        # and stops its workers when the with-block exits (including on errors)
+        # Processing starts once the resource governor grants a job slot
+        # (the user sees their queue position while other uploads run)
         # enumerate() gives us the frame index for progress tracking
-        for idx, (annotated_frame, _) in enumerate(
-            tracker.track_video_stream(
-                frame_generator(),           # Generator yielding frames
-                tracker.confidence_threshold  # YOLO confidence threshold
-            )
-        ):
-            # =================================================================
-            # STEP 6.1: UPDATE PROGRESS BAR
-            # =================================================================
-            # Calculate progress as a percentage (0.0 to 1.0)
-            # min() ensures we don't exceed 100% due to frame count inaccuracies
-            progress = min((idx + 1) / total_frames, 1.0)
-            progress_bar.progress(progress)
+        with wait_for_slot(tracker), preview, export_writer or contextlib.nullcontext(), FramePipeline(
+            frame_generator(),           # Generator yielding frames (runs on the decode thread)
+            tracker,                     # Tracker used for inference and annotation
+            tracker.confidence_threshold,  # YOLO confidence threshold
+            should_annotate=should_annotate,  # Annotate only frames that will be shown or exported
+            resume=resume,               # Tracker state of an interrupted run (or None)
+            checkpointer=checkpointer    # Periodic checkpoints of the tracker state
+        ) as pipeline:
+            for idx, (annotated_frame, _) in enumerate(pipeline):
+                # =================================================================
+                # STEP 5.1: UPDATE PROGRESS BAR
+                # =================================================================
+                # Calculate progress as a percentage (0.0 to 1.0)
+                # min() ensures we don't exceed 100% due to frame count inaccuracies
+                # (rendered by the preview thread at the display rate)
+                progress = min((resumed_frames + idx + 1) / total_frames, 1.0)
+                preview.set_progress(progress)
             
-            # =================================================================
-            # STEP 6.2: DISPLAY CURRENT ANNOTATED FRAME
-            # =================================================================
-            # Update the video placeholder with the latest processed frame
-            # width=320 keeps the preview at a reasonable size
-            # channels="BGR" tells Streamlit to handle OpenCV's BGR format
-            video_placeholder.image(
-                annotated_frame, 
-                channels="BGR", 
-                width=320
-            )
-
-            # =================================================================
-            # STEP 6.3: PERIODICALLY UPDATE STATISTICS TABLE
-            # =================================================================
-            # Update statistics either on:
-            #   1. First frame (idx == 0)
-            #   2. After update_interval_frames have passed since last update
-            # This prevents excessive UI updates that could slow down processing
-            if idx == 0 or idx - last_update_frame >= update_interval_frames:
-                # Get current aggregated statistics from tracker
-                output_stats = tracker.get_output_stats()
+                # =================================================================
+                # STEP 5.2: DISPLAY CURRENT ANNOTATED FRAME
+                # =================================================================
+                # Hand the frame to the preview (newest frame wins; stale ones are dropped)
+                # channels="BGR" is used by the preview since OpenCV frames are BGR
+                if annotated_frame is not None:
+                    preview.submit(annotated_frame)
+
+                # Hand exported frames to the encoder thread (full resolution, in order)
+                if annotated_frame is not None and export_writer is not None and export_writer.wants(idx):
+                    export_writer.submit(annotated_frame)
+
+                # =================================================================
+                # STEP 5.3: PERIODICALLY UPDATE STATISTICS TABLE
+                # =================================================================
+                # Update statistics either on:
+                #   1. First frame (idx == 0)
+                #   2. After update_interval_frames have passed since last update
+                # This prevents excessive UI updates that could slow down processing
+                if idx == 0 or idx - last_update_frame >= update_interval_frames:
+                    # Get current aggregated statistics from tracker
+                    output_stats = tracker.get_output_stats()
                 
-                # Display statistics if we have detections
-                if not output_stats.empty:
-                    # Show updating header to indicate live processing
-                    summary_placeholder.subheader("📦 Item summary (updating...)")
-                    # Display the statistics DataFrame
-                    summary_placeholder.dataframe(
-                        output_stats, 
-                        use_container_width=True
-                    )
-                else:
-                    # Show info message if no detections yet
-                    summary_placeholder.info("🔍 Processing... waiting for detections.")
+                    # Display statistics if we have detections
+                    if not output_stats.empty:
+                        # Show updating header to indicate live processing
+                        summary_placeholder.subheader("📦 Item summary (updating...)")
+                        # Display the statistics DataFrame
+                        summary_placeholder.dataframe(
+                            output_stats, 
+                            use_container_width=True
+                        )
+                    else:
+                        # Show info message if no detections yet
+                        summary_placeholder.info("🔍 Processing... waiting for detections.")
                 
-                # Update the last update frame counter
-                last_update_frame = idx
+                    # Update the last update frame counter
+                    last_update_frame = idx
 
         # =====================================================================
-        # STEP 7: CLEANUP AFTER PROCESSING
+        # STEP 6: CLEANUP AFTER PROCESSING
         # =====================================================================
         # Remove the progress bar once processing is complete
         progress_bar.empty()
-        
-        # Delete the temporary video file to free disk space
-        # The file path is stored in tfile.name
-        os.remove(tfile.name)
+
+        # The video is complete: its checkpoint is no longer needed
+        if checkpointer is not None:
+            checkpointer.discard()
+
+        # Report what the motion gate saved (fixed cameras)
+        if tracker.motion_threshold is not None:
+            gate_stats = tracker.get_gate_stats()
+            st.caption(f"⏸️ Unchanged frames skipped: {gate_stats['skipped_fraction']:.0%} "
+                       f"(~{gate_stats['time_saved_s']:.1f}s of inference saved)")
+        return {"export_path": export_writer.path if export_writer is not None else None}
 
     except Exception as e:
         # =====================================================================
@@ -199,5 +281,17 @@ def handle_video(uploaded_file, tracker):
         #   - Model inference failure
         #   - Memory issues with large videos
         #   - Disk space issues (temporary file)
+        # A partial export is of no use: delete it
+        if export_writer is not None:
+            export_writer.discard()
         st.error(f"❌ Failed to process video: {e}")
-        st.stop()  # Stop execution to prevent further errors
\ No newline at end of file
+        if checkpointer is not None and (checkpointer.saves or resumed_frames):
+            st.info("💾 Progress was saved: upload the same video again to resume.")
+        st.stop()  # Stop execution to prevent further errors
+
+    finally:
+        # =====================================================================
+        # STEP 7: RELEASE RESOURCES (runs on success, errors and early stops)
+        # =====================================================================
+        # Release the video capture and delete any temporary video file
+        video.close()
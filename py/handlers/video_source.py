@@ -0,0 +1,132 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import cv2          # OpenCV for video capture
+import numpy as np  # NumPy for handing buffer slices to OpenCV
+import os           # Operating system operations (file deletion)
+import tempfile     # Temporary file fallback for backends without stream support
+
+# =============================================================================
+# STREAMING VIDEO INGEST
+# =============================================================================
+# Uploaded videos are opened without materializing a second copy in RAM:
+#
+#   1. Where OpenCV supports stream readers (cv2.IStreamReader, OpenCV >= 4.10
+#      with the FFMPEG backend), frames are decoded straight from the upload
+#      buffer, so the first frame is available immediately.
+#   2. Otherwise the upload buffer is copied to a temporary file in fixed-size
+#      chunks (no full-size bytes object) and opened from disk.
+# =============================================================================
+
+# Size of each chunk copied to the temporary file
+CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+
+
+def _upload_buffer(uploaded_file):
+    """Returns a zero-copy memoryview of the upload, or None if not available."""
+    getbuffer = getattr(uploaded_file, "getbuffer", None)
+    if getbuffer is None:
+        return None
+    try:
+        return getbuffer()
+    except Exception:
+        return None
+
+
+if hasattr(cv2, "IStreamReader"):
+    class _BufferStreamReader(cv2.IStreamReader):
+        """Serves an in-memory buffer to OpenCV's demuxer (read/seek callbacks)."""
+
+        def __init__(self, buffer):
+            super().__init__()
+            self.buffer = buffer
+            self.position = 0
+
+        def read(self, buf, size):
+            chunk = self.buffer[self.position:self.position + size]
+            length = len(chunk)
+            buf[:length] = np.frombuffer(chunk, dtype=np.uint8)
+            self.position += length
+            return length
+
+        def seek(self, offset, origin):
+            # origin follows io conventions: 0 = start, 1 = current, 2 = end
+            if origin == os.SEEK_SET:
+                self.position = offset
+            elif origin == os.SEEK_CUR:
+                self.position += offset
+            elif origin == os.SEEK_END:
+                self.position = len(self.buffer) + offset
+            self.position = min(max(self.position, 0), len(self.buffer))
+            return self.position
+else:
+    _BufferStreamReader = None
+
+
+class UploadedVideo:
+    def __init__(self, uploaded_file):
+        """
+        Opens an uploaded video for decoding with constant extra memory.
+
+        Call open() to get a cv2.VideoCapture and always call close()
+        (typically in a finally block) to release it and delete any
+        temporary file.
+
+        Args:
+            uploaded_file: Streamlit UploadedFile object (or any binary file-like object).
+        """
+        self.uploaded_file = uploaded_file
+        self.cap = None
+        self.buffer = None
+        self.temp_path = None
+        self.streamed = False  # True when decoding straight from the upload buffer
+
+    def open(self):
+        """
+        Returns:
+            cv2.VideoCapture: Capture positioned at the first frame
+                              (check isOpened() as usual).
+        """
+        # Step 1: Decode straight from the upload buffer where the backend supports it
+        buffer = self.buffer = _upload_buffer(self.uploaded_file)
+        if buffer is not None and _BufferStreamReader is not None:
+            try:
+                cap = cv2.VideoCapture(_BufferStreamReader(buffer), cv2.CAP_FFMPEG, [])
+                if cap.isOpened():
+                    self.cap = cap
+                    self.streamed = True
+                    return cap
+                cap.release()
+            except (cv2.error, TypeError):
+                pass
+
+        # Step 2: Fall back to a temporary file written in fixed-size chunks
+        # Keep the extension so the demuxer can be picked from the file name
+        suffix = os.path.splitext(getattr(self.uploaded_file, "name", "") or "")[1]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tfile:
+            self.temp_path = tfile.name
+            if buffer is not None:
+                for start in range(0, len(buffer), CHUNK_SIZE):
+                    tfile.write(buffer[start:start + CHUNK_SIZE])
+            else:
+                self.uploaded_file.seek(0)
+                for chunk in iter(lambda: self.uploaded_file.read(CHUNK_SIZE), b""):
+                    tfile.write(chunk)
+
+        self.cap = cv2.VideoCapture(self.temp_path)
+        return self.cap
+
+    def close(self):
+        """Releases the capture and deletes the temporary file (safe to call twice)."""
+        if self.cap is not None:
+            self.cap.release()
+        if self.buffer is not None:
+            # Drop the buffer export so the upload object can be reused/resized
+            try:
+                self.buffer.release()
+            except BufferError:
+                pass  # Still referenced by the decoder; freed with it
+            self.buffer = None
+        if self.temp_path is not None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+            self.temp_path = None
@@ -0,0 +1,128 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import fnmatch      # Source name patterns in the presets file
+import json         # Presets file format
+import os           # Presets file location
+import numpy as np  # Box offsets and mask padding
+
+# =============================================================================
+# REGION OF INTEREST (ROI)
+# =============================================================================
+# Fixed shelf cameras only show products inside a known rectangle. Cropping
+# the frame to that rectangle before inference means pixels outside it cost
+# no compute, and the model's input resolution is spent on the shelf only.
+# Detections are mapped back to full-frame coordinates afterwards, so
+# tracking, annotation and statistics are unchanged.
+#
+# An ROI is (x1, y1, x2, y2), either in pixels or - if all values are
+# between 0 and 1 - relative to the frame size.
+#
+# Per-source ROIs are read from data/roi-presets.json, mapping source file
+# name patterns to ROIs (first match wins), e.g.:
+#   {
+#       "aisle3_cam*.mp4": [0.10, 0.25, 0.90, 0.95],
+#       "checkout.mp4": [220, 80, 1700, 1000]
+#   }
+# =============================================================================
+
+ROI_PRESETS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "roi-presets.json")
+
+
+def load_roi_presets(path=ROI_PRESETS_PATH):
+    """
+    Loads the per-source ROI presets.
+
+    Args:
+        path (str): JSON file mapping name patterns to ROIs.
+
+    Returns:
+        dict: {pattern: [x1, y1, x2, y2]}, empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def roi_for_source(source_name, presets=None):
+    """
+    Returns the ROI configured for a source (file name or camera id).
+
+    Args:
+        source_name (str): Name of the uploaded file / stream.
+        presets (dict, optional): Presets; loaded from ROI_PRESETS_PATH if omitted.
+
+    Returns:
+        tuple or None: (x1, y1, x2, y2), or None to use the whole frame.
+    """
+    presets = load_roi_presets() if presets is None else presets
+    name = os.path.basename(source_name or "")
+    for pattern, roi in presets.items():
+        if fnmatch.fnmatch(name, pattern):
+            return tuple(roi)
+    return None
+
+
+def clip_roi(roi, frame_shape):
+    """
+    Converts an ROI to integer pixel bounds inside the frame.
+
+    Args:
+        roi (tuple or None): (x1, y1, x2, y2) in pixels or relative (0-1).
+        frame_shape (tuple): frame.shape of the full frame.
+
+    Returns:
+        tuple or None: (x1, y1, x2, y2) pixel bounds, or None if the ROI
+                       is unset or covers the whole frame.
+    """
+    if roi is None:
+        return None
+    height, width = frame_shape[:2]
+    x1, y1, x2, y2 = roi
+    if max(roi) <= 1.0:
+        x1, x2 = x1 * width, x2 * width
+        y1, y2 = y1 * height, y2 * height
+    x1, x2 = int(np.clip(round(x1), 0, width)), int(np.clip(round(x2), 0, width))
+    y1, y2 = int(np.clip(round(y1), 0, height)), int(np.clip(round(y2), 0, height))
+    if x2 <= x1 or y2 <= y1:
+        raise ValueError(f"Empty ROI {roi} for a {width}x{height} frame")
+    if (x1, y1, x2, y2) == (0, 0, width, height):
+        return None
+    return x1, y1, x2, y2
+
+
+def crop_to_roi(frame, bounds):
+    """Returns the ROI of a frame as a view (no copy); the frame itself if bounds is None."""
+    if bounds is None:
+        return frame
+    x1, y1, x2, y2 = bounds
+    return frame[y1:y2, x1:x2]
+
+
+def detections_to_full_frame(detections, bounds, frame_shape):
+    """
+    Maps detections made on an ROI crop back to full-frame coordinates.
+
+    Args:
+        detections (sv.Detections): Detections on the cropped frame.
+        bounds (tuple or None): Pixel bounds returned by clip_roi().
+        frame_shape (tuple): frame.shape of the full frame.
+
+    Returns:
+        sv.Detections: The same object, with boxes offset and masks padded to the full frame.
+    """
+    if bounds is None or len(detections) == 0:
+        return detections
+    x1, y1, x2, y2 = bounds
+
+    # Boxes: shift by the ROI origin
+    detections.xyxy = detections.xyxy + np.array([x1, y1, x1, y1], dtype=detections.xyxy.dtype)
+
+    # Masks: place each crop-sized mask into an empty full-frame mask
+    if detections.mask is not None:
+        height, width = frame_shape[:2]
+        full_mask = np.zeros((len(detections), height, width), dtype=bool)
+        full_mask[:, y1:y2, x1:x2] = detections.mask
+        detections.mask = full_mask
+    return detections
@@ -0,0 +1,136 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import numpy as np          # Tile grid, box merging and mask stitching
+import supervision as sv    # Detections container
+
+# =============================================================================
+# TILED INFERENCE FOR HIGH-RESOLUTION STILLS
+# =============================================================================
+# A 12-48 MP shelf photo sent to the model in one pass is downsampled to the
+# model input size, and small SKUs disappear. Instead the photo is cut into
+# overlapping tiles that are inferred at (close to) native resolution, in
+# batches, and the per-tile detections are merged back into one
+# sv.Detections:
+#
+#   1. boxes are shifted to photo coordinates
+#   2. duplicates from overlapping tiles are removed with a class-aware greedy
+#      NMS on intersection-over-smaller-box, so a box cut by a tile edge is
+#      suppressed by the complete box from the neighbouring tile. Only boxes
+#      from different tiles suppress each other: within a tile the model's own
+#      NMS already ran, and nested or tightly packed items must stay counted
+#   3. masks (segmentation models) are stitched into full-size masks for the
+#      surviving detections only
+# =============================================================================
+
+def tile_grid(width, height, tile_size, overlap):
+    """
+    Computes overlapping tiles that cover an image.
+
+    Args:
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+        tile_size (int): Tile side in pixels.
+        overlap (float): Fraction of tile_size shared by neighbouring tiles (0-0.9).
+
+    Returns:
+        list[tuple]: (x1, y1, x2, y2) per tile, row by row.
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        positions.append(length - tile_size)  # Last tile flush with the border
+        return positions
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def merge_tile_detections(tile_detections, tiles, image_shape, overlap_threshold=0.6):
+    """
+    Merges per-tile detections into one full-image sv.Detections.
+
+    Args:
+        tile_detections (list[sv.Detections]): Detections per tile, in tile coordinates.
+        tiles (list[tuple]): Tile bounds from tile_grid(), same order.
+        image_shape (tuple): Shape of the full image.
+        overlap_threshold (float): Intersection over the smaller box above which
+                                   two same-class boxes are duplicates.
+
+    Returns:
+        sv.Detections: Merged detections in image coordinates.
+    """
+    # Step 1: Concatenate boxes/confidences/classes in image coordinates
+    boxes, confidences, class_ids, sources, data = [], [], [], [], []
+    for tile_index, (detections, (x1, y1, _, _)) in enumerate(zip(tile_detections, tiles)):
+        if len(detections) == 0:
+            continue
+        boxes.append(detections.xyxy + np.array([x1, y1, x1, y1], dtype=detections.xyxy.dtype))
+        confidences.append(detections.confidence)
+        class_ids.append(detections.class_id)
+        data.append(detections.data)
+        # (tile, row in tile) of every box, to fetch its mask later
+        sources.append(np.stack([np.full(len(detections), tile_index), np.arange(len(detections))], axis=1))
+    if not boxes:
+        return sv.Detections.empty()
+
+    xyxy = np.concatenate(boxes)
+    confidence = np.concatenate(confidences)
+    class_id = np.concatenate(class_ids)
+    sources = np.concatenate(sources)
+
+    # Step 2: Cross-tile NMS - keep the most confident box of each duplicate group
+    keep = _suppress_duplicates(xyxy, confidence, class_id, sources[:, 0], overlap_threshold)
+
+    # Extra per-detection data (e.g. class_name) present in every tile is carried through
+    keys = set.intersection(*(set(tile_data) for tile_data in data))
+    merged = sv.Detections(
+        xyxy=xyxy[keep],
+        confidence=confidence[keep],
+        class_id=class_id[keep],
+        data={key: np.concatenate([tile_data[key] for tile_data in data])[keep] for key in keys}
+    )
+
+    # Step 3: Stitch full-size masks for the kept detections only
+    if any(detections.mask is not None for detections in tile_detections if len(detections)):
+        height, width = image_shape[:2]
+        mask = np.zeros((len(merged), height, width), dtype=bool)
+        for row, (tile_index, tile_row) in enumerate(sources[keep]):
+            tile_mask = tile_detections[tile_index].mask
+            if tile_mask is None:
+                continue
+            x1, y1, x2, y2 = tiles[tile_index]
+            mask[row, y1:y2, x1:x2] = tile_mask[tile_row]
+        merged.mask = mask
+    return merged
+
+
+def _suppress_duplicates(xyxy, confidence, class_id, tile_index, overlap_threshold):
+    """Greedy class-aware NMS on intersection over the smaller box, across tiles only; returns kept indices."""
+    order = np.argsort(-confidence)
+    areas = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+    suppressed = np.zeros(len(xyxy), dtype=bool)
+    keep = []
+    for position, index in enumerate(order):
+        if suppressed[index]:
+            continue
+        keep.append(index)
+
+        # Compare with all lower-confidence boxes of the same class from other tiles at once
+        others = order[position + 1:]
+        others = others[(class_id[others] == class_id[index])
+                        & (tile_index[others] != tile_index[index])
+                        & ~suppressed[others]]
+        if len(others) == 0:
+            continue
+        inter_w = np.clip(np.minimum(xyxy[others, 2], xyxy[index, 2]) - np.maximum(xyxy[others, 0], xyxy[index, 0]), 0, None)
+        inter_h = np.clip(np.minimum(xyxy[others, 3], xyxy[index, 3]) - np.maximum(xyxy[others, 1], xyxy[index, 1]), 0, None)
+        smaller = np.maximum(np.minimum(areas[others], areas[index]), 1e-6)
+        suppressed[others[(inter_w * inter_h) / smaller > overlap_threshold]] = True
+    return np.array(keep, dtype=np.int64)
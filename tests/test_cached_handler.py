@@ -0,0 +1,39 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import numpy as np
+import pytest
+import supervision as sv
+
+pytest.importorskip("streamlit")
+from py.handlers.cached_handler import _unpack_last_run, pack_last_run
+
+# =============================================================================
+# LAST RUN OF A SESSION
+# =============================================================================
+
+def test_packed_last_run_restores_detections_and_masks():
+    frame = np.full((120, 160, 3), 128, dtype=np.uint8)
+    mask = np.zeros((2, 120, 160), dtype=bool)
+    mask[0, 10:40, 20:70] = True
+    mask[1, 60:61, 100:150] = True
+    detections = sv.Detections(
+        xyxy=np.array([[20, 10, 70, 40], [100, 60, 150, 61]], dtype=np.float32),
+        confidence=np.array([0.9, 0.5], dtype=np.float32),
+        class_id=np.array([1, 2]),
+        tracker_id=np.array([7, 8]),
+        mask=mask,
+    )
+
+    last_run = pack_last_run("key", frame, detections)
+    assert isinstance(last_run["frame"], bytes)
+    restored_frame, restored = _unpack_last_run(last_run)
+
+    assert restored_frame.shape == frame.shape
+    np.testing.assert_array_equal(restored.mask, mask)
+    np.testing.assert_array_equal(restored.tracker_id, [7, 8])
+    np.testing.assert_array_equal(restored.class_id, [1, 2])
+
+
+def test_video_last_run_has_no_frame():
+    assert _unpack_last_run({"key": "key"}) == (None, None)
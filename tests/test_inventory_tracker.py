@@ -0,0 +1,41 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import pandas as pd
+import pytest
+from benchmarks.synthetic import StubModel, synthetic_frames
+from py.InventoryTracker import InventoryTracker
+from py.ModelRegistry import model_registry
+
+# =============================================================================
+# INVENTORY TRACKER (with the benchmark stub model)
+# =============================================================================
+
+def stub_tracker(segmentation=False):
+    """Tracker on a fresh stub model (its boxes drift with the model's call counter)."""
+    stub = StubModel(num_detections=12, segmentation=segmentation)
+    model_registry.register(stub)
+    return InventoryTracker(model_path=stub.model_path)
+
+
+def run_video(tracker, batch_size, stats_only=True):
+    frames = synthetic_frames(24, width=320, height=240)
+    live_summary = {}
+    for _, live_summary in tracker.track_video_stream(frames, 0.0, batch_size=batch_size, stats_only=stats_only):
+        pass
+    return live_summary, tracker.get_output_stats()
+
+
+@pytest.mark.parametrize("batch_size", [2, 4, 7])
+def test_batched_inference_gives_the_same_results(batch_size):
+    expected_summary, expected_stats = run_video(stub_tracker(), batch_size=1)
+    summary, stats = run_video(stub_tracker(), batch_size=batch_size)
+    assert expected_summary and summary == expected_summary
+    pd.testing.assert_frame_equal(stats, expected_stats)
+
+
+def test_stats_only_gives_the_same_results():
+    expected_summary, expected_stats = run_video(stub_tracker(segmentation=True), batch_size=1, stats_only=False)
+    summary, stats = run_video(stub_tracker(segmentation=True), batch_size=1, stats_only=True)
+    assert summary == expected_summary
+    pd.testing.assert_frame_equal(stats, expected_stats)
@@ -0,0 +1,46 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import threading    # Concurrent acquires
+from benchmarks.synthetic import StubModel
+from py import ModelRegistry as model_registry_module
+from py.ModelRegistry import ModelRegistry
+
+# =============================================================================
+# MODEL REGISTRY
+# =============================================================================
+
+def test_slow_load_does_not_block_loaded_models(monkeypatch):
+    registry = ModelRegistry()
+    loaded = StubModel(num_detections=2)
+    registry.register(loaded)
+
+    # A model whose first load (e.g. an export) blocks until released
+    loading, release_load = threading.Event(), threading.Event()
+
+    def slow_shared_model(model_path, backend, int8):
+        loading.set()
+        release_load.wait(10)
+        return StubModel(num_detections=3)
+
+    monkeypatch.setattr(model_registry_module, "SharedModel", slow_shared_model)
+    results = []
+    loaders = [threading.Thread(target=lambda: results.append(registry.acquire("slow.pt"))) for _ in range(2)]
+    for loader in loaders:
+        loader.start()
+    assert loading.wait(10)
+
+    # The loaded model is still served while the other one loads
+    served = []
+    reader = threading.Thread(target=lambda: served.append(registry.acquire(loaded.model_path)))
+    reader.start()
+    reader.join(2)
+    assert served == [loaded]
+    registry.release(loaded)
+
+    release_load.set()
+    for loader in loaders:
+        loader.join(10)
+    # Both concurrent acquires got the same, single load
+    assert len(results) == 2 and results[0] is results[1]
+    assert registry.loaded_models()[("slow.pt", "pytorch", False)] == 2
@@ -0,0 +1,76 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import collections  # Frames taken per stream
+import itertools    # Endless synthetic feeds
+import time         # Waiting for the decode threads
+import numpy as np
+from benchmarks.synthetic import StubModel
+from py.ModelRegistry import model_registry
+from py.MultiStreamTracker import MultiStreamTracker
+
+# =============================================================================
+# MULTI-STREAM SCHEDULING
+# =============================================================================
+
+def live_feed():
+    """Endless feed of small blank frames (a live camera always has frames buffered)."""
+    return itertools.repeat(np.zeros((64, 64, 3), dtype=np.uint8))
+
+
+def wait_until_buffered(manager, timeout=5.0):
+    """Waits until the decode thread of every stream has filled its buffer."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(stream.buffer.full() for stream in manager.streams.values()):
+            return
+        time.sleep(0.01)
+    raise TimeoutError("Decode threads did not fill their buffers")
+
+
+def test_every_stream_gets_frames_when_priorities_exceed_batch_size():
+    stub = StubModel(num_detections=2)
+    model_registry.register(stub)
+    manager = MultiStreamTracker(stub.model_path, batch_size=4)
+    for index in range(5):
+        manager.add_stream(f"cam-{index}", live_feed())
+    try:
+        taken = collections.Counter()
+        for _ in range(10):
+            wait_until_buffered(manager)
+            batch = manager._next_batch()
+            assert len(batch) == 4
+            taken.update(stream.stream_id for stream, _ in batch)
+        assert set(taken) == set(manager.streams)
+        assert max(taken.values()) - min(taken.values()) <= 1
+    finally:
+        manager.stop()
+
+
+def test_priority_gives_a_larger_share():
+    stub = StubModel(num_detections=2)
+    model_registry.register(stub)
+    manager = MultiStreamTracker(stub.model_path, batch_size=3)
+    manager.add_stream("low", live_feed())
+    manager.add_stream("high", live_feed(), priority=2)
+    try:
+        taken = collections.Counter()
+        for _ in range(6):
+            wait_until_buffered(manager)
+            taken.update(stream.stream_id for stream, _ in manager._next_batch())
+        assert taken["high"] > taken["low"] > 0
+    finally:
+        manager.stop()
+
+
+def test_each_stream_is_inferred_by_its_own_model():
+    first, second = StubModel(num_detections=2), StubModel(num_detections=3)
+    manager = MultiStreamTracker(first.model_path, batch_size=4)
+    frames = [np.zeros((64, 64, 3), dtype=np.uint8)] * 5
+    model_registry.register(first)
+    manager.add_stream("first", frames)
+    model_registry.register(second)
+    manager.add_stream("second", frames).set_model(second.model_path)
+    manager.start()
+    assert manager.join(timeout=30)
+    assert (first.calls, second.calls) == (5, 5)
@@ -0,0 +1,96 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import os
+import time
+from types import SimpleNamespace
+import pytest
+from py import ResultCache as result_cache_module
+from py.ResultCache import ResultCache
+
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+
+def tracker_settings(**overrides):
+    """Stand-in for an InventoryTracker with the settings that enter the key."""
+    settings = dict(model_path="missing.pt", backend="pytorch", int8=False, confidence_threshold=0.25, roi=None,
+                    imgsz=None, tile_size=None, tile_overlap=0.2, analysis_fps=None, frame_stride=1,
+                    motion_threshold=None, motion_refresh_interval=30, window_s=None, max_windows=120)
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+
+class Upload:
+    """Minimal Streamlit UploadedFile."""
+
+    def __init__(self, data, file_id):
+        self.data = data
+        self.file_id = file_id
+
+    def getbuffer(self):
+        return memoryview(self.data)
+
+
+def test_key_depends_on_content_and_settings(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    upload = Upload(b"image bytes", "a")
+    key = cache.key_for(upload, tracker_settings())
+    assert key == cache.key_for(Upload(b"image bytes", "b"), tracker_settings())
+    assert key != cache.key_for(Upload(b"other bytes", "c"), tracker_settings())
+    assert key != cache.key_for(upload, tracker_settings(confidence_threshold=0.5))
+    assert key != cache.key_for(upload, tracker_settings(imgsz=320))
+    assert key != cache.key_for(upload, tracker_settings(roi=(0, 0, 10, 10)))
+
+
+def test_entries_are_extended_per_label_mode(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("k", {"frames": 1}, b"jpeg-a", "item_name")
+    cache.put("k", {"frames": 1}, b"jpeg-b", "brand")
+    entry = cache.get("k")
+    assert entry["stats"] == {"frames": 1}
+    assert entry["previews"] == {"item_name": b"jpeg-a", "brand": b"jpeg-b"}
+    assert cache.get("missing") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10**9)
+    for key in ("old", "used", "new"):
+        cache.put(key, {"payload": b"x" * 4000})
+    entry_size = os.path.getsize(cache._path("old"))
+    past = time.time() - 100
+    os.utime(cache._path("old"), (past, past))
+    os.utime(cache._path("used"), (past + 1, past + 1))
+    cache.get("used")  # Refreshes its mtime
+
+    cache.max_bytes = 3 * entry_size
+    cache.put("newest", {"payload": b"x" * 4000})
+    assert cache.get("old") is None
+    assert cache.get("used") is not None and cache.get("new") is not None and cache.get("newest") is not None
+
+
+@pytest.mark.parametrize("payload", [b"not a pickle", b""])
+def test_unreadable_entries_are_dropped(tmp_path, payload):
+    cache = ResultCache(str(tmp_path))
+    with open(cache._path("bad"), "wb") as f:
+        f.write(payload)
+    assert cache.get("bad") is None
+    assert not os.path.exists(cache._path("bad"))
+
+
+def test_entries_of_removed_classes_are_dropped(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    # A pickle that references a class that no longer exists
+    stale = b"\x80\x04cpy.NoSuchModule\nNoSuchClass\n)\x81."
+    with open(cache._path("stale"), "wb") as f:
+        f.write(stale)
+    assert cache.get("stale") is None
+    assert not os.path.exists(cache._path("stale"))
+
+
+def test_upload_digests_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache_module, "MAX_UPLOAD_DIGESTS", 3)
+    cache = ResultCache(str(tmp_path))
+    for index in range(5):
+        cache.upload_digest(Upload(b"%d" % index, f"id-{index}"))
+    assert list(cache._upload_digests) == ["id-2", "id-3", "id-4"]
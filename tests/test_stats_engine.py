@@ -0,0 +1,99 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import collections
+import numpy as np
+import pandas as pd
+from py.StatsEngine import StatsEngine
+
+# =============================================================================
+# STREAMING STATISTICS ENGINE
+# =============================================================================
+
+CLASS_SKUS = np.array(["SKU0", "SKU1", "SKU2", "SKU3"], dtype=object)
+LABEL_TABLES = {
+    "sku_code": CLASS_SKUS,
+    "brand": np.array(["Acme", "Acme", "Zen", np.nan], dtype=object),
+}
+
+
+def random_frames(num_frames=60, seed=0):
+    """Yields (class_ids, tracker_ids, confidences) of synthetic tracked frames."""
+    rng = np.random.default_rng(seed)
+    for _ in range(num_frames):
+        n = rng.integers(0, 6)
+        tracker_ids = rng.choice(20, size=n, replace=False).astype(np.int64)
+        class_ids = (tracker_ids % len(CLASS_SKUS)).astype(np.int64)  # A track keeps its class
+        yield class_ids, tracker_ids, rng.uniform(0.3, 1.0, size=n)
+
+
+def baseline_aggregates(frames):
+    """Per-SKU aggregates as the original per-detection bookkeeping computed them."""
+    tracked_ids = collections.defaultdict(set)
+    confidences = collections.defaultdict(list)
+    present = collections.Counter()
+    for class_ids, tracker_ids, frame_confidences in frames:
+        for sku in set(CLASS_SKUS[class_ids]):
+            present[sku] += 1
+        for class_id, tracker_id, confidence in zip(class_ids, tracker_ids, frame_confidences):
+            sku = CLASS_SKUS[class_id]
+            if tracker_id not in tracked_ids[sku]:
+                tracked_ids[sku].add(tracker_id)
+                confidences[sku].append(confidence)
+    return tracked_ids, confidences, present
+
+
+def run_engine(frames):
+    engine = StatsEngine(CLASS_SKUS, LABEL_TABLES)
+    for class_ids, tracker_ids, confidences in frames:
+        engine.update(class_ids, tracker_ids, confidences)
+    return engine
+
+
+def test_sku_summary_matches_baseline():
+    frames = list(random_frames())
+    tracked_ids, confidences, present = baseline_aggregates(frames)
+    summary = run_engine(frames).summary("sku_code").set_index("sku_code")
+
+    assert set(summary.index) == {sku for sku, ids in tracked_ids.items() if ids}
+    for sku, row in summary.iterrows():
+        assert row["count"] == len(tracked_ids[sku])
+        assert row["confidence(%)"] == f"{int(round(np.mean(confidences[sku]) * 100))}"
+        assert row["frame_presence(%)"] == f"{int(round(present[sku] / len(frames) * 100))}"
+
+
+def test_label_summary_sums_skus_and_drops_unlabelled():
+    frames = list(random_frames())
+    tracked_ids, confidences, _ = baseline_aggregates(frames)
+    summary = run_engine(frames).summary("brand").set_index("brand")
+
+    # SKU3 has no brand in the catalog: left out, as the baseline groupby dropped NaN keys
+    assert list(summary.index) == ["Acme", "Zen"]
+    assert "nan" not in summary.index
+    assert summary.loc["Acme", "count"] == len(tracked_ids["SKU0"]) + len(tracked_ids["SKU1"])
+    assert summary.loc["Zen", "count"] == len(tracked_ids["SKU2"])
+    acme_confidences = confidences["SKU0"] + confidences["SKU1"]
+    assert summary.loc["Acme", "confidence(%)"] == f"{int(round(np.mean(acme_confidences) * 100))}"
+
+
+def test_label_presence_counts_shared_frames_once():
+    engine = StatsEngine(CLASS_SKUS, LABEL_TABLES)
+    engine.update(np.array([0, 1]), np.array([1, 2]), np.array([0.5, 0.5]))
+    engine.update(np.array([0]), np.array([1]), np.array([0.5]))
+    engine.update(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    summary = engine.summary("brand").set_index("brand")
+    assert summary.loc["Acme", "frame_presence(%)"] == "67"
+
+
+def test_state_round_trip():
+    frames = list(random_frames())
+    engine = run_engine(frames)
+    restored = StatsEngine(CLASS_SKUS, LABEL_TABLES)
+    restored.load_state_dict(engine.state_dict())
+    for label_mode in LABEL_TABLES:
+        pd.testing.assert_frame_equal(restored.summary(label_mode), engine.summary(label_mode))
+    assert restored.live_summary() == engine.live_summary()
+
+
+def test_empty_engine_has_empty_summary():
+    assert StatsEngine(CLASS_SKUS, LABEL_TABLES).summary("brand").empty
@@ -0,0 +1,68 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import numpy as np
+import supervision as sv
+from py.tiling import merge_tile_detections, tile_grid
+
+# =============================================================================
+# TILED INFERENCE
+# =============================================================================
+
+def tile_detections(xyxy, class_id, confidence=None, mask_shape=None):
+    """Builds the detections of one tile (in tile coordinates)."""
+    xyxy = np.array(xyxy, dtype=np.float32).reshape(-1, 4)
+    class_id = np.array(class_id)
+    confidence = np.full(len(xyxy), 0.9, dtype=np.float32) if confidence is None else np.array(confidence, dtype=np.float32)
+    mask = None
+    if mask_shape is not None:
+        mask = np.zeros((len(xyxy), *mask_shape), dtype=bool)
+        for row, (x1, y1, x2, y2) in enumerate(xyxy.astype(int)):
+            mask[row, y1:y2, x1:x2] = True
+    names = np.array([f"SKU{c:04d}" for c in class_id])
+    return sv.Detections(xyxy=xyxy, confidence=confidence, class_id=class_id, mask=mask, data={"class_name": names})
+
+
+def test_tile_grid_covers_the_image_with_overlap():
+    tiles = tile_grid(1000, 700, 400, 0.25)
+    assert tiles[0] == (0, 0, 400, 400)
+    assert max(x2 for _, _, x2, _ in tiles) == 1000
+    assert max(y2 for _, _, _, y2 in tiles) == 700
+    assert all(x2 - x1 == 400 and y2 - y1 == 400 for x1, y1, x2, y2 in tiles)
+
+
+def test_duplicate_across_tiles_is_merged():
+    # The same item seen by two horizontally overlapping tiles (cut by the first tile's edge)
+    tiles = [(0, 0, 100, 100), (50, 0, 150, 100)]
+    left = tile_detections([[60, 10, 100, 40]], [3], confidence=[0.6])
+    right = tile_detections([[10, 10, 60, 40]], [3], confidence=[0.8])
+    merged = merge_tile_detections([left, right], tiles, (100, 150, 3))
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged.xyxy[0], [60, 10, 110, 40])
+    assert merged.confidence[0] == np.float32(0.8)
+
+
+def test_same_tile_detections_are_kept():
+    # Nested and tightly packed items of one SKU inside one tile all stay counted
+    tiles = [(0, 0, 100, 100), (80, 0, 180, 100)]
+    packed = tile_detections([[10, 10, 50, 50], [15, 15, 45, 45], [12, 12, 52, 52]], [5, 5, 5])
+    merged = merge_tile_detections([packed, sv.Detections.empty()], tiles, (100, 180, 3))
+    assert len(merged) == 3
+
+
+def test_other_classes_are_not_suppressed():
+    tiles = [(0, 0, 100, 100), (50, 0, 150, 100)]
+    left = tile_detections([[60, 10, 100, 40]], [1])
+    right = tile_detections([[10, 10, 50, 40]], [2])
+    assert len(merge_tile_detections([left, right], tiles, (100, 150, 3))) == 2
+
+
+def test_data_and_masks_are_carried_through():
+    tiles = [(0, 0, 100, 100), (50, 0, 150, 100)]
+    left = tile_detections([[10, 10, 30, 30]], [1], mask_shape=(100, 100))
+    right = tile_detections([[40, 40, 90, 90]], [2], mask_shape=(100, 100))
+    merged = merge_tile_detections([left, right], tiles, (100, 150, 3))
+    assert sorted(merged.data["class_name"]) == ["SKU0001", "SKU0002"]
+    assert merged.mask.shape == (2, 100, 150)
+    row = list(merged.class_id).index(2)
+    assert merged.mask[row, 50, 100] and not merged.mask[row, 50, 50]
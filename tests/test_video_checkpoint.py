@@ -0,0 +1,46 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import os
+import time
+from py.VideoCheckpoint import VideoCheckpointer, prune_checkpoints
+
+# =============================================================================
+# VIDEO CHECKPOINTS
+# =============================================================================
+
+def write_checkpoint(directory, name, age_s, size=1000):
+    """Writes a checkpoint file last modified age_s seconds ago."""
+    path = os.path.join(directory, f"{name}.ckpt")
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age_s
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_abandoned_checkpoints_age_out(tmp_path):
+    old = write_checkpoint(tmp_path, "old", age_s=3 * 86400)
+    recent = write_checkpoint(tmp_path, "recent", age_s=3600)
+    prune_checkpoints(str(tmp_path), max_age_s=86400, max_bytes=10**9)
+    assert not os.path.exists(old) and os.path.exists(recent)
+
+
+def test_oldest_checkpoints_go_beyond_the_size_bound(tmp_path):
+    paths = [write_checkpoint(tmp_path, f"run-{index}", age_s=7200 - index * 1000) for index in range(4)]
+    prune_checkpoints(str(tmp_path), max_age_s=86400, max_bytes=2000)
+    assert [os.path.exists(path) for path in paths] == [False, False, True, True]
+
+
+def test_running_and_own_checkpoints_are_kept(tmp_path):
+    running = write_checkpoint(tmp_path, "running", age_s=10)
+    own = write_checkpoint(tmp_path, "own", age_s=3 * 86400)
+    prune_checkpoints(str(tmp_path), max_age_s=86400, max_bytes=0, keep=own)
+    assert os.path.exists(running) and os.path.exists(own)
+
+
+def test_new_run_prunes_and_keeps_its_own_checkpoint(tmp_path):
+    own = write_checkpoint(tmp_path, "video", age_s=365 * 86400)
+    other = write_checkpoint(tmp_path, "other", age_s=365 * 86400)
+    VideoCheckpointer("video", directory=str(tmp_path))
+    assert os.path.exists(own) and not os.path.exists(other)
@@ -0,0 +1,71 @@
+# =============================================================================
+# IMPORTS
+# =============================================================================
+import numpy as np
+from py.WindowedStats import WindowedStats
+
+# =============================================================================
+# WINDOWED STATISTICS
+# =============================================================================
+
+CLASS_SKUS = np.array(["SKU0", "SKU1", "SKU2"], dtype=object)
+LABEL_TABLES = {
+    "sku_code": CLASS_SKUS,
+    "brand": np.array(["Acme", "Acme", np.nan], dtype=object),
+}
+
+
+def update(stats, detections):
+    """Adds one frame of (class_id, tracker_id, confidence) detections."""
+    class_ids = np.array([d[0] for d in detections], dtype=np.int64)
+    tracker_ids = np.array([d[1] for d in detections], dtype=np.int64)
+    confidences = np.array([d[2] for d in detections], dtype=np.float64)
+    stats.update(class_ids, tracker_ids, confidences)
+
+
+def test_tracks_count_once_per_window():
+    stats = WindowedStats(CLASS_SKUS, LABEL_TABLES, window_frames=2, fps=2.0)
+    update(stats, [(0, 1, 0.8)])
+    update(stats, [(0, 1, 0.6), (1, 2, 0.4)])
+    update(stats, [(0, 1, 0.5)])  # Window 1: track 1 counts again
+
+    table = stats.to_frame("sku_code")
+    assert table[["window", "sku_code", "count"]].values.tolist() == [[0, "SKU0", 1], [0, "SKU1", 1], [1, "SKU0", 1]]
+    assert table["confidence(%)"].tolist() == [80.0, 40.0, 50.0]
+    assert table["frame_presence(%)"].tolist() == [100.0, 50.0, 100.0]
+    assert table[["start_s", "end_s"]].values.tolist() == [[0.0, 1.0], [0.0, 1.0], [1.0, 1.5]]
+
+
+def test_labels_roll_up_and_unlabelled_skus_are_left_out():
+    stats = WindowedStats(CLASS_SKUS, LABEL_TABLES, window_frames=10)
+    update(stats, [(0, 1, 0.8), (1, 2, 0.4), (2, 3, 0.9)])
+    update(stats, [(2, 3, 0.9)])
+
+    table = stats.to_frame("brand")
+    assert table["brand"].tolist() == ["Acme"]
+    assert table["count"].tolist() == [2]
+    assert table["frame_presence(%)"].tolist() == [50.0]
+    assert table["start_s"].tolist() == [None]
+
+
+def test_memory_is_bounded_by_the_ring():
+    stats = WindowedStats(CLASS_SKUS, LABEL_TABLES, window_frames=1, num_windows=3)
+    for frame in range(10):
+        update(stats, [(0, frame, 0.5)])
+    assert stats.to_frame("sku_code")["window"].tolist() == [7, 8, 9]
+    assert stats.class_count.shape == (3, len(CLASS_SKUS))
+
+
+def test_state_round_trip():
+    stats = WindowedStats(CLASS_SKUS, LABEL_TABLES, window_frames=2, num_windows=4, fps=10.0)
+    for frame in range(7):
+        update(stats, [(frame % 3, frame % 2, 0.7)])
+    restored = WindowedStats(CLASS_SKUS, LABEL_TABLES, window_frames=2, num_windows=4, fps=10.0)
+    restored.load_state_dict(stats.state_dict())
+    update(stats, [(0, 0, 0.7)])
+    update(restored, [(0, 0, 0.7)])
+    assert restored.to_frame("brand").equals(stats.to_frame("brand"))
+
+
+def test_empty_series():
+    assert WindowedStats(CLASS_SKUS, LABEL_TABLES, window_frames=5).to_frame("sku_code").empty